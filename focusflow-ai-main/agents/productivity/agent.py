@@ -2,25 +2,53 @@
 """Productivity agent — plan & task storage helpers.
 
 Public tool surface (for the LLM layer):
-    • find_similar_plans(goal: str, threshold: float = 0.8) -> List[PlanRecord]
+    • find_similar_plans(goal: str, threshold: float = 0.8, top_k: int | None = None) -> List[PlanRecord]
     • create_plan(...)
     • list_plans(), list_tasks(), create_task(), complete_task(), schedule_day(), summarize_plan()
+    • query_tasks(...) — filtered, sorted, cursor‑paginated pages; iter_tasks(...) to stream them all
+    • create_tasks_bulk(), complete_tasks_bulk(), create_plan_with_tasks() — one transaction per batch
+    • find_duplicates(kind="plans" | "tasks") — near‑duplicate groups over the whole store
+    • get_plan_progress(), check_progress_counters() — O(1) progress reads, counter rebuild
 
 `create_plan()` is now *deliberately* agnostic of duplicate detection; callers must run
 `find_similar_plans()` first if they want to warn the user.
+
+Records live in a pluggable backend (see `store.py`), chosen with `FOCUSFLOW_STORE`
+("json" legacy files by default, "journal" append‑only log, or "sqlite").  Each mutating
+call runs in a single store transaction (`store.atomic`, re‑run if a concurrent writer got
+there first), so it loads and saves every touched file at most once (the journal appends
+one line instead).
+
+Every public function has an ``a``‑prefixed coroutine twin (`acreate_task()`, …) that
+runs it on a dedicated I/O thread pool, so lock waits and file I/O never block an
+asyncio event loop.
 """
 
 from __future__ import annotations
 
+import re
 import json
 import uuid
+import asyncio
 import difflib
+import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import List, Optional, TypedDict
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, Optional, TypedDict
 
 import jsonschema
-from filelock import FileLock
+
+from config import STORE_BACKEND, STORE_CODEC, STORE_SHARDING
+from agents.productivity.query import TaskQuery
+from agents.productivity.scheduler import BREAK_LABEL, DAY_START, build_schedule
+from agents.productivity.store import PlanTaskStore, StoreSession, open_store
 
 # ─────────────────────────────────────────────────────
 # Paths & constants
@@ -30,11 +58,17 @@ DATA_DIR = BASE_DIR / "data"
 SCHEMA_DIR = BASE_DIR / "schemas"
 PLANS_FILE = DATA_DIR / "plans.json"
 TASKS_FILE = DATA_DIR / "tasks.json"
-LOCK_SUFFIX = ".lock"
-LOCK_TIMEOUT = 10  # seconds
 
 # Fuzzy‑match settings for duplicate search (used by find_similar_plans only)
 SIMILARITY_THRESHOLD = 0.8
+# Cosine threshold for whole‑store duplicate groups (find_duplicates)
+DUPLICATE_THRESHOLD = 0.85
+# Default page size of query_tasks (the list_tasks tool uses a smaller one)
+TASK_PAGE_SIZE = 50
+# Threads running blocking store I/O for the async API (lock waits included)
+IO_WORKERS = 8
+# Shard stores kept open; the least recently used one is closed past this
+MAX_OPEN_STORES = 64
 
 # ─────────────────────────────────────────────────────
 # Typed records
@@ -57,6 +91,8 @@ class MilestoneRecord(TypedDict):
     title: str
     task_ids: List[str]
     completed: bool
+    tasks_done: int
+    tasks_total: int
 
 class PlanRecord(TypedDict):
     id: str
@@ -68,29 +104,112 @@ class PlanRecord(TypedDict):
     tasks: List[str]
     created_at: str
     progress: int
-
-# === JSON helpers with locking & atomic writes ===
-def _load_json(path: Path) -> List[dict]:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    lock = FileLock(str(path) + LOCK_SUFFIX, timeout=LOCK_TIMEOUT)
-    with lock:
-        if not path.exists():
-            return []
-        return json.loads(path.read_text(encoding="utf-8"))
-
-def _save_json(path: Path, data: List[dict]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    temp = path.with_suffix(path.suffix + ".tmp")
-    lock = FileLock(str(path) + LOCK_SUFFIX, timeout=LOCK_TIMEOUT)
-    with lock:
-        temp.write_text(json.dumps(data, indent=2), encoding="utf-8")
-        temp.replace(path)
+    tasks_done: int
+    tasks_total: int
+    milestones_done: int
+
+# === Storage backend ===
+# With FOCUSFLOW_SHARDING=1 the store is sharded per user: each graph thread
+# (configurable "user_id", else "thread_id") gets its own data dir under
+# DATA_DIR/shards, hence its own files and locks, so concurrent users never wait on
+# each other.  Calls made outside any shard (scripts, tests, sharding off — the
+# default, which keeps existing data/ files in use) use DATA_DIR itself.
+_stores: "OrderedDict[Optional[str], PlanTaskStore]" = OrderedDict()
+_stores_mutex = threading.Lock()
+_current_shard: ContextVar[Optional[str]] = ContextVar("focusflow_shard", default=None)
+
+def shard_key(config: Optional[dict]) -> Optional[str]:
+    """Return the shard key carried by a LangGraph / LangChain config, if any."""
+    if not STORE_SHARDING or not config:
+        return None
+    configurable = config.get("configurable") or {}
+    key = configurable.get("user_id") or configurable.get("thread_id")
+    return str(key) if key else None
+
+def shard_data_dir(key: Optional[str], data_dir: Optional[Path] = None) -> Path:
+    """Directory of shard *key* under *data_dir* (default DATA_DIR); ``None`` → the shared dir."""
+    base = DATA_DIR if data_dir is None else Path(data_dir)
+    if key is None:
+        return base
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", key)[:40]
+    return base / "shards" / f"{slug}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}"
+
+@contextmanager
+def use_shard(key: Optional[str]) -> Iterator[None]:
+    """Route every store call in this context (thread / task) to shard *key*."""
+    token = _current_shard.set(key)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+def user_shard(config: Optional[dict]):
+    """`use_shard` for the user named in *config* (what the tools receive)."""
+    return use_shard(shard_key(config))
+
+def get_store() -> PlanTaskStore:
+    """Return the current shard's store, opening the configured backend on first use.
+
+    At most `MAX_OPEN_STORES` shard stores stay open: the least recently used
+    one is closed (the shared ``None`` store never is).  A closed store still
+    works for whoever holds it; it re‑opens its files on next use.
+    """
+    key = _current_shard.get()
+    evicted = []
+    with _stores_mutex:
+        store = _stores.get(key)
+        if store is not None:
+            _stores.move_to_end(key)
+            return store
+        store = _stores[key] = open_store(STORE_BACKEND, shard_data_dir(key), STORE_CODEC)
+        for old_key in list(_stores):
+            if len(_stores) <= MAX_OPEN_STORES:
+                break
+            if old_key is not None:
+                evicted.append(_stores.pop(old_key))
+    for old in evicted:
+        old.close()
+    return store
+
+def set_store(store: Optional[PlanTaskStore], shard: Optional[str] = None) -> None:
+    """Swap the backend of *shard* (``None`` closes and forgets every store; each re‑opens lazily)."""
+    with _stores_mutex:
+        if store is None:
+            closing = list(_stores.values())
+            _stores.clear()
+        else:
+            closing = []
+            _stores[shard] = store
+    for old in closing:
+        old.close()
 
 # === Schema validation ===
-def _validate(instance: dict, schema_file: str):
+# Compiled validators, one per schema file: the schema is read, checked and
+# compiled on first use only.
+_validators: dict = {}
+
+def _validator(schema_file: str):
     schema_path = SCHEMA_DIR / schema_file
-    schema = json.loads(schema_path.read_text(encoding="utf-8"))
-    jsonschema.validate(instance=instance, schema=schema)
+    validator = _validators.get(schema_path)
+    if validator is None:
+        schema = json.loads(schema_path.read_text(encoding="utf-8"))
+        validator_cls = jsonschema.validators.validator_for(schema)
+        validator_cls.check_schema(schema)
+        validator = _validators[schema_path] = validator_cls(schema)
+    return validator
+
+def _validate(instance: dict, schema_file: str):
+    _validator(schema_file).validate(instance)
+
+def _validate_many(instances: List[dict], schema_file: str):
+    """Validate a batch against one compiled schema; the first invalid record raises."""
+    validator = _validator(schema_file)
+    for instance in instances:
+        validator.validate(instance)
+
+def clear_validator_cache() -> None:
+    """Forget compiled schemas (e.g. after editing files under `schemas/`)."""
+    _validators.clear()
 
 # ─────────────────────────────────────────────────────
 # Helper utilities (string similarity, listing)
@@ -101,64 +220,178 @@ def _string_similarity(a: str, b: str) -> float:
     return difflib.SequenceMatcher(None, a.casefold(), b.casefold()).ratio()
 
 
-def find_similar_plans(goal: str, threshold: float = SIMILARITY_THRESHOLD) -> List[PlanRecord]:
-    """Return stored plans whose goal resembles *goal* >= *threshold*."""
-    plans: List[PlanRecord] = _load_json(PLANS_FILE)  # type: ignore[assignment]
-    return [p for p in plans if _string_similarity(goal, p.get("goal", "")) >= threshold]
+def find_similar_plans(
+    goal: str,
+    threshold: float = SIMILARITY_THRESHOLD,
+    top_k: Optional[int] = None,
+) -> List[PlanRecord]:
+    """Return stored plans whose goal resembles *goal* >= *threshold*.
+
+    Same matches as comparing `_string_similarity` against every plan, served from the
+    store's goal n‑gram index.  With *top_k*, only the best *top_k* matches are returned,
+    best first.
+    """
+    with get_store().transaction(readonly=True) as tx:
+        hits = tx.goal_index().search(goal, threshold, top_k)
+        return [tx.get_plan(plan_id) for plan_id, _ in hits]  # type: ignore[misc]
 
 
 def list_plans() -> List[PlanRecord]:  # type: ignore[override]
     """Return all plans (read‑only)."""
-    return _load_json(PLANS_FILE)  # type: ignore[return-value]
+    return get_store().list_plans()  # type: ignore[return-value]
 
 
 def list_tasks() -> List[TaskRecord]:  # type: ignore[override]
-    """Return all tasks (read‑only)."""
-    return _load_json(TASKS_FILE)  # type: ignore[return-value]
+    """Return all tasks (read‑only); prefer `query_tasks` / `iter_tasks`."""
+    return get_store().list_tasks()  # type: ignore[return-value]
+
+
+def query_tasks(
+    completed: Optional[bool] = None,
+    plan_id: Optional[str] = None,
+    milestone_id: Optional[str] = None,
+    priority: Optional[str] = None,
+    deadline_from: Optional[str] = None,
+    deadline_to: Optional[str] = None,
+    text: Optional[str] = None,
+    order_by: str = "created_at",
+    descending: bool = False,
+    limit: Optional[int] = TASK_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> dict:
+    """Return one page of matching tasks: ``{"tasks": [...], "next_cursor": str | None}``.
+
+    Filters are ANDed (see `query.TaskQuery`); pass `next_cursor` back as *cursor*
+    with the same filters and order to get the following page.
+    """
+    query = TaskQuery(completed, plan_id, milestone_id, priority, deadline_from, deadline_to,
+                      text, order_by, descending)
+    tasks, next_cursor = get_store().query_tasks(query, limit, cursor)
+    return {"tasks": tasks, "next_cursor": next_cursor}
+
+
+def iter_tasks(page_size: int = 500, **filters) -> Iterator[TaskRecord]:
+    """Yield every task matching *filters* (`query_tasks` keywords), one page in memory at a time.
+
+    Each page is its own short read transaction, so a long export never holds up writers.
+    """
+    cursor = None
+    while True:
+        page = query_tasks(**filters, limit=page_size, cursor=cursor)
+        yield from page["tasks"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+def find_duplicates(kind: str = "plans", threshold: float = DUPLICATE_THRESHOLD) -> List[List[dict]]:
+    """Group near‑duplicate plans (by goal) or tasks (by title) across the whole store.
+
+    Records are linked when the cosine similarity of their character‑trigram TF‑IDF
+    vectors is >= *threshold*; each group lists its records in store order.
+    """
+    from agents.productivity.dedup import find_duplicate_groups  # needs numpy
+
+    if kind not in ("plans", "tasks"):
+        raise ValueError(f"kind must be 'plans' or 'tasks', not {kind!r}")
+    field = "goal" if kind == "plans" else "title"
+    with get_store().transaction(readonly=True) as tx:
+        records = tx.list_plans() if kind == "plans" else tx.list_tasks()
+    groups = find_duplicate_groups([r.get(field) or "" for r in records], threshold)
+    return [[records[i] for i in group] for group in groups]
 
 
 # ─────────────────────────────────────────────────────
 # Plan CRUD
 
-def create_plan(
+def _new_plan_record(
     goal: str,
     deadline: str,
     priority: str,
     milestones: List[str],
-    status: Optional[str] = "in_progress"
+    status: Optional[str],
 ) -> PlanRecord:
-    """
-    Create a new plan with milestones and empty tasks list — duplicate detection left to caller.
-    """
-    plans = _load_json(PLANS_FILE)
-    plan_id = uuid.uuid4().hex
-
-    new_plan: PlanRecord = {
-        "id": plan_id,
+    return {
+        "id": uuid.uuid4().hex,
         "goal": goal,
         "deadline": deadline,
         "priority": priority,
         "status": status,
         "milestones": [
-            {"id": uuid.uuid4().hex, "title": title, "task_ids": [], "completed": False}
+            {"id": uuid.uuid4().hex, "title": title, "task_ids": [], "completed": False,
+             "tasks_done": 0, "tasks_total": 0}
             for title in milestones
         ],
         "tasks": [],
         "created_at": datetime.utcnow().isoformat(),
-        "progress": 0
+        "progress": 0,
+        "tasks_done": 0,
+        "tasks_total": 0,
+        "milestones_done": 0,
     }
 
+def create_plan(
+    goal: str,
+    deadline: str,
+    priority: str,
+    milestones: List[str],
+    status: Optional[str] = "in_progress"
+) -> PlanRecord:
+    """
+    Create a new plan with milestones and empty tasks list — duplicate detection left to caller.
+    """
+    new_plan = _new_plan_record(goal, deadline, priority, milestones, status)
+
     # validate
     _validate(new_plan, "planning_schema.json")
 
-    plans.append(new_plan)
-    _save_json(PLANS_FILE, plans)
+    get_store().atomic(lambda tx: tx.put_plan(new_plan))
     return new_plan
 
+def create_plan_with_tasks(
+    goal: str,
+    deadline: str,
+    priority: str,
+    milestones: List[str],
+    tasks: List[dict],
+    status: Optional[str] = "in_progress"
+) -> PlanRecord:
+    """
+    Create a plan and its whole task breakdown in one transaction.
+
+    Each item of *tasks* takes the `create_task` keyword arguments except the
+    plan/milestone ids; use ``"milestone": <milestone title>`` to link a task to
+    one of the new milestones.
+    """
+    new_plan = _new_plan_record(goal, deadline, priority, milestones, status)
+    ms_ids = {ms["title"].casefold(): ms["id"] for ms in new_plan["milestones"]}
+
+    new_tasks = []
+    for spec in tasks:
+        spec = dict(spec)
+        ms_title = spec.pop("milestone", None)
+        milestone_id = None
+        if ms_title:
+            milestone_id = ms_ids.get(ms_title.casefold())
+            if milestone_id is None:
+                raise KeyError(f"Milestone {ms_title!r} is not one of the plan's milestones")
+        new_tasks.append(_new_task_record(plan_id=new_plan["id"], milestone_id=milestone_id, **spec))
+
+    # validate
+    _validate(new_plan, "planning_schema.json")
+    _validate_many(new_tasks, "task_schema.json")
+
+    def _create(tx: StoreSession) -> PlanRecord:
+        tx.put_plan(new_plan)
+        _insert_tasks(tx, new_tasks)
+        return _get_plan_or_raise(tx, new_plan["id"])
+
+    return get_store().atomic(_create)
+
 # ─────────────────────────────────────────────────────
 # Task CRUD
 
-def create_task(
+def _new_task_record(
     title: str,
     priority: Optional[str] = None,
     deadline: Optional[str] = None,
@@ -166,11 +399,7 @@ def create_task(
     plan_id: Optional[str] = None,
     milestone_id: Optional[str] = None
 ) -> TaskRecord:
-    """
-    Create a task, optionally linked to a plan & milestone.
-    """
-    tasks = _load_json(TASKS_FILE)
-    new_task: TaskRecord = {
+    return {
         "id": uuid.uuid4().hex,
         "title": title,
         "completed": False,
@@ -183,128 +412,298 @@ def create_task(
         "complete_at": None
     }
 
+def create_task(
+    title: str,
+    priority: Optional[str] = None,
+    deadline: Optional[str] = None,
+    estimated_time: Optional[int] = None,
+    plan_id: Optional[str] = None,
+    milestone_id: Optional[str] = None
+) -> TaskRecord:
+    """
+    Create a task, optionally linked to a plan & milestone (the plan is looked up
+    from the milestone when only `milestone_id` is given).
+    """
+    new_task = _new_task_record(title, priority, deadline, estimated_time, plan_id, milestone_id)
+
     # validate
     _validate(new_task, "task_schema.json")
 
-    tasks.append(new_task)
-    _save_json(TASKS_FILE, tasks)
-
-    # Link into plan & milestone if provided
-    if plan_id:
-        _attach_task_to_plan(plan_id, new_task["id"])
-    if milestone_id:
-        _attach_task_to_milestone(plan_id, milestone_id, new_task["id"])
+    # One session: the task, its plan link and its milestone link commit together
+    get_store().atomic(lambda tx: _insert_tasks(tx, [new_task]))
     return new_task
 
-def _attach_task_to_plan(plan_id: str, task_id: str):
-    plans = _load_json(PLANS_FILE)
-    for plan in plans:
-        if plan["id"] == plan_id:
-            plan.setdefault("tasks", []).append(task_id)
-            _save_json(PLANS_FILE, plans)
+def create_tasks_bulk(tasks: List[dict]) -> List[TaskRecord]:
+    """
+    Create many tasks at once; each item takes the `create_task` keyword arguments.
+
+    The batch is validated up front and committed in a single transaction, so either
+    every task is stored or none is.
+    """
+    new_tasks = [_new_task_record(**spec) for spec in tasks]
+
+    # validate
+    _validate_many(new_tasks, "task_schema.json")
+
+    get_store().atomic(lambda tx: _insert_tasks(tx, new_tasks))
+    return new_tasks
+
+def _get_plan_or_raise(tx: StoreSession, plan_id: str) -> PlanRecord:
+    plan = tx.get_plan(plan_id)
+    if plan is None:
+        raise KeyError(f"Plan {plan_id} not found")
+    return plan  # type: ignore[return-value]
+
+def _insert_tasks(tx: StoreSession, tasks: List[TaskRecord]):
+    """Store *tasks* and link them into their plans/milestones, touching each plan once."""
+    by_plan: dict = {}
+    for task in tasks:
+        if task["milestone_id"] and not task["plan_id"]:
+            # milestone_id → plan index lets callers omit the plan id
+            task["plan_id"] = tx.plan_id_for_milestone(task["milestone_id"])
+            if task["plan_id"] is None:
+                raise KeyError(f"Milestone {task['milestone_id']} not found")
+        if task["plan_id"]:
+            by_plan.setdefault(task["plan_id"], []).append(task)
+    tx.put_tasks(tasks)
+    for plan_id, plan_tasks in by_plan.items():
+        plan = _get_plan_or_raise(tx, plan_id)
+        _ensure_counters(tx, plan)
+        for task in plan_tasks:
+            _attach_task_to_plan(plan, task["id"])
+            if task["milestone_id"]:
+                _attach_task_to_milestone(plan, task["milestone_id"], task["id"])
+            _count_task(plan, task["milestone_id"], total=1, done=int(bool(task.get("completed"))))
+        tx.put_plan(plan)
+
+def _attach_task_to_plan(plan: PlanRecord, task_id: str):
+    plan.setdefault("tasks", []).append(task_id)
+
+def _attach_task_to_milestone(plan: PlanRecord, milestone_id: str, task_id: str):
+    for ms in plan["milestones"]:
+        if ms["id"] == milestone_id:
+            ms.setdefault("task_ids", []).append(task_id)
             return
-    raise KeyError(f"Plan {plan_id} not found")
-
-def _attach_task_to_milestone(plan_id: str, milestone_id: str, task_id: str):
-    plans = _load_json(PLANS_FILE)
-    for plan in plans:
-        if plan["id"] == plan_id:
-            for ms in plan["milestones"]:
-                if ms["id"] == milestone_id:
-                    ms.setdefault("task_ids", []).append(task_id)
-                    _save_json(PLANS_FILE, plans)
-                    return
-            raise KeyError(f"Milestone {milestone_id} not found in plan {plan_id}")
-    raise KeyError(f"Plan {plan_id} not found")
+    raise KeyError(f"Milestone {milestone_id} not found in plan {plan['id']}")
 
 def complete_task(task_id: str) -> TaskRecord:
     """
     Mark a task complete, set `complete_at`, update milestone & plan progress.
     """
-    tasks = _load_json(TASKS_FILE)
-    for t in tasks:
-        if t["id"] == task_id:
-            t["completed"] = True
-            t["complete_at"] = datetime.utcnow().isoformat()
-            _save_json(TASKS_FILE, tasks)
+    return complete_tasks_bulk([task_id])[0]
 
-            # Update milestone & plan
-            plan_id = t.get("plan_id")
-            if plan_id:
-                _update_milestone_completion(plan_id, task_id)
-                _update_plan_progress(plan_id)
-            return t
-    raise KeyError(f"Task {task_id} not found")
-
-def list_tasks() -> List[dict]:
-    """List all current tasks."""
-    return _load_json(TASKS_FILE)
+def complete_tasks_bulk(task_ids: List[str]) -> List[TaskRecord]:
+    """
+    Mark several tasks complete in one transaction; each affected plan's
+    counters & progress are updated once.  Unknown ids abort the whole batch.
+    """
+    now = datetime.utcnow().isoformat()
+
+    def _complete(tx: StoreSession) -> List[TaskRecord]:
+        done = []
+        touched: dict = {}
+        for task_id in dict.fromkeys(task_ids):  # a repeated id counts once
+            t = tx.get_task(task_id)
+            if t is None:
+                raise KeyError(f"Task {task_id} not found")
+            if not t.get("completed") and t.get("plan_id"):
+                touched.setdefault(t["plan_id"], []).append(t)
+            t["completed"] = True
+            t["complete_at"] = now
+            done.append(t)
+        tx.put_tasks(done)
+
+        # Update milestone & plan counters
+        for plan_id, newly_done in touched.items():
+            plan = _get_plan_or_raise(tx, plan_id)
+            if _ensure_counters(tx, plan):  # rebuilt from the (already updated) tasks
+                tx.put_plan(plan)
+                continue
+            for t in newly_done:
+                _count_task(plan, t.get("milestone_id"), done=1)
+            tx.put_plan(plan)
+        return done  # type: ignore[return-value]
+
+    return get_store().atomic(_complete)
 
 # ─────────────────────────────────────────────────────
 # Milestone & progress helpers
 
-def _update_milestone_completion(plan_id: str, task_id: str):
-    plans = _load_json(PLANS_FILE)
-    tasks = {t["id"]: t for t in _load_json(TASKS_FILE)}
-    for plan in plans:
-        if plan["id"] == plan_id:
-            changed = False
-            for ms in plan["milestones"]:
-                if task_id in ms.get("task_ids", []):
-                    all_done = all(tasks[tid]["completed"] for tid in ms["task_ids"])
-                    if ms["completed"] != all_done:
-                        ms["completed"] = all_done
-                        changed = True
-            if changed:
-                _save_json(PLANS_FILE, plans)
-            return
-    raise KeyError(f"Plan {plan_id} not found")
-
-def _update_plan_progress(plan_id: str):
-    plans = _load_json(PLANS_FILE)
-    for plan in plans:
-        if plan["id"] == plan_id:
-            mss = plan.get("milestones", [])
-            plan["progress"] = (
-                0 if not mss else int(
-                    sum(1 for ms in mss if ms["completed"]) / len(mss) * 100
-                )
-            )
-            _save_json(PLANS_FILE, plans)
-            return
-    raise KeyError(f"Plan {plan_id} not found")
+# Each milestone keeps `tasks_done` / `tasks_total` and each plan `tasks_done`,
+# `tasks_total` & `milestones_done`; every task change applies a delta through
+# `_count_task`, so progress never needs a rescan.  Plans written before the
+# counters existed are rebuilt the first time they are touched.
+
+def _milestone_done(ms: MilestoneRecord) -> bool:
+    return ms["tasks_total"] > 0 and ms["tasks_done"] == ms["tasks_total"]
+
+def _plan_progress(plan: PlanRecord) -> int:
+    mss = plan.get("milestones", [])
+    return 0 if not mss else int(plan["milestones_done"] / len(mss) * 100)
+
+def _count_task(plan: PlanRecord, milestone_id: Optional[str], total: int = 0, done: int = 0):
+    """Apply one task's delta: added/removed → total ±1, completed/reopened → done ±1."""
+    plan["tasks_total"] += total
+    plan["tasks_done"] += done
+    if milestone_id:
+        ms = next((m for m in plan["milestones"] if m["id"] == milestone_id), None)
+        if ms is not None:
+            ms["tasks_total"] += total
+            ms["tasks_done"] += done
+            completed = _milestone_done(ms)
+            if ms["completed"] != completed:
+                ms["completed"] = completed
+                plan["milestones_done"] += 1 if completed else -1
+    plan["progress"] = _plan_progress(plan)
+
+def _rebuild_counters(plan: PlanRecord, completed: dict):
+    """Recompute every counter of *plan* from scratch (*completed*: task id → bool)."""
+    task_ids = plan.get("tasks", [])
+    plan["tasks_total"] = len(task_ids)
+    plan["tasks_done"] = sum(1 for tid in task_ids if completed.get(tid, False))
+    for ms in plan.get("milestones", []):
+        ids = ms.get("task_ids", [])
+        ms["tasks_total"] = len(ids)
+        ms["tasks_done"] = sum(1 for tid in ids if completed.get(tid, False))
+        ms["completed"] = _milestone_done(ms)
+    plan["milestones_done"] = sum(1 for ms in plan.get("milestones", []) if ms["completed"])
+    plan["progress"] = _plan_progress(plan)
+
+def _ensure_counters(tx: StoreSession, plan: PlanRecord) -> bool:
+    """Rebuild *plan*'s counters if it predates them; returns True when rebuilt."""
+    if plan.get("tasks_total") is not None and all(
+        ms.get("tasks_total") is not None for ms in plan.get("milestones", [])
+    ):
+        return False
+    _rebuild_counters(plan, {t["id"]: t.get("completed", False) for t in tx.list_tasks(plan_id=plan["id"])})
+    return True
+
+def _counters(plan: PlanRecord) -> tuple:
+    return (
+        plan.get("tasks_done"), plan.get("tasks_total"), plan.get("milestones_done"), plan.get("progress"),
+        [(ms.get("tasks_done"), ms.get("tasks_total"), ms.get("completed")) for ms in plan.get("milestones", [])],
+    )
+
+def check_progress_counters(repair: bool = False) -> List[str]:
+    """Rebuild every plan's counters from its tasks and return the ids that drifted.
+
+    With *repair*, the drifted plans are written back in one transaction.
+    """
+    def _check(tx: StoreSession) -> List[str]:
+        drifted = []
+        completed = {t["id"]: t.get("completed", False) for t in tx.list_tasks()}
+        for plan in tx.list_plans():
+            before = _counters(plan)
+            _rebuild_counters(plan, completed)
+            if _counters(plan) != before:
+                drifted.append(plan["id"])
+                if repair:
+                    tx.put_plan(plan)
+        return drifted
+
+    if repair:
+        return get_store().atomic(_check)
+    with get_store().transaction(readonly=True) as tx:
+        return _check(tx)
+
+def get_plan_progress(plan_id: str) -> dict:
+    """Return a plan's progress (% of milestones done) and task/milestone counters."""
+    with get_store().transaction(readonly=True) as tx:
+        plan = _get_plan_or_raise(tx, plan_id)
+        _ensure_counters(tx, plan)  # legacy plan: computed on the fly, not saved
+    return {
+        "progress": plan["progress"],
+        "tasks_done": plan["tasks_done"],
+        "tasks_total": plan["tasks_total"],
+        "milestones_done": plan["milestones_done"],
+        "milestones_total": len(plan.get("milestones", [])),
+    }
 
 
 # (schedule_day & summarize_plan)
 # ─────────────────────────────────────────────────────
 
-def schedule_day(available_hours: Optional[int] = 8) -> dict:
-    """Generate a daily schedule based on tasks and available hours."""
-    tasks = _load_json(TASKS_FILE)
-    tasks = [t for t in tasks if not t.get("completed")]
-    tasks.sort(key=lambda t: (t.get("priority", "medium"), t.get("deadline", "9999-12-31")))
+def schedule_day(
+    available_hours: Optional[float] = 8,
+    break_minutes: int = 0,
+    break_every: int = 90,
+) -> dict:
+    """Generate a daily schedule from open tasks, packed into *available_hours*.
 
-    schedule = {}
-    current_time = datetime.utcnow().replace(hour=9, minute=0)
-    for task in tasks[:available_hours]:
-        end_time = current_time + timedelta(hours=1)
-        schedule[f"{current_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}"] = task["title"]
-        current_time = end_time
+    Tasks are ranked by priority plus deadline urgency and take their `estimated_time`
+    (minutes, one hour if unset); see `scheduler.build_schedule`.  Set *break_minutes*
+    to add a break after every *break_every* minutes of work.
+    """
+    tasks = get_store().list_tasks(completed=False)
+    start = datetime.utcnow().replace(hour=DAY_START[0], minute=DAY_START[1], second=0, microsecond=0)
+    minutes = int((8 if available_hours is None else available_hours) * 60)
 
+    schedule = {}
+    for begin, end, task in build_schedule(tasks, minutes, start, break_minutes, break_every):
+        schedule[f"{begin.strftime('%H:%M')} - {end.strftime('%H:%M')}"] = task["title"] if task else BREAK_LABEL
     return schedule
 
 # ─────────────────────────────────────────────────────
 
 def summarize_plan(plan_id: str) -> str:
     """Summarize the key fields of a plan by ID."""
-    plans = _load_json(PLANS_FILE)
-    for plan in plans:
-        if plan["id"] == plan_id:
-            milestones = ", ".join(m["title"] for m in plan.get("milestones", []))
-            return (
-                f"Goal: {plan['goal']}\n"
-                f"Deadline: {plan['deadline']}\n"
-                f"Priority: {plan['priority']}\n"
-                f"Milestones: {milestones}"
-            )
-    return f"⚠️ Plan with ID {plan_id} not found."
\ No newline at end of file
+    plan = get_store().get_plan(plan_id)
+    if plan is None:
+        return f"⚠️ Plan with ID {plan_id} not found."
+    milestones = ", ".join(m["title"] for m in plan.get("milestones", []))
+    summary = (
+        f"Goal: {plan['goal']}\n"
+        f"Deadline: {plan['deadline']}\n"
+        f"Priority: {plan['priority']}\n"
+        f"Milestones: {milestones}"
+    )
+    if plan.get("tasks_total") is not None:
+        summary += f"\nProgress: {plan.get('progress', 0)}% ({plan['tasks_done']}/{plan['tasks_total']} tasks done)"
+    return summary
+
+
+# === Async API ===
+# The store is blocking (file locks, fsync, sqlite3), so the coroutines below run the
+# sync functions on a dedicated thread pool rather than the loop's default executor:
+# a burst of slow lock waits can then never starve unrelated `run_in_executor` users.
+# The caller's context is copied into the worker, so `use_shard` carries over.
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_mutex = threading.Lock()
+
+def io_executor() -> ThreadPoolExecutor:
+    """Return the store I/O thread pool, starting it on first use."""
+    global _io_executor
+    if _io_executor is None:
+        with _io_executor_mutex:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="focusflow-io")
+    return _io_executor
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await ``fn(*args, **kwargs)`` run on the I/O pool in the current context."""
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(io_executor(), partial(ctx.run, fn, *args, **kwargs))
+
+def _async(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_io(fn, *args, **kwargs)
+    wrapper.__name__ = wrapper.__qualname__ = f"a{fn.__name__}"
+    wrapper.__doc__ = f"Async `{fn.__name__}` (runs on the store I/O pool)."
+    return wrapper
+
+afind_similar_plans = _async(find_similar_plans)
+alist_plans = _async(list_plans)
+alist_tasks = _async(list_tasks)
+aquery_tasks = _async(query_tasks)
+afind_duplicates = _async(find_duplicates)
+acreate_plan = _async(create_plan)
+acreate_plan_with_tasks = _async(create_plan_with_tasks)
+acreate_task = _async(create_task)
+acreate_tasks_bulk = _async(create_tasks_bulk)
+acomplete_task = _async(complete_task)
+acomplete_tasks_bulk = _async(complete_tasks_bulk)
+acheck_progress_counters = _async(check_progress_counters)
+aget_plan_progress = _async(get_plan_progress)
+aschedule_day = _async(schedule_day)
+asummarize_plan = _async(summarize_plan)
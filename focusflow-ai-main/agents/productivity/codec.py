@@ -0,0 +1,108 @@
+# /agents/productivity/codec.py
+"""Serialization codecs for the store's record files.
+
+    json     compact stdlib JSON (the default; always available)
+    orjson   the same JSON, encoded / decoded by orjson        (pip install orjson)
+    msgpack  binary MessagePack, smallest and fastest to load  (pip install msgpack)
+    auto     orjson when installed, else json
+
+The codec only decides how files are *written*: `decode` sniffs the format of
+what it reads, so a data dir can switch codecs (or still hold the legacy
+pretty‑printed files) without a migration step.  A codec whose library is
+missing falls back to stdlib JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Callable, Dict
+
+log = logging.getLogger(__name__)
+
+CODECS = ("json", "orjson", "msgpack", "auto")
+_BOM = b"\xef\xbb\xbf"
+
+
+class Codec:
+    """``dumps(obj) -> bytes`` / ``loads(bytes) -> obj`` for one on‑disk *format* ("json" | "msgpack")."""
+
+    __slots__ = ("name", "format", "dumps", "loads")
+
+    def __init__(self, name: str, format: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+        self.name = name
+        self.format = format
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self) -> str:
+        return f"Codec({self.name!r})"
+
+
+def _stdlib_json() -> Codec:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return Codec("json", "json", dumps, json.loads)
+
+
+def _orjson() -> Codec:
+    import orjson
+    return Codec("orjson", "json", orjson.dumps, orjson.loads)
+
+
+def _msgpack() -> Codec:
+    try:
+        import msgpack
+        return Codec("msgpack", "msgpack",
+                     lambda obj: msgpack.packb(obj, use_bin_type=True),
+                     lambda data: msgpack.unpackb(data, raw=False))
+    except ImportError:
+        import ormsgpack  # same wire format, different binding
+        return Codec("msgpack", "msgpack", ormsgpack.packb, ormsgpack.unpackb)
+
+
+_FACTORIES: Dict[str, Callable[[], Codec]] = {"json": _stdlib_json, "orjson": _orjson, "msgpack": _msgpack}
+_codecs: Dict[str, Codec] = {}
+
+
+def _load(name: str, quiet: bool = False) -> Codec:
+    codec = _codecs.get(name)
+    if codec is None:
+        try:
+            codec = _FACTORIES[name]()
+        except ImportError:
+            if not quiet:
+                log.warning("%s is not installed; the store falls back to stdlib JSON", name)
+            codec = _load("json")
+        _codecs[name] = codec
+    return codec
+
+
+def get_codec(name: str = "json") -> Codec:
+    """Return the codec called *name* (see `CODECS`)."""
+    if name == "auto":
+        return _load("orjson", quiet=True)
+    if name not in _FACTORIES:
+        raise ValueError(f"Unsupported codec {name!r}. Use one of {', '.join(CODECS)}.")
+    return _load(name)
+
+
+def json_codec(codec: Codec) -> Codec:
+    """*codec* if it writes JSON, else the fastest JSON codec (for text‑only places like log lines)."""
+    return codec if codec.format == "json" else get_codec("auto")
+
+
+def detect_format(data: bytes) -> str:
+    """"json" for (possibly indented) JSON documents, "msgpack" for anything else."""
+    head = data[len(_BOM):] if data.startswith(_BOM) else data
+    return "json" if head.lstrip(b" \t\r\n")[:1] in (b"[", b"{", b"") else "msgpack"
+
+
+def decode(data: bytes) -> Any:
+    """Parse a file written by any codec (or the legacy pretty‑printed JSON)."""
+    if detect_format(data) == "json":
+        return get_codec("auto").loads(data[len(_BOM):] if data.startswith(_BOM) else data)
+    msgpack_codec = _load("msgpack", quiet=True)
+    if msgpack_codec.format != "msgpack":
+        raise RuntimeError("this file is MessagePack‑encoded; install msgpack to read it")
+    return msgpack_codec.loads(data)
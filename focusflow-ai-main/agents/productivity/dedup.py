@@ -0,0 +1,152 @@
+# /agents/productivity/dedup.py
+"""Whole‑store near‑duplicate detection (char n‑gram TF‑IDF + cosine, NumPy).
+
+`find_duplicate_groups(texts, threshold)` clusters texts whose TF‑IDF cosine
+similarity reaches *threshold* (connected components over the matching pairs).
+
+A dense ``n × vocabulary`` matrix does not fit in memory for tens of
+thousands of records, so the all‑pairs pass runs on *hashed* vectors:
+
+• every n‑gram is folded into one of ``dims`` buckets (unsigned hashing) and
+  each row is divided by the norm of its *exact* TF‑IDF vector.  All weights
+  are non‑negative, so bucket collisions can only add to a dot product: the
+  hashed cosine is an upper bound of the exact one and no true pair is lost;
+• block‑wise ``float32`` matrix products (BLAS) over the upper triangle keep
+  the pairs whose bound reaches the threshold;
+• each surviving pair is re‑scored with the exact sparse cosine.
+
+Texts that are identical after normalisation are collapsed first, which is
+the common case when the LLM re‑creates the same plan.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+NGRAM = 3
+HASH_DIMS = 256
+BLOCK_ROWS = 1024
+BLOCK_COLS = 8192
+_EPS = 1e-4  # float32 slack on the upper bound
+
+_WS = re.compile(r"\s+")
+
+
+def _normalise(text: str) -> str:
+    return _WS.sub(" ", (text or "").casefold()).strip()
+
+
+def _grams(text: str, n: int) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(max(len(padded) - n + 1, 0)))
+
+
+def _tfidf(docs: List[Counter]) -> Tuple[List[Dict[str, float]], np.ndarray]:
+    """Sparse TF‑IDF vectors (sublinear tf, smoothed idf) and their L2 norms."""
+    df: Counter = Counter()
+    for grams in docs:
+        df.update(grams.keys())
+    n = len(docs)
+    idf = {g: math.log((1 + n) / (1 + d)) + 1 for g, d in df.items()}
+    vectors = [{g: (1 + math.log(c)) * idf[g] for g, c in grams.items()} for grams in docs]
+    norms = np.array([math.sqrt(sum(w * w for w in v.values())) for v in vectors], dtype=np.float64)
+    return vectors, norms
+
+
+def _hashed_matrix(vectors: List[Dict[str, float]], norms: np.ndarray, dims: int) -> np.ndarray:
+    rows, cols, weights = [], [], []
+    for r, vec in enumerate(vectors):
+        for gram, w in vec.items():
+            rows.append(r)
+            cols.append(hash(gram) % dims)
+            weights.append(w)
+    matrix = np.zeros((len(vectors), dims), dtype=np.float32)
+    np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)),
+              np.asarray(weights, dtype=np.float32))
+    matrix /= np.where(norms > 0, norms, 1).astype(np.float32)[:, None]
+    return matrix
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float], na: float, nb: float) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b[g] for g, w in a.items() if g in b) / (na * nb)
+
+
+def _candidate_pairs(matrix: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    n = matrix.shape[0]
+    pairs = []
+    for i0 in range(0, n, BLOCK_ROWS):
+        rows = matrix[i0:i0 + BLOCK_ROWS]
+        for j0 in range(i0, n, BLOCK_COLS):
+            hits = (rows @ matrix[j0:j0 + BLOCK_COLS].T) >= threshold - _EPS
+            hit_rows = np.flatnonzero(hits.any(axis=1))
+            if not hit_rows.size:
+                continue
+            ii, jj = np.nonzero(hits[hit_rows])
+            ii = hit_rows[ii]
+            ii += i0
+            jj += j0
+            keep = jj > ii  # upper triangle only
+            pairs.extend(zip(ii[keep].tolist(), jj[keep].tolist()))
+    return pairs
+
+
+class _DisjointSet:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def find_duplicate_groups(
+    texts: Sequence[str],
+    threshold: float = 0.85,
+    ngram: int = NGRAM,
+    dims: int = HASH_DIMS,
+) -> List[List[int]]:
+    """Return groups (≥ 2 members) of indices into *texts* that are near‑duplicates.
+
+    Two texts are linked when the cosine similarity of their character *ngram*
+    TF‑IDF vectors is >= *threshold*; groups are the connected components.
+    Members are in index order, groups ordered by their first member.
+    """
+    # 1. collapse texts that normalise to the same string
+    unique: Dict[str, int] = {}
+    owner = []
+    for text in texts:
+        owner.append(unique.setdefault(_normalise(text), len(unique)))
+    uniq_texts = list(unique)
+
+    sets = _DisjointSet(len(uniq_texts))
+    if len(uniq_texts) > 1:
+        vectors, norms = _tfidf([_grams(t, ngram) for t in uniq_texts])
+        nonempty = np.flatnonzero(norms > 0)
+        matrix = _hashed_matrix([vectors[i] for i in nonempty], norms[nonempty], dims)
+
+        # 2. hashed upper bound → candidates, 3. exact cosine
+        for a, b in _candidate_pairs(matrix, threshold):
+            ia, ib = int(nonempty[a]), int(nonempty[b])
+            if sets.find(ia) == sets.find(ib):
+                continue
+            if _cosine(vectors[ia], vectors[ib], norms[ia], norms[ib]) >= threshold:
+                sets.union(ia, ib)
+
+    groups: Dict[int, List[int]] = {}
+    for index, u in enumerate(owner):
+        groups.setdefault(sets.find(u), []).append(index)
+    return sorted((g for g in groups.values() if len(g) > 1), key=lambda g: g[0])
@@ -1,35 +1,64 @@
 # /agents/productivity/prompt_builder.py
 
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+from config import PROMPT_RELOAD
 
 PROMPT_DIR = os.path.join(os.path.dirname(__file__), "prompt_fragments")
 
+# intent → extra fragment (appended after base.txt, in this order)
+INTENT_FRAGMENTS = {
+    "planning": "planning.txt",
+    "tasks": "tasks.txt",
+    "scheduling": "scheduling.txt",
+    "tracking": "tracking.txt",
+}
+
+# Fragments are read once and prompts assembled once per fragment set, so a turn
+# costs a dict lookup.  With PROMPT_RELOAD (development) every build stats the
+# fragments it uses and re-reads the ones whose mtime changed.
+_fragments: Dict[str, Tuple[int, str]] = {}
+_prompts: Dict[Tuple[str, ...], str] = {}
+
 def load_fragment(filename: str) -> str:
     """
-    Utility to load a prompt fragment from disk.
+    Utility to load a prompt fragment from disk (cached; see PROMPT_RELOAD).
     """
+    cached = _fragments.get(filename)
+    if cached is not None and not PROMPT_RELOAD:
+        return cached[1]
     path = os.path.join(PROMPT_DIR, filename)
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    mtime = os.stat(path).st_mtime_ns
+    if cached is None or cached[0] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = _fragments[filename] = (mtime, f.read())
+        _prompts.clear()  # assembled prompts may embed the old text
+    return cached[1]
 
-def build_prompt(turns: list[dict], intent: Optional[str] = None) -> str:
-    prompt_parts = []
+def clear_prompt_cache() -> None:
+    _fragments.clear()
+    _prompts.clear()
 
-    base_prompt = load_fragment("base.txt")
-    prompt_parts.append(base_prompt)
+def fragment_names(intent: Optional[str] = None) -> Tuple[str, ...]:
+    """The fragment files making up the prompt for *intent*."""
+    extra = INTENT_FRAGMENTS.get(intent) if intent else None
+    return ("base.txt", extra) if extra else ("base.txt",)
 
-    # full_context = " ".join(t.get("content", "") for t in turns).lower()
-    full_context = " "
+def _assemble(names: Tuple[str, ...]) -> str:
+    if PROMPT_RELOAD:
+        for name in names:
+            load_fragment(name)
+    prompt = _prompts.get(names)
+    if prompt is None:
+        prompt = _prompts[names] = "\n\n".join(load_fragment(name) for name in names)
+    return prompt
 
-    # If intent is provided by router, prefer it
-    if intent == "planning" or "plan" in full_context:
-        prompt_parts.append(load_fragment("planning.txt"))
-    if intent == "tasks" or any(k in full_context for k in ["task", "todo", "step"]):
-        prompt_parts.append(load_fragment("tasks.txt"))
-    if intent == "scheduling" or any(k in full_context for k in ["schedule", "calendar", "time block"]):
-        prompt_parts.append(load_fragment("scheduling.txt"))
-    if intent == "tracking" or any(k in full_context for k in ["progress", "milestone", "tracking"]):
-        prompt_parts.append(load_fragment("tracking.txt"))
+def build_prompt(turns: list[dict], intent: Optional[str] = None) -> str:
+    # The keyword heuristics over *turns* are disabled (the router's intent wins),
+    # so the prompt depends on the intent alone.
+    return _assemble(fragment_names(intent))
 
-    return "\n\n".join(prompt_parts)
+def build_combined_prompt() -> str:
+    """base.txt plus every intent fragment — for when the intent is not known yet (single-pass mode)."""
+    return _assemble(("base.txt", *INTENT_FRAGMENTS.values()))
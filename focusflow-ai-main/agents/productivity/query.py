@@ -0,0 +1,122 @@
+# /agents/productivity/query.py
+"""Task queries behind `query_tasks` / `iter_tasks`.
+
+A `TaskQuery` holds the filters and the sort order; every backend evaluates it
+on its own terms (indexes + compact records for the JSON files, SQL for SQLite)
+and returns rows in ``(sort key, id)`` order.  Pagination is keyset based: the
+cursor is that pair for the last row of a page, so the next page starts right
+after it however many rows are inserted or completed in between, and no page
+costs more than the rows it returns (plus, for the files, one filtering pass).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Optional, Tuple
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+_NO_PRIORITY = 3
+_NO_DEADLINE = "9999-99-99"   # sorts after every ISO date
+
+# SQL over the tasks table; must agree with `TaskQuery.matches` / `TaskQuery.sort_key`
+SQL_DEADLINE = "NULLIF(substr(json_extract(data, '$.deadline'), 1, 10), '')"
+SQL_ORDER = {
+    "created_at": "COALESCE(json_extract(data, '$.created_at'), '')",
+    "deadline": f"COALESCE({SQL_DEADLINE}, '{_NO_DEADLINE}')",
+    "priority": "CASE json_extract(data, '$.priority') "
+                + " ".join(f"WHEN '{p}' THEN {r}" for p, r in PRIORITY_RANK.items())
+                + f" ELSE {_NO_PRIORITY} END",
+    "title": "COALESCE(json_extract(data, '$.title'), '')",
+}
+ORDERINGS = tuple(SQL_ORDER)
+
+
+class TaskQuery:
+    """Filters (all optional, ANDed) plus the sort order of a task query.
+
+    Deadlines compare on their ``YYYY-MM-DD`` prefix, both bounds inclusive; a
+    range excludes tasks without a deadline.  *text* is a case‑insensitive
+    substring of the title.
+    """
+
+    __slots__ = (
+        "completed", "plan_id", "milestone_id", "priority",
+        "deadline_from", "deadline_to", "text", "order_by", "descending",
+    )
+
+    def __init__(
+        self,
+        completed: Optional[bool] = None,
+        plan_id: Optional[str] = None,
+        milestone_id: Optional[str] = None,
+        priority: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_to: Optional[str] = None,
+        text: Optional[str] = None,
+        order_by: str = "created_at",
+        descending: bool = False,
+    ):
+        if order_by not in SQL_ORDER:
+            raise ValueError(f"order_by must be one of {', '.join(ORDERINGS)}")
+        self.completed = completed
+        self.plan_id = plan_id
+        self.milestone_id = milestone_id
+        self.priority = priority
+        self.deadline_from = deadline_from[:10] if deadline_from else None
+        self.deadline_to = deadline_to[:10] if deadline_to else None
+        self.text = text.casefold() if text else None
+        self.order_by = order_by
+        self.descending = descending
+
+    def matches(self, task) -> bool:
+        """Does the (slotted) task record pass every filter?"""
+        if self.completed is not None and bool(task.completed) != self.completed:
+            return False
+        if self.plan_id is not None and task.plan_id != self.plan_id:
+            return False
+        if self.milestone_id is not None and task.milestone_id != self.milestone_id:
+            return False
+        if self.priority is not None and task.priority != self.priority:
+            return False
+        if self.deadline_from or self.deadline_to:
+            deadline = (task.deadline or "")[:10]
+            if not deadline:
+                return False
+            if self.deadline_from and deadline < self.deadline_from:
+                return False
+            if self.deadline_to and deadline > self.deadline_to:
+                return False
+        return self.matches_text(task.title)
+
+    def matches_text(self, title: Optional[str]) -> bool:
+        return self.text is None or self.text in (title or "").casefold()
+
+    def sort_key(self, task) -> Tuple[Any, str]:
+        if self.order_by == "priority":
+            value: Any = PRIORITY_RANK.get(task.priority, _NO_PRIORITY)
+        elif self.order_by == "deadline":
+            value = (task.deadline or "")[:10] or _NO_DEADLINE
+        else:
+            value = getattr(task, self.order_by) or ""
+        return value, task.id
+
+    def is_after(self, key: Tuple[Any, str], cursor: Tuple[Any, str]) -> bool:
+        """Does a row with sort *key* come after *cursor* in this query's order?"""
+        return key < cursor if self.descending else key > cursor
+
+    # cursors are opaque to callers: urlsafe base64 of [order_by, descending, value, id]
+    def encode_cursor(self, key: Tuple[Any, str]) -> str:
+        raw = json.dumps([self.order_by, self.descending, *key], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> Tuple[Any, str]:
+        try:
+            order_by, descending, value, task_id = json.loads(
+                base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            )
+        except (ValueError, TypeError) as exc:
+            raise ValueError("invalid cursor") from exc
+        if order_by != self.order_by or descending != self.descending:
+            raise ValueError("cursor belongs to a query with a different sort order")
+        return value, task_id
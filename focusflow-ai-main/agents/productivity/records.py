@@ -0,0 +1,131 @@
+# /agents/productivity/records.py
+"""Compact in‑memory plan / milestone / task records.
+
+The JSON store keeps its whole working set in memory; these `__slots__`
+classes replace one dict per record (and per milestone) with a fixed layout.
+`from_dict` / `to_dict` round‑trip the on‑disk shape exactly: unknown keys
+are carried in ``extra`` and keys absent from the source stay absent.
+"""
+
+from __future__ import annotations
+
+import copy
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class _Record:
+    __slots__ = ("extra", "absent")
+
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        cls._getter = staticmethod(attrgetter(*cls.FIELDS))
+        cls._plain = "_load_field" not in cls.__dict__  # no nested fields to convert
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        obj = cls.__new__(cls)
+        load = cls._load_field
+        if data.keys() == cls._field_set:  # fast path: the usual, complete record
+            if cls._plain:
+                for name in cls.FIELDS:
+                    setattr(obj, name, data[name])
+            else:
+                for name in cls.FIELDS:
+                    setattr(obj, name, load(name, data[name]))
+            obj.absent = obj.extra = None
+            return obj
+        absent = []
+        for name in cls.FIELDS:
+            if name in data:
+                setattr(obj, name, load(name, data[name]))
+            else:
+                setattr(obj, name, None)
+                absent.append(name)
+        obj.absent = tuple(absent) if absent else None
+        extra = {k: copy.deepcopy(v) for k, v in data.items() if k not in cls._field_set}
+        obj.extra = extra or None
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._plain:
+            data = dict(zip(self.FIELDS, self._getter(self)))
+        else:
+            data = {name: self._dump_field(name, value) for name, value in zip(self.FIELDS, self._getter(self))}
+        if self.absent:
+            for name in self.absent:
+                if data[name] is None:  # set since loading → keep it
+                    del data[name]
+        if self.extra:
+            data.update(copy.deepcopy(self.extra))
+        return data
+
+    @classmethod
+    def _load_field(cls, name: str, value: Any) -> Any:
+        return value
+
+    @staticmethod
+    def _dump_field(name: str, value: Any) -> Any:
+        return value
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Task(_Record):
+    __slots__ = (
+        "id", "title", "completed", "plan_id", "milestone_id", "priority",
+        "deadline", "estimated_time", "created_at", "complete_at",
+    )
+    FIELDS = __slots__
+
+
+class Milestone(_Record):
+    __slots__ = ("id", "title", "task_ids", "completed", "tasks_done", "tasks_total")
+    FIELDS = __slots__
+
+    @classmethod
+    def _load_field(cls, name: str, value: Any) -> Any:
+        return list(value) if name == "task_ids" and value is not None else value
+
+    @staticmethod
+    def _dump_field(name: str, value: Any) -> Any:
+        return list(value) if name == "task_ids" and value is not None else value
+
+
+class Plan(_Record):
+    __slots__ = (
+        "id", "goal", "deadline", "priority", "status", "milestones",
+        "tasks", "created_at", "progress", "tasks_done", "tasks_total", "milestones_done",
+    )
+    FIELDS = __slots__
+
+    @classmethod
+    def _load_field(cls, name: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if name == "milestones":
+            return [Milestone.from_dict(ms) for ms in value]
+        if name == "tasks":
+            return list(value)
+        return value
+
+    @staticmethod
+    def _dump_field(name: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if name == "milestones":
+            return [ms.to_dict() for ms in value]
+        if name == "tasks":
+            return list(value)
+        return value
+
+    def milestone_ids(self) -> List[str]:
+        return [ms.id for ms in self.milestones or ()]
+
+
+def to_dicts(records: Iterable[_Record]) -> List[Dict[str, Any]]:
+    return [r.to_dict() for r in records]
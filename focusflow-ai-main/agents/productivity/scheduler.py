@@ -0,0 +1,112 @@
+# /agents/productivity/scheduler.py
+"""Daily scheduling engine behind `schedule_day`.
+
+Open tasks are ranked by priority weight plus deadline urgency and packed by
+`estimated_time` (minutes) into the available window.  Ranking uses a heap:
+building it is O(n) and only the tasks that get placed (or are skipped for
+not fitting) are popped, so thousands of open tasks cost little more than
+one pass over them.  Packing stops as soon as the shortest task still in the
+heap no longer fits.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PRIORITY_WEIGHTS = {"high": 3.0, "medium": 2.0, "low": 1.0}
+DEFAULT_PRIORITY = "medium"
+DEFAULT_TASK_MINUTES = 60      # tasks without estimated_time keep the old one‑hour slot
+DEADLINE_WEIGHT = 3.0          # urgency of a task due today (or overdue)
+DAY_START = (9, 0)
+BREAK_LABEL = "☕ Break"
+
+_NO_DEADLINE = date.max
+
+
+def _parse_deadline(value: Optional[str], cache: Dict[str, date]) -> date:
+    if not value:
+        return _NO_DEADLINE
+    parsed = cache.get(value)
+    if parsed is None:
+        try:
+            parsed = date.fromisoformat(value[:10])
+        except (TypeError, ValueError):
+            parsed = _NO_DEADLINE
+        cache[value] = parsed
+    return parsed
+
+
+def task_score(priority: Optional[str], deadline: date, today: date) -> float:
+    """Priority weight + deadline urgency (DEADLINE_WEIGHT / (1 + days left))."""
+    weight = PRIORITY_WEIGHTS.get((priority or DEFAULT_PRIORITY).lower(), PRIORITY_WEIGHTS[DEFAULT_PRIORITY])
+    if deadline is _NO_DEADLINE:
+        return weight
+    days_left = max((deadline - today).days, 0)
+    return weight + DEADLINE_WEIGHT / (1 + days_left)
+
+
+def task_minutes(task: dict) -> int:
+    minutes = task.get("estimated_time")
+    return minutes if isinstance(minutes, int) and minutes > 0 else DEFAULT_TASK_MINUTES
+
+
+def build_schedule(
+    tasks: Iterable[dict],
+    available_minutes: int,
+    start: datetime,
+    break_minutes: int = 0,
+    break_every: int = 90,
+    today: Optional[date] = None,
+) -> List[Tuple[datetime, datetime, Optional[dict]]]:
+    """Pack *tasks* into ``available_minutes`` from *start*.
+
+    Returns ``(start, end, task)`` slots in time order; ``task`` is None for a
+    break.  Best‑scored tasks go first (ties: earlier deadline, then store
+    order); a task that no longer fits is skipped so shorter ones can fill the
+    gap.  With *break_minutes*, a break follows every *break_every* minutes of
+    work, but only when another task comes after it.
+    """
+    today = today or start.date()
+    deadlines: Dict[str, date] = {}
+    heap = []
+    for index, task in enumerate(tasks):
+        minutes = task_minutes(task)
+        if minutes > available_minutes:
+            continue
+        deadline = _parse_deadline(task.get("deadline"), deadlines)
+        heap.append((-task_score(task.get("priority"), deadline, today), deadline, index, minutes, task))
+    heapq.heapify(heap)
+    # durations of the tasks still in the heap: counts, and the distinct values shortest first
+    # (a value whose count dropped to 0 is discarded when it reaches the top)
+    left = Counter(entry[3] for entry in heap)
+    lengths = list(left)
+    heapq.heapify(lengths)
+
+    slots: List[Tuple[datetime, datetime, Optional[dict]]] = []
+    remaining = available_minutes
+    worked = 0  # minutes since the last break
+    current = start
+    while heap:
+        pause = break_minutes if break_minutes and slots and worked >= break_every else 0
+        while not left[lengths[0]]:
+            heapq.heappop(lengths)
+        if pause + lengths[0] > remaining:
+            break  # not even the shortest task left fits
+        _, _, _, minutes, task = heapq.heappop(heap)
+        left[minutes] -= 1
+        if pause + minutes > remaining:
+            continue  # remaining only shrinks: it never will
+        if pause:
+            slots.append((current, current + timedelta(minutes=pause), None))
+            current += timedelta(minutes=pause)
+            remaining -= pause
+            worked = 0
+        end = current + timedelta(minutes=minutes)
+        slots.append((current, end, task))
+        current = end
+        remaining -= minutes
+        worked += minutes
+    return slots
@@ -0,0 +1,149 @@
+# /agents/productivity/similarity.py
+"""Indexed fuzzy search over plan goals.
+
+`GoalIndex.search()` returns exactly the goals whose
+``difflib.SequenceMatcher(None, query, goal).ratio()`` (case‑folded) reaches
+the threshold — the same answer as a linear scan — but only runs the exact
+ratio on a handful of candidates:
+
+1. Length window: ``ratio <= 2·min(la, lb) / (la + lb)``, so only goals whose
+   length lies in ``[la·t/(2−t), la·(2−t)/t]`` can match.
+2. Character n‑gram prefix filter: if ``ratio >= t`` the strings share ``M``
+   matched characters in at most ``T − 2M + 1`` blocks (``T = la + lb``), so
+   they share at least ``M − (q−1)·blocks`` q‑grams.  Whenever that bound is
+   positive, a match must contain one of the query's rarest grams, and only
+   those (short) posting lists are read.  Trigrams give a usable bound above
+   t = 0.8, bigrams above t ≈ 0.67; below that only the length window prunes.
+3. ``real_quick_ratio`` / ``quick_ratio`` upper bounds, then the exact ratio.
+"""
+
+from __future__ import annotations
+
+import difflib
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+GRAM_SIZES = (3, 2)  # preferred first
+_EPS = 1e-9
+
+Token = Tuple[str, int]  # (gram, occurrence) — makes multiset overlap a set overlap
+
+
+def _tokens(text: str, q: int) -> List[Token]:
+    seen: Counter = Counter()
+    tokens = []
+    for i in range(len(text) - q + 1):
+        gram = text[i:i + q]
+        tokens.append((gram, seen[gram]))
+        seen[gram] += 1
+    return tokens
+
+
+def _min_shared_grams(threshold: float, total_len: int, q: int) -> float:
+    """Lower bound on shared q‑grams for two strings of combined length *total_len*."""
+    min_matched = threshold * total_len / 2
+    max_blocks = total_len - 2 * min_matched + 1
+    return min_matched - (q - 1) * max_blocks
+
+
+class GoalIndex:
+    """Incrementally maintained n‑gram index over plan goals."""
+
+    def __init__(self, goals: Iterable[Tuple[str, str]] = ()):
+        self._goals: Dict[str, str] = {}           # plan id → case‑folded goal
+        self._order: Dict[str, int] = {}           # plan id → insertion rank (kept across updates)
+        self._next_rank = 0
+        self._by_length: Dict[int, Set[str]] = {}
+        self._postings: Dict[int, Dict[Token, Set[str]]] = {q: {} for q in GRAM_SIZES}
+        for plan_id, goal in goals:
+            self.add(plan_id, goal)
+
+    def __len__(self) -> int:
+        return len(self._goals)
+
+    def add(self, plan_id: str, goal: str) -> None:
+        folded = (goal or "").casefold()
+        old = self._goals.get(plan_id)
+        if old == folded:
+            return
+        if old is not None:
+            rank = self._order[plan_id]
+            self.remove(plan_id)
+        else:
+            rank, self._next_rank = self._next_rank, self._next_rank + 1
+        self._order[plan_id] = rank
+        self._goals[plan_id] = folded
+        self._by_length.setdefault(len(folded), set()).add(plan_id)
+        for q, postings in self._postings.items():
+            for token in _tokens(folded, q):
+                postings.setdefault(token, set()).add(plan_id)
+
+    def remove(self, plan_id: str) -> None:
+        folded = self._goals.pop(plan_id, None)
+        if folded is None:
+            return
+        del self._order[plan_id]
+        bucket = self._by_length[len(folded)]
+        bucket.discard(plan_id)
+        if not bucket:
+            del self._by_length[len(folded)]
+        for q, postings in self._postings.items():
+            for token in _tokens(folded, q):
+                ids = postings[token]
+                ids.discard(plan_id)
+                if not ids:
+                    del postings[token]
+
+    def search(
+        self,
+        goal: str,
+        threshold: float,
+        top_k: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return ``(plan_id, ratio)`` for every goal with ratio >= *threshold*.
+
+        Results keep insertion order, or are the *top_k* best (ties in insertion
+        order) when *top_k* is given.
+        """
+        query = (goal or "").casefold()
+        matches = []
+        for plan_id in self._candidates(query, threshold):
+            matcher = difflib.SequenceMatcher(None, query, self._goals[plan_id])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold:
+                matches.append((plan_id, score))
+
+        matches.sort(key=lambda m: self._order[m[0]])
+        if top_k is not None:
+            matches = sorted(matches, key=lambda m: -m[1])[:max(top_k, 0)]
+        return matches
+
+    def _candidates(self, query: str, threshold: float) -> Iterable[str]:
+        la = len(query)
+        if threshold <= 0:
+            return list(self._goals)
+        lo = math.ceil(la * threshold / (2 - threshold) - _EPS)
+        hi = math.floor(la * (2 - threshold) / threshold + _EPS)
+
+        for q in GRAM_SIZES:
+            need = math.ceil(_min_shared_grams(threshold, la + lo, q) - _EPS)
+            tokens = _tokens(query, q)
+            if need < 1 or need > len(tokens):
+                continue
+            # Prefix filter: a match shares >= need tokens with the query, hence at
+            # least one of any (len(tokens) − need + 1) of them — take the rarest.
+            postings = self._postings[q]
+            tokens.sort(key=lambda tok: len(postings.get(tok, ())))
+            candidates: Set[str] = set()
+            for token in tokens[:len(tokens) - need + 1]:
+                candidates |= postings.get(token, set())
+            return [pid for pid in candidates if lo <= len(self._goals[pid]) <= hi]
+
+        window: List[str] = []
+        for length, ids in self._by_length.items():
+            if lo <= length <= hi:
+                window.extend(ids)
+        return window
@@ -0,0 +1,1383 @@
+# /agents/productivity/store.py
+"""Storage backends for plans & tasks.
+
+All engines expose the same row‑level API through a unit of work
+(`PlanTaskStore.transaction()` → `StoreSession`):
+    • JsonStore    — legacy `plans.json` / `tasks.json` files behind a stat‑validated read cache
+    • JournalStore — a snapshot plus an append‑only, group‑fsynced mutation log, compacted in the background
+    • SqliteStore  — a single SQLite database with indexes on id, plan_id, completed and milestone id
+
+`migrate(src, dst)` copies every record from one backend into another, e.g.
+
+    python -m agents.productivity.store migrate json sqlite
+    python -m agents.productivity.store migrate json json --shard focusflow-local-user
+
+and `compact` folds the journal backend's log into its snapshot:
+
+    python -m agents.productivity.store compact
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import logging
+import zlib
+import heapq
+import atexit
+import random
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from itertools import islice
+from contextlib import ExitStack, contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from filelock import FileLock, Timeout
+
+try:
+    import fcntl
+except ImportError:  # Windows: both lock modes fall back to an exclusive FileLock
+    fcntl = None
+
+from agents.productivity.codec import Codec, decode, get_codec, json_codec
+from agents.productivity.query import SQL_DEADLINE, SQL_ORDER, TaskQuery
+from agents.productivity.records import Plan, Task, to_dicts
+from agents.productivity.similarity import GoalIndex
+
+log = logging.getLogger(__name__)
+
+LOCK_SUFFIX = ".lock"
+LOCK_TIMEOUT = 10  # seconds
+LOCK_POLL = 0.001  # seconds between non‑blocking lock attempts
+
+TX_RETRIES = 8        # re‑runs of a conflicting transaction in `PlanTaskStore.atomic`
+TX_BACKOFF = 0.002    # seconds, doubled per retry (randomised, capped at TX_BACKOFF_MAX)
+TX_BACKOFF_MAX = 0.1
+
+T = TypeVar("T")
+
+PLANS_FILENAME = "plans.json"
+TASKS_FILENAME = "tasks.json"
+SQLITE_FILENAME = "productivity.db"
+
+# ─────────────────────────────────────────────────────
+# Concurrency primitives
+
+
+class ConflictError(RuntimeError):
+    """A concurrent commit changed what this transaction read; re‑run it (see `PlanTaskStore.atomic`)."""
+
+
+class RWFileLock:
+    """Reader/writer lock on a lock file: ``flock`` shared for readers, exclusive for writers.
+
+    Every acquisition opens its own descriptor, so threads of one process
+    exclude each other like separate processes do; it is therefore *not*
+    reentrant.  Where ``fcntl`` is unavailable both modes use a FileLock.
+    """
+
+    def __init__(self, path: str, timeout: float = LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._fallback = FileLock(path, timeout=timeout) if fcntl is None else None
+
+    def shared(self):
+        return self._hold(fcntl.LOCK_SH if fcntl else 0)
+
+    def exclusive(self):
+        return self._hold(fcntl.LOCK_EX if fcntl else 0)
+
+    @contextmanager
+    def _hold(self, mode: int) -> Iterator[None]:
+        if self._fallback is not None:
+            with self._fallback:
+                yield
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise Timeout(self.path) from None
+                    time.sleep(LOCK_POLL)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+def _same_record(current, seen) -> bool:
+    if current is seen:
+        return True
+    return current is not None and seen is not None and current.to_dict() == seen.to_dict()
+
+
+# ─────────────────────────────────────────────────────
+# JSON helpers with locking, atomic writes & a process‑local read cache
+
+
+Signature = Optional[Tuple[int, int, int]]  # (inode, mtime_ns, size); None → file absent
+
+
+def _file_signature(path: Path) -> Signature:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class RecordTable:
+    """Records of one kind keyed by id, in file order, plus secondary indexes.
+
+    Rows are compact slotted records (see `records.py`), converted to and from
+    plain dicts only at the file and session boundaries.  Index maintenance is
+    incremental: `put` only touches the entries of the record it replaces, so
+    lookups and upserts stay O(1) however large the table grows.  Readers
+    should snapshot with ``list(...)`` (a single C‑level copy) rather than
+    iterate the live dicts.
+    """
+
+    record_cls: type = Task
+
+    def __init__(self, rows: Iterable = ()):
+        self.by_id: Dict[str, Any] = {}
+        for rec in rows:
+            self.put(rec)
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[dict]) -> "RecordTable":
+        return cls(map(cls.record_cls.from_dict, rows))
+
+    def put(self, rec) -> None:
+        old = self.by_id.get(rec.id)
+        if old is not None:
+            self._unindex(old, rec)
+        self.by_id[rec.id] = rec
+        self._index(rec, old)
+
+    def rows(self) -> List[Any]:
+        return list(self.by_id.values())
+
+    def _index(self, rec, old) -> None:
+        pass
+
+    def _unindex(self, old, new) -> None:
+        pass
+
+
+class TaskTable(RecordTable):
+    """Tasks + ``plan_id → task ids`` (ordered)."""
+
+    record_cls = Task
+
+    def __init__(self, rows: Iterable[Task] = ()):
+        self.by_plan: Dict[str, Dict[str, None]] = {}
+        super().__init__(rows)
+
+    def task_ids_for_plan(self, plan_id: str) -> List[str]:
+        return list(self.by_plan.get(plan_id, ()))
+
+    def _index(self, rec: Task, old: Optional[Task]) -> None:
+        if rec.plan_id and (old is None or old.plan_id != rec.plan_id):
+            self.by_plan.setdefault(rec.plan_id, {})[rec.id] = None
+
+    def _unindex(self, old: Task, new: Task) -> None:
+        if old.plan_id and old.plan_id != new.plan_id:
+            ids = self.by_plan.get(old.plan_id, {})
+            ids.pop(old.id, None)
+            if not ids:
+                self.by_plan.pop(old.plan_id, None)
+
+
+class PlanTable(RecordTable):
+    """Plans + ``milestone_id → plan_id`` + a goal n‑gram index (built on first search)."""
+
+    record_cls = Plan
+
+    def __init__(self, rows: Iterable[Plan] = ()):
+        self.plan_by_milestone: Dict[str, str] = {}
+        self._goals: Optional[GoalIndex] = None
+        super().__init__(rows)
+
+    def goal_index(self) -> GoalIndex:
+        if self._goals is None:
+            self._goals = GoalIndex((p.id, p.goal) for p in self.rows())
+        return self._goals
+
+    def _index(self, rec: Plan, old: Optional[Plan]) -> None:
+        for ms_id in rec.milestone_ids():
+            self.plan_by_milestone[ms_id] = rec.id
+        if self._goals is not None:
+            self._goals.add(rec.id, rec.goal)
+
+    def _unindex(self, old: Plan, new: Plan) -> None:
+        for ms_id in old.milestone_ids():
+            self.plan_by_milestone.pop(ms_id, None)
+
+
+class _CachedJsonFile:
+    """Parsed & indexed contents of one JSON file, revalidated with a single ``stat``.
+
+    Writes go through a temp file + rename, so every save gets a fresh inode
+    and a changed signature even when size and mtime happen to collide; the
+    signature is the file's generation, checked by sessions on commit.  Our
+    own writes are applied to the cached table in place (see `apply`); a
+    foreign write is picked up, and the table rebuilt, on the next read.
+    Reading the file takes the shared lock, writing it the exclusive one.
+    Files are written with `codec` and read in whatever format they hold.
+    """
+
+    def __init__(self, path: Path, table_cls: type, codec: Optional[Codec] = None):
+        self.path = path
+        self.table_cls = table_cls
+        self.codec = codec or get_codec()
+        self.lock = RWFileLock(str(path) + LOCK_SUFFIX)
+        self.signature: Signature = None
+        self.table: Optional[RecordTable] = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, locked: bool = False) -> RecordTable:
+        """Return the table, re‑reading the file if it changed (*locked*: caller holds `lock`)."""
+        table = self.table
+        if table is not None and _file_signature(self.path) == self.signature:
+            self.hits += 1
+            return table
+        self.misses += 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with nullcontext() if locked else self.lock.shared():
+            signature = _file_signature(self.path)
+            rows = [] if signature is None else decode(self.path.read_bytes())
+            table = self.table_cls.from_dicts(rows)
+            self.table, self.signature = table, signature
+        return table
+
+    def apply(self, records: Iterable) -> None:
+        """Upsert *records* into the cached table and rewrite the file (caller holds `lock` exclusively)."""
+        table = self.load(locked=True)
+        try:
+            for rec in records:
+                table.put(rec)
+            self._write(to_dicts(table.rows()))
+        except BaseException:
+            self.invalidate()  # the table may be ahead of the file now
+            raise
+
+    def _write(self, rows: List[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(self.path.suffix + ".tmp")
+        temp.write_bytes(self.codec.dumps(rows))
+        temp.replace(self.path)
+        self.signature = _file_signature(self.path)
+
+    def invalidate(self) -> None:
+        self.table, self.signature = None, None
+
+
+# Least recently used files / journals are dropped past these sizes (a dropped
+# entry is simply re-read on next use)
+JSON_CACHE_FILES = 256
+JOURNAL_CACHE_DIRS = 128
+
+_json_cache: "OrderedDict[Path, _CachedJsonFile]" = OrderedDict()
+_json_cache_mutex = threading.Lock()
+
+
+def _cached_file(path: Path, table_cls: type, codec: Optional[Codec] = None) -> _CachedJsonFile:
+    key = Path(os.path.abspath(path))
+    with _json_cache_mutex:
+        entry = _json_cache.get(key)
+        if entry is None:
+            entry = _json_cache[key] = _CachedJsonFile(key, table_cls, codec)
+            while len(_json_cache) > JSON_CACHE_FILES:
+                _json_cache.popitem(last=False)
+        else:
+            _json_cache.move_to_end(key)
+            if codec is not None:
+                entry.codec = codec
+        return entry
+
+
+def _drop_cached_files(*paths: Path) -> None:
+    with _json_cache_mutex:
+        for path in paths:
+            _json_cache.pop(Path(os.path.abspath(path)), None)
+
+
+def clear_json_cache() -> None:
+    """Drop every cached file (tests, or after editing the data files by hand)."""
+    with _json_cache_mutex:
+        _json_cache.clear()
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.sync()
+
+
+# ─────────────────────────────────────────────────────
+# Backend interface
+
+
+class StoreSession(ABC):
+    """Unit of work over plans & tasks, obtained from `PlanTaskStore.transaction()`.
+
+    Records are plain dicts in the shape of `PlanRecord` / `TaskRecord`.
+    Every read returns private copies that may be edited and handed back to
+    `put_*` (an upsert keyed on ``id`` that keeps insertion order); reads see
+    the session's own pending writes.
+    """
+
+    @abstractmethod
+    def get_plan(self, plan_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[dict]:
+        ...
+
+    def put_plan(self, plan: dict) -> None:
+        self.put_plans([plan])
+
+    def put_task(self, task: dict) -> None:
+        self.put_tasks([task])
+
+    @abstractmethod
+    def put_plans(self, plans: Iterable[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def put_tasks(self, tasks: Iterable[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def list_plans(self) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def list_tasks(
+        self,
+        completed: Optional[bool] = None,
+        plan_id: Optional[str] = None,
+    ) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def query_tasks(
+        self,
+        query: TaskQuery,
+        after: Optional[Tuple[Any, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Tasks matching *query*, in its order, after sort key *after*, at most *limit*."""
+
+    @abstractmethod
+    def plan_id_for_milestone(self, milestone_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def goal_index(self) -> GoalIndex:
+        """Fuzzy index over the goals of *committed* plans (pending puts not included)."""
+
+    # lifecycle — driven by `PlanTaskStore.transaction()`
+    @abstractmethod
+    def commit(self) -> None:
+        ...
+
+    @abstractmethod
+    def rollback(self) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class PlanTaskStore(ABC):
+    """A storage backend.
+
+    Every operation runs inside a session::
+
+        with store.transaction() as tx:
+            task = tx.get_task(task_id)
+            task["completed"] = True
+            tx.put_task(task)
+
+    The session commits once when the block exits cleanly and rolls back if
+    it raises.  A commit raises `ConflictError` when another writer changed
+    what the session read; `atomic(fn)` re‑runs ``fn(tx)`` in a fresh session
+    until it commits.  The single‑call helpers below open a one‑operation
+    session.
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def _begin(self, readonly: bool) -> StoreSession:
+        ...
+
+    def close(self) -> None:
+        """Release what the store holds open or cached; it re‑opens on next use."""
+
+    @contextmanager
+    def transaction(self, readonly: bool = False) -> Iterator[StoreSession]:
+        session = self._begin(readonly)
+        try:
+            yield session
+        except BaseException:
+            session.rollback()
+            raise
+        else:
+            if not readonly:
+                session.commit()
+        finally:
+            session.close()
+
+    def atomic(self, fn: Callable[[StoreSession], T], retries: int = TX_RETRIES) -> T:
+        """Run ``fn(tx)`` in a write transaction, re‑running it on `ConflictError`.
+
+        *fn* may run more than once, so it must start from what it reads in *tx*.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.transaction() as tx:
+                    return fn(tx)
+            except ConflictError:
+                if attempt >= retries:
+                    raise
+                time.sleep(random.uniform(0, min(TX_BACKOFF * 2 ** attempt, TX_BACKOFF_MAX)))
+                attempt += 1
+
+    def get_plan(self, plan_id: str) -> Optional[dict]:
+        with self.transaction(readonly=True) as tx:
+            return tx.get_plan(plan_id)
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        with self.transaction(readonly=True) as tx:
+            return tx.get_task(task_id)
+
+    def put_plan(self, plan: dict) -> None:
+        self.put_plans([plan])
+
+    def put_task(self, task: dict) -> None:
+        self.put_tasks([task])
+
+    def put_plans(self, plans: Iterable[dict]) -> None:
+        with self.transaction() as tx:
+            tx.put_plans(plans)
+
+    def put_tasks(self, tasks: Iterable[dict]) -> None:
+        with self.transaction() as tx:
+            tx.put_tasks(tasks)
+
+    def list_plans(self) -> List[dict]:
+        with self.transaction(readonly=True) as tx:
+            return tx.list_plans()
+
+    def list_tasks(
+        self,
+        completed: Optional[bool] = None,
+        plan_id: Optional[str] = None,
+    ) -> List[dict]:
+        with self.transaction(readonly=True) as tx:
+            return tx.list_tasks(completed=completed, plan_id=plan_id)
+
+    def query_tasks(
+        self,
+        query: TaskQuery,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """One page of *query*: up to *limit* rows after *cursor*, plus the next page's cursor."""
+        after = query.decode_cursor(cursor) if cursor else None
+        with self.transaction(readonly=True) as tx:
+            rows = tx.query_tasks(query, after, None if limit is None else limit + 1)
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, query.encode_cursor(query.sort_key(Task.from_dict(rows[-1])))
+
+
+# ─────────────────────────────────────────────────────
+# Legacy JSON files
+
+
+class JsonSession(StoreSession):
+    """Both JSON files behind one optimistic session.
+
+    No lock is held while the session runs: reads go through the cached
+    tables' indexes (overlaid with the session's pending writes) and every
+    `put_*` is buffered.  The session remembers the records it read and, for
+    scans, the generation of the file it scanned.  `commit` then takes both
+    exclusive locks (always plans → tasks, so commits cannot deadlock),
+    checks that none of that changed — otherwise `ConflictError` — and
+    rewrites each *changed* file exactly once, tasks before plans so an
+    interrupted commit can leave an orphan task but never a plan pointing at
+    a missing one.  Readers never wait for a running write session.
+    """
+
+    KINDS = ("plans", "tasks")
+    RECORD_CLS = {"plans": Plan, "tasks": Task}
+
+    def __init__(self, store: "JsonStore", readonly: bool):
+        self._files = {
+            "plans": _cached_file(store.plans_file, PlanTable, store.codec),
+            "tasks": _cached_file(store.tasks_file, TaskTable, store.codec),
+        }
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._snapshot: Dict[str, RecordTable] = {}
+        self._generations: Dict[str, Any] = {}  # kind → generation when first loaded
+        self._pending: Dict[str, Dict[str, Any]] = {kind: {} for kind in self.KINDS}
+        self._reads: Dict[str, Dict[str, Any]] = {kind: {} for kind in self.KINDS}  # id → record seen
+        self._scanned: Set[str] = set()
+
+    # storage hooks (overridden by the journal)
+    def _load(self, kind: str) -> RecordTable:
+        return self._files[kind].load()
+
+    def _generation(self, kind: str) -> Any:
+        return self._files[kind].signature
+
+    def _commit_lock(self):
+        locks = ExitStack()
+        for kind in self.KINDS:
+            self._files[kind].path.parent.mkdir(parents=True, exist_ok=True)
+            locks.enter_context(self._files[kind].lock.exclusive())
+        return locks
+
+    def _current(self) -> Dict[str, RecordTable]:
+        """Latest tables, read under the commit lock."""
+        return {kind: f.load(locked=True) for kind, f in self._files.items()}
+
+    def _write(self, pending: Dict[str, List[Any]]) -> None:
+        for kind in ("tasks", "plans"):
+            if pending[kind]:
+                self._files[kind].apply(pending[kind])
+
+    # reads
+    def _table(self, kind: str) -> RecordTable:
+        table = self._snapshot.get(kind)
+        if table is None:
+            table = self._snapshot[kind] = self._load(kind)
+            self._generations[kind] = self._generation(kind)
+        return table
+
+    def _scan(self, kind: str) -> RecordTable:
+        self._scanned.add(kind)
+        return self._table(kind)
+
+    def _lookup(self, kind: str, rec_id: str):
+        rec = self._pending[kind].get(rec_id)
+        if rec is not None:
+            return rec
+        rec = self._table(kind).by_id.get(rec_id)
+        self._reads[kind].setdefault(rec_id, rec)
+        return rec
+
+    def _get(self, kind: str, rec_id: str) -> Optional[dict]:
+        rec = self._lookup(kind, rec_id)
+        return rec.to_dict() if rec is not None else None  # to_dict builds a private copy
+
+    def _put(self, kind: str, records: Iterable[dict]) -> None:
+        pending = self._pending[kind]
+        for rec in map(self.RECORD_CLS[kind].from_dict, records):  # detached from the caller's dicts
+            pending[rec.id] = rec
+
+    def _merged(self, kind: str) -> list:
+        table, pending = self._scan(kind), self._pending[kind]
+        rows = table.rows()
+        if not pending:
+            return rows
+        merged = [pending.get(r.id, r) for r in rows]
+        merged.extend(rec for rec_id, rec in pending.items() if rec_id not in table.by_id)
+        return merged
+
+    def get_plan(self, plan_id: str) -> Optional[dict]:
+        return self._get("plans", plan_id)
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        return self._get("tasks", task_id)
+
+    def put_plans(self, plans: Iterable[dict]) -> None:
+        self._put("plans", plans)
+
+    def put_tasks(self, tasks: Iterable[dict]) -> None:
+        self._put("tasks", tasks)
+
+    def list_plans(self) -> List[dict]:
+        return to_dicts(self._merged("plans"))
+
+    def list_tasks(
+        self,
+        completed: Optional[bool] = None,
+        plan_id: Optional[str] = None,
+    ) -> List[dict]:
+        # filter on the compact records, then materialise only the matches
+        rows = self._merged("tasks") if plan_id is None else self._plan_tasks(plan_id)
+        if completed is not None:
+            rows = [t for t in rows if bool(t.completed) == completed]
+        return to_dicts(rows)
+
+    def query_tasks(
+        self,
+        query: TaskQuery,
+        after: Optional[Tuple[Any, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        rows = self._merged("tasks") if query.plan_id is None else self._plan_tasks(query.plan_id)
+        key = query.sort_key
+        rows = [t for t in rows if query.matches(t) and (after is None or query.is_after(key(t), after))]
+        if limit is not None and limit < len(rows):
+            # a page only needs its own rows in order: O(n log limit)
+            rows = (heapq.nlargest if query.descending else heapq.nsmallest)(limit, rows, key=key)
+        else:
+            rows.sort(key=key, reverse=query.descending)
+        return to_dicts(rows)
+
+    def _plan_tasks(self, plan_id: str) -> list:
+        table: TaskTable = self._scan("tasks")  # type: ignore[assignment]
+        pending = self._pending["tasks"]
+        ids = dict.fromkeys(table.task_ids_for_plan(plan_id))
+        ids.update((i, None) for i, t in pending.items() if t.plan_id == plan_id)
+        return [t for t in (pending.get(i) or table.by_id.get(i) for i in ids) if t and t.plan_id == plan_id]
+
+    def plan_id_for_milestone(self, milestone_id: str) -> Optional[str]:
+        for plan in self._pending["plans"].values():
+            if milestone_id in plan.milestone_ids():
+                return plan.id
+        table: PlanTable = self._scan("plans")  # type: ignore[assignment]
+        plan_id = table.plan_by_milestone.get(milestone_id)
+        if plan_id is not None and plan_id in self._pending["plans"]:
+            return None  # the pending version of that plan dropped the milestone
+        return plan_id
+
+    def goal_index(self) -> GoalIndex:
+        table: PlanTable = self._scan("plans")  # type: ignore[assignment]
+        return table.goal_index()
+
+    # lifecycle
+    def commit(self) -> None:
+        if any(self._pending.values()):
+            with self._commit_lock():
+                self._validate(self._current())
+                self._write({kind: list(p.values()) for kind, p in self._pending.items()})
+        self.rollback()
+
+    def _validate(self, tables: Dict[str, RecordTable]) -> None:
+        for kind in self.KINDS:
+            if kind in self._scanned and self._generation(kind) != self._generations.get(kind):
+                raise ConflictError(f"{kind} changed since this transaction listed them")
+            by_id = tables[kind].by_id
+            for rec_id, seen in self._reads[kind].items():
+                if not _same_record(by_id.get(rec_id), seen):
+                    raise ConflictError(f"{kind[:-1]} {rec_id} changed since this transaction read it")
+
+    def rollback(self) -> None:
+        for state in (*self._pending.values(), *self._reads.values()):
+            state.clear()
+        self._scanned.clear()
+
+
+class JsonStore(PlanTaskStore):
+    """The original two‑file layout.
+
+    Reads are served from the process‑local cache until either file changes
+    on disk; a write session rewrites each file it touched once on commit.
+    """
+
+    name = "json"
+
+    def __init__(self, data_dir: Path, codec: str = "json"):
+        self.data_dir = Path(data_dir)
+        self.codec = get_codec(codec)
+        self.plans_file = self.data_dir / PLANS_FILENAME
+        self.tasks_file = self.data_dir / TASKS_FILENAME
+
+    def _begin(self, readonly: bool) -> StoreSession:
+        return JsonSession(self, readonly)
+
+    def close(self) -> None:
+        _drop_cached_files(self.plans_file, self.tasks_file)
+
+
+# ─────────────────────────────────────────────────────
+# Append‑only journal
+
+
+JOURNAL_FILENAME = "journal.log"
+SNAPSHOT_FILENAME = "snapshot.json"
+JOURNAL_FSYNC_EVERY = 16         # commits per group fsync …
+JOURNAL_FSYNC_INTERVAL = 1.0     # … or seconds since the previous one, whichever comes first
+JOURNAL_COMPACT_BYTES = 4 << 20  # fold the log into a new snapshot past this size
+
+
+def _encode_entry(plans: List[dict], tasks: List[dict], codec: Optional[Codec] = None) -> bytes:
+    # log lines stay JSON text whatever the codec (a binary payload could hold a newline)
+    payload = json_codec(codec or get_codec()).dumps({"tasks": tasks, "plans": plans})
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode_entries(data: bytes) -> Iterator[Tuple[int, dict]]:
+    """Yield ``(end offset, entry)`` per intact line; stop at the first torn one."""
+    pos = 0
+    while True:
+        end = data.find(b"\n", pos)
+        if end < 0:
+            return  # incomplete last line (crash, or a writer still appending)
+        try:
+            crc, payload = data[pos:end].split(b" ", 1)
+            if int(crc, 16) != zlib.crc32(payload):
+                return
+            entry = get_codec("auto").loads(payload)
+        except ValueError:
+            return
+        pos = end + 1
+        yield pos, entry
+
+
+class _Journal:
+    """A snapshot plus an append‑only log of committed transactions, replayed into cached tables.
+
+    Each commit appends one line ``<crc32> <json>`` with the records it
+    upserts; an incomplete line or a checksum mismatch marks a torn write,
+    which ends the replay and is truncated by the next writer.  The cache
+    remembers how far the log was replayed and only reads the tail other
+    processes appended since.  Lines reach the OS on every commit but are
+    fsynced in groups (`JOURNAL_FSYNC_EVERY` / `JOURNAL_FSYNC_INTERVAL`, and
+    at exit): a process crash loses nothing, a power cut at most the last
+    unsynced group.
+
+    `compact` writes a fresh snapshot, then starts an empty log.  Replaying
+    the old log over the new snapshot yields the same state, so a crash
+    between the two renames is harmless.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.snapshot_path = data_dir / SNAPSHOT_FILENAME
+        self.log_path = data_dir / JOURNAL_FILENAME
+        self.codec = get_codec()  # snapshot format (log lines are always JSON)
+        self.lock = RWFileLock(str(self.log_path) + LOCK_SUFFIX)
+        self._mutex = threading.RLock()  # guards the cached state below
+        self.tables: Optional[Dict[str, RecordTable]] = None
+        self.snapshot_sig: Signature = None
+        self.log_inode: Optional[int] = None
+        self.offset = 0  # bytes of the log replayed into `tables`
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._compactor: Optional[threading.Thread] = None
+        self.compact_error: Optional[Exception] = None  # why the last background compaction failed
+
+    def load(self, locked: bool = False) -> Dict[str, RecordTable]:
+        """Return the tables, replaying what changed on disk (*locked*: caller holds `lock`).
+
+        Lock order is always file lock → `_mutex` (as in `append` and
+        `compact`): a reader never waits for the file lock while holding the
+        mutex, it drops it and checks again once it has the lock.
+        """
+        with self._mutex:
+            state = self._freshness()
+            if state is None or locked:
+                if state is not None:
+                    self._catch_up(state)
+                return self.tables  # type: ignore[return-value]
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock.shared():
+            with self._mutex:
+                state = self._freshness()  # another thread may have caught up meanwhile
+                if state is not None:
+                    self._catch_up(state)
+                return self.tables  # type: ignore[return-value]
+
+    def _freshness(self) -> Optional[bool]:
+        """None if the cache is current, True if it must be reloaded, False if only the log grew."""
+        try:
+            st = os.stat(self.log_path)
+            log_inode, log_size = st.st_ino, st.st_size
+        except FileNotFoundError:
+            log_inode, log_size = None, 0
+        if (
+            self.tables is None
+            or _file_signature(self.snapshot_path) != self.snapshot_sig
+            or log_inode != self.log_inode
+            or log_size < self.offset
+        ):
+            return True
+        return False if log_size > self.offset else None
+
+    def _catch_up(self, stale: bool) -> None:
+        self._reload() if stale else self._replay_tail()
+
+    def generation(self) -> Tuple[Signature, Optional[int], int]:
+        """Changes whenever a commit or compaction lands (as seen by the last `load`)."""
+        return (self.snapshot_sig, self.log_inode, self.offset)
+
+    def _reload(self) -> None:
+        while True:
+            signature = _file_signature(self.snapshot_path)
+            data = {} if signature is None else decode(self.snapshot_path.read_bytes())
+            try:
+                with open(self.log_path, "rb") as f:
+                    log_inode, log = os.fstat(f.fileno()).st_ino, f.read()
+            except FileNotFoundError:
+                log_inode, log = None, b""
+            if _file_signature(self.snapshot_path) == signature:
+                break  # no compaction slipped in between the two reads
+        tables = {
+            "plans": PlanTable.from_dicts(data.get("plans", [])),
+            "tasks": TaskTable.from_dicts(data.get("tasks", [])),
+        }
+        self.offset = self._replay(tables, log, 0)
+        self.tables, self.snapshot_sig, self.log_inode = tables, signature, log_inode
+
+    def _replay_tail(self) -> None:
+        with open(self.log_path, "rb") as f:
+            if os.fstat(f.fileno()).st_ino != self.log_inode:
+                return self._reload()
+            f.seek(self.offset)
+            data = f.read()
+        self.offset = self._replay(self.tables, data, self.offset)  # type: ignore[arg-type]
+
+    @staticmethod
+    def _replay(tables: Dict[str, RecordTable], data: bytes, offset: int) -> int:
+        end = 0
+        for end, entry in _decode_entries(data):
+            for kind in ("tasks", "plans"):
+                table = tables[kind]
+                for row in entry.get(kind, ()):
+                    table.put(table.record_cls.from_dict(row))
+        return offset + end
+
+    def append(self, plans: List[Any], tasks: List[Any]) -> None:
+        """Log one transaction and apply it to the cached tables (caller holds `lock` exclusively)."""
+        with self._mutex:
+            tables = self.load(locked=True)
+            line = _encode_entry(to_dicts(plans), to_dicts(tasks), self.codec)
+            try:
+                with open(self.log_path, "ab") as f:
+                    if f.tell() > self.offset:
+                        f.truncate(self.offset)  # torn tail left by a crashed writer
+                    f.write(line)
+                    f.flush()
+                    self._unsynced += 1
+                    if (
+                        self._unsynced >= JOURNAL_FSYNC_EVERY
+                        or time.monotonic() - self._last_sync >= JOURNAL_FSYNC_INTERVAL
+                    ):
+                        self._fsync(f)
+                    self.log_inode, self.offset = os.fstat(f.fileno()).st_ino, f.tell()
+            except BaseException:
+                self.tables = None  # the log may be ahead of the cache now
+                raise
+            for kind, records in (("tasks", tasks), ("plans", plans)):
+                for rec in records:
+                    tables[kind].put(rec)
+            if self.offset >= JOURNAL_COMPACT_BYTES:
+                self._compact_in_background()
+
+    def _fsync(self, f) -> None:
+        os.fsync(f.fileno())
+        self._unsynced, self._last_sync = 0, time.monotonic()
+
+    def sync(self) -> None:
+        """Flush the unsynced group to disk."""
+        with self._mutex:
+            if self._unsynced and self.log_path.exists():
+                with open(self.log_path, "ab") as f:
+                    self._fsync(f)
+
+    def compact(self) -> None:
+        """Fold the log into a fresh snapshot and start an empty log."""
+        temp = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        empty = self.log_path.with_suffix(self.log_path.suffix + ".tmp")
+        with self.lock.exclusive():  # no writer can append meanwhile
+            try:
+                with self._mutex:
+                    tables = self.load(locked=True)
+                rows = {kind: to_dicts(tables[kind].rows()) for kind in ("plans", "tasks")}
+                with open(temp, "wb") as f:
+                    f.write(self.codec.dumps(rows))
+                    f.flush()
+                    os.fsync(f.fileno())
+                open(empty, "wb").close()
+                with self._mutex:
+                    temp.replace(self.snapshot_path)
+                    empty.replace(self.log_path)
+                    self.snapshot_sig = _file_signature(self.snapshot_path)
+                    self.log_inode, self.offset = os.stat(self.log_path).st_ino, 0
+                    self._unsynced = 0
+            finally:
+                temp.unlink(missing_ok=True)  # left over only if we failed before the renames
+                empty.unlink(missing_ok=True)
+
+    def _compact_in_background(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        def run():
+            try:
+                self.compact()  # waits for the committing session to release the lock
+                self.compact_error = None
+            except Exception as exc:
+                # retried after the next commit past the threshold; the log keeps growing until then
+                self.compact_error = exc
+                log.exception("compacting %s failed (log at %d bytes)", self.log_path, self.offset)
+
+        self._compactor = threading.Thread(target=run, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+
+_journals: "OrderedDict[Path, _Journal]" = OrderedDict()
+
+
+def _journal(data_dir: Path, codec: Optional[Codec] = None) -> _Journal:
+    key = Path(os.path.abspath(data_dir))
+    evicted = []
+    with _json_cache_mutex:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = _Journal(key)
+            while len(_journals) > JOURNAL_CACHE_DIRS:
+                evicted.append(_journals.popitem(last=False)[1])
+        else:
+            _journals.move_to_end(key)
+        if codec is not None:
+            journal.codec = codec
+    for old in evicted:
+        old.sync()  # no longer reached by the exit hook
+    return journal
+
+
+def _drop_journal(journal: _Journal) -> None:
+    with _json_cache_mutex:
+        key = journal.log_path.parent
+        if _journals.get(key) is journal:
+            del _journals[key]
+
+
+@atexit.register
+def _sync_journals() -> None:
+    for journal in list(_journals.values()):
+        journal.sync()
+
+
+class JournalSession(JsonSession):
+    """`JsonSession` over a journal: same optimistic overlay, but a commit appends one log line.
+
+    The generation checked on commit is the journal's (snapshot, log inode,
+    replayed offset).
+    """
+
+    def __init__(self, store: "JournalStore", readonly: bool):
+        self._journal = store.journal
+        self._data_dir = store.data_dir
+        self._init_state()
+
+    def _load(self, kind: str) -> RecordTable:
+        return self._journal.load()[kind]
+
+    def _generation(self, kind: str) -> Any:
+        return self._journal.generation()
+
+    def _commit_lock(self):
+        self._data_dir.mkdir(parents=True, exist_ok=True)
+        return self._journal.lock.exclusive()
+
+    def _current(self) -> Dict[str, RecordTable]:
+        return self._journal.load(locked=True)
+
+    def _write(self, pending: Dict[str, List[Any]]) -> None:
+        self._journal.append(pending["plans"], pending["tasks"])
+
+
+class JournalStore(PlanTaskStore):
+    """`snapshot.json` + `journal.log`: each commit appends its records instead of rewriting files.
+
+    Write cost follows the size of the change, not of the store; the log is
+    compacted into the snapshot in the background once it passes
+    `JOURNAL_COMPACT_BYTES`.
+    """
+
+    name = "journal"
+
+    def __init__(self, data_dir: Path, codec: str = "json"):
+        self.data_dir = Path(data_dir)
+        self.codec = get_codec(codec)
+        self._journal = _journal(self.data_dir, self.codec)
+
+    @property
+    def journal(self) -> _Journal:
+        """This directory's shared journal (registered again if it was dropped)."""
+        if self._journal is None:
+            self._journal = _journal(self.data_dir, self.codec)
+        return self._journal
+
+    def _begin(self, readonly: bool) -> StoreSession:
+        return JournalSession(self, readonly)
+
+    def compact(self) -> None:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.journal.compact()
+
+    def sync(self) -> None:
+        self.journal.sync()
+
+    def close(self) -> None:
+        journal, self._journal = self._journal, None
+        if journal is not None:
+            journal.sync()
+            _drop_journal(journal)
+
+
+# ─────────────────────────────────────────────────────
+# SQLite
+
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+_SQLITE_MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS plans (
+        id   TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS tasks (
+        id           TEXT PRIMARY KEY,
+        plan_id      TEXT,
+        milestone_id TEXT,
+        completed    INTEGER NOT NULL DEFAULT 0,
+        data         TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_plan_id   ON tasks(plan_id);
+    CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS milestones (
+        id      TEXT PRIMARY KEY,
+        plan_id TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_milestones_plan_id ON milestones(plan_id);
+    INSERT OR REPLACE INTO milestones (id, plan_id)
+        SELECT json_extract(ms.value, '$.id'), plans.id
+        FROM plans, json_each(plans.data, '$.milestones') AS ms;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        id            INTEGER PRIMARY KEY CHECK (id = 0),
+        plans_version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO meta (id, plans_version) VALUES (0, 0);
+    """,
+]
+
+
+class SqliteSession(StoreSession):
+    """One SQLite transaction on the calling thread's connection.
+
+    Writers start with ``BEGIN IMMEDIATE``, so SQLite serialises them (a
+    writer waiting past the busy timeout gets `ConflictError`); readers use a
+    deferred ``BEGIN`` and, in WAL mode, run alongside them.
+    """
+
+    def __init__(self, store: "SqliteStore", readonly: bool):
+        self._store = store
+        self._written_goals: Dict[str, str] = {}
+        self._conn = store._acquire()
+        try:
+            self._conn.execute("BEGIN" if readonly else "BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as exc:
+            store._release(self._conn)
+            if "locked" in str(exc) or "busy" in str(exc):  # another writer held it past the timeout
+                raise ConflictError(str(exc)) from exc
+            raise
+        except BaseException:
+            store._release(self._conn)
+            raise
+
+    def get_plan(self, plan_id: str) -> Optional[dict]:
+        return self._fetch_one("SELECT data FROM plans WHERE id = ?", (plan_id,))
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        return self._fetch_one("SELECT data FROM tasks WHERE id = ?", (task_id,))
+
+    def put_plans(self, plans: Iterable[dict]) -> None:
+        plans = list(plans)
+        self._written_goals.update((p["id"], p.get("goal", "")) for p in plans)
+        self._conn.executemany(
+            "INSERT INTO plans (id, data) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+            [(p["id"], json.dumps(p)) for p in plans],
+        )
+        self._conn.executemany("DELETE FROM milestones WHERE plan_id = ?", [(p["id"],) for p in plans])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO milestones (id, plan_id) VALUES (?, ?)",
+            [(ms["id"], p["id"]) for p in plans for ms in p.get("milestones", [])],
+        )
+
+    def put_tasks(self, tasks: Iterable[dict]) -> None:
+        self._conn.executemany(
+            "INSERT INTO tasks (id, plan_id, milestone_id, completed, data) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET plan_id = excluded.plan_id, "
+            "milestone_id = excluded.milestone_id, completed = excluded.completed, data = excluded.data",
+            [
+                (t["id"], t.get("plan_id"), t.get("milestone_id"), int(bool(t.get("completed"))), json.dumps(t))
+                for t in tasks
+            ],
+        )
+
+    def list_plans(self) -> List[dict]:
+        return self._fetch_all("SELECT data FROM plans ORDER BY rowid", ())
+
+    def list_tasks(
+        self,
+        completed: Optional[bool] = None,
+        plan_id: Optional[str] = None,
+    ) -> List[dict]:
+        clauses, params = [], []
+        if completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(completed))
+        if plan_id is not None:
+            clauses.append("plan_id = ?")
+            params.append(plan_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._fetch_all(f"SELECT data FROM tasks{where} ORDER BY rowid", tuple(params))
+
+    def query_tasks(
+        self,
+        query: TaskQuery,
+        after: Optional[Tuple[Any, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        clauses, params = [], []
+        for column, value in (
+            ("completed", None if query.completed is None else int(query.completed)),
+            ("plan_id", query.plan_id),
+            ("milestone_id", query.milestone_id),
+            ("json_extract(data, '$.priority')", query.priority),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if query.deadline_from:
+            clauses.append(f"{SQL_DEADLINE} >= ?")
+            params.append(query.deadline_from)
+        if query.deadline_to:
+            clauses.append(f"{SQL_DEADLINE} <= ?")
+            params.append(query.deadline_to)
+        order, direction = SQL_ORDER[query.order_by], "DESC" if query.descending else "ASC"
+        if after is not None:
+            clauses.append(f"({order}, id) {'<' if query.descending else '>'} (?, ?)")
+            params.extend(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT data FROM tasks{where} ORDER BY {order} {direction}, id {direction}"
+        if query.text is None:
+            if limit is not None:
+                sql += f" LIMIT {int(limit)}"
+            return self._fetch_all(sql, tuple(params))
+        # title match is Unicode case‑folded in Python: stream rows until the page is full
+        rows = (json.loads(r[0]) for r in self._conn.execute(sql, tuple(params)))
+        return list(islice((r for r in rows if query.matches_text(r.get("title"))), limit))
+
+    def plan_id_for_milestone(self, milestone_id: str) -> Optional[str]:
+        row = self._conn.execute("SELECT plan_id FROM milestones WHERE id = ?", (milestone_id,)).fetchone()
+        return row[0] if row else None
+
+    def goal_index(self) -> GoalIndex:
+        # `meta.plans_version` moves with every commit that writes plans, from any
+        # thread or process; our own writes are folded in at commit instead of
+        # forcing a rebuild.
+        version = self._plans_version()
+        store = self._store
+        with store._mutex:
+            if store._goals is not None and store._goals_version == version:
+                return store._goals
+        goals = GoalIndex(self._conn.execute(
+            "SELECT id, json_extract(data, '$.goal') FROM plans ORDER BY rowid"
+        ).fetchall())
+        with store._mutex:
+            if store._goals is None or store._goals_version <= version:
+                store._goals, store._goals_version = goals, version
+        return goals
+
+    def commit(self) -> None:
+        version = None
+        if self._written_goals:
+            self._conn.execute("UPDATE meta SET plans_version = plans_version + 1")
+            version = self._plans_version()
+        self._conn.execute("COMMIT")
+        store = self._store
+        if version is not None:
+            with store._mutex:
+                # writers are serialised: version - 1 is the state this session started from
+                if store._goals is not None and store._goals_version == version - 1:
+                    for plan_id, goal in self._written_goals.items():
+                        store._goals.add(plan_id, goal)
+                    store._goals_version = version
+        self._written_goals.clear()
+
+    def rollback(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+        if self._written_goals:
+            with self._store._mutex:
+                self._store._goals = None  # may have been built from rows that were just undone
+            self._written_goals.clear()
+
+    def close(self) -> None:
+        try:
+            self.rollback()  # read‑only sessions end here
+        finally:
+            self._store._release(self._conn)
+
+    def _plans_version(self) -> int:
+        return self._conn.execute("SELECT plans_version FROM meta").fetchone()[0]
+
+    def _fetch_one(self, sql: str, params: tuple) -> Optional[dict]:
+        row = self._conn.execute(sql, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _fetch_all(self, sql: str, params: tuple) -> List[dict]:
+        return [json.loads(r[0]) for r in self._conn.execute(sql, params).fetchall()]
+
+
+class SqliteStore(PlanTaskStore):
+    """Row‑level storage in SQLite (WAL mode).
+
+    The full record is kept as JSON in ``data``; the columns used for lookups
+    are denormalised next to it so they can be indexed.  Rows are returned in
+    ``rowid`` order, which an upsert preserves, so listing order matches the
+    JSON backend.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._mutex = threading.Lock()  # guards the connection sets and the goal index, never held by a session
+        self._local = threading.local()  # each thread's own connection
+        self._open: Set[sqlite3.Connection] = set()
+        self._busy: Set[sqlite3.Connection] = set()  # a session is running on them
+        self._goals: Optional[GoalIndex] = None
+        self._goals_version = -1
+        self._migrate_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit mode: sessions issue BEGIN / COMMIT themselves
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """The calling thread's connection, (re)opened on first use after `close`."""
+        conn = getattr(self._local, "conn", None)
+        with self._mutex:
+            if conn in self._open:
+                self._busy.add(conn)
+                return conn
+        conn = self._local.conn = self._connect()
+        with self._mutex:
+            self._open.add(conn)
+            self._busy.add(conn)
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._mutex:
+            self._busy.discard(conn)
+            closed = conn not in self._open  # `close` ran during the session
+        if closed:
+            conn.close()
+
+    def close(self) -> None:
+        """Close every thread's connection (one in use is closed when its session ends)."""
+        with self._mutex:
+            idle = self._open - self._busy
+            self._open = set()
+        for conn in idle:
+            conn.close()
+
+    def _begin(self, readonly: bool) -> StoreSession:
+        return SqliteSession(self, readonly)
+
+    def _migrate_schema(self) -> None:
+        conn = self._acquire()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, script in enumerate(_SQLITE_MIGRATIONS[version:], start=version + 1):
+                conn.executescript(f"BEGIN IMMEDIATE; {script}; PRAGMA user_version = {step}; COMMIT;")
+        finally:
+            self._release(conn)
+
+
+# ─────────────────────────────────────────────────────
+# Factory & migration
+
+
+BACKENDS = ("json", "journal", "sqlite")
+
+
+def open_store(backend: str, data_dir: Path, codec: str = "json") -> PlanTaskStore:
+    """Instantiate the named backend rooted at *data_dir*.
+
+    *codec* (see `codec.CODECS`) is how the file backends write; SQLite keeps
+    JSON text rows, which its indexes and `json_extract` read.
+    """
+    if backend == "json":
+        return JsonStore(data_dir, codec)
+    if backend == "journal":
+        return JournalStore(data_dir, codec)
+    if backend == "sqlite":
+        return SqliteStore(Path(data_dir) / SQLITE_FILENAME)
+    raise ValueError(f"Unsupported store backend {backend!r}. Use one of {', '.join(BACKENDS)}.")
+
+
+def migrate(src: PlanTaskStore, dst: PlanTaskStore) -> dict:
+    """Copy every plan and task from *src* into *dst* (upsert, order preserved).
+
+    Returns the number of records copied per kind.
+    """
+    plans = src.list_plans()
+    tasks = src.list_tasks()
+    dst.put_plans(plans)
+    dst.put_tasks(tasks)
+    return {"plans": len(plans), "tasks": len(tasks)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from agents.productivity.agent import DATA_DIR, shard_data_dir
+
+    parser = argparse.ArgumentParser(description="FocusFlow plan/task store utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="copy all records from one backend to another")
+    mig.add_argument("source", choices=BACKENDS)
+    mig.add_argument("target", choices=BACKENDS)
+    mig.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    mig.add_argument("--shard", metavar="THREAD_ID", help="copy into this user's shard of --data-dir")
+    comp = sub.add_parser("compact", help="fold the journal into a fresh snapshot")
+    comp.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        JournalStore(args.data_dir).compact()
+        print(f"✅ Compacted the journal in {args.data_dir}")
+        raise SystemExit(0)
+    target_dir = shard_data_dir(args.shard, args.data_dir)
+    if args.source == args.target and target_dir == args.data_dir:
+        parser.error("source and target must differ (pick another backend or a --shard)")
+    counts = migrate(open_store(args.source, args.data_dir), open_store(args.target, target_dir))
+    print(f"✅ Migrated {counts['plans']} plans and {counts['tasks']} tasks "
+          f"from {args.source} to {args.target} in {target_dir}")
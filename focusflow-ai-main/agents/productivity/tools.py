@@ -1,43 +1,160 @@
 # /agents/productivity/tools.py
 """LangChain tool wrappers around the domain‑level productivity agent functions.
 
-Expose a clean, typed tool surface to the LLM runtime.
+Expose a clean, typed tool surface to the LLM runtime.  Every tool receives the
+run's `RunnableConfig` (injected by LangChain, hidden from the model) and works in
+the store shard of the user / thread named there.  Tools are async‑native too:
+`ainvoke` runs the same body on the store's I/O pool instead of the event loop.
+Inside a graph run each call also reports its start and end on the ``custom``
+stream (see `graphs/streaming.py`).
 """
 
-from typing import List, Optional, Dict, Any
-from langchain_core.tools import tool
+from functools import wraps
+from typing import Callable, List, Optional, Dict, Any
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+from langgraph.config import get_stream_writer
 
 from agents.productivity.agent import (
     create_plan as domain_create_plan,
+    create_plan_with_tasks as domain_create_plan_with_tasks,
     create_task as domain_create_task,
+    create_tasks_bulk as domain_create_tasks_bulk,
     complete_task as domain_complete_task,
-    list_tasks as domain_list_tasks,
+    complete_tasks_bulk as domain_complete_tasks_bulk,
+    query_tasks as domain_query_tasks,
     schedule_day as domain_schedule_day,
     summarize_plan as domain_summarize_plan,
     find_similar_plans as domain_find_similar_plans,
+    find_duplicates as domain_find_duplicates,
+    get_plan_progress as domain_get_plan_progress,
+    run_io,
+    user_shard,
 )
 
+
+def report_progress(event: Dict[str, Any]) -> None:
+    """Send *event* to the graph's ``custom`` stream (a no-op outside a graph run)."""
+    try:
+        writer = get_stream_writer()
+    except (RuntimeError, KeyError):
+        return
+    writer(event)
+
+
+def tool(func: Callable[..., Any]) -> StructuredTool:
+    """`@tool` whose coroutine runs *func* on the store I/O pool (see `agent.run_io`).
+
+    Start and end of every call are reported to the ``custom`` stream as
+    ``{"tool": name, "status": "start" | "end", ...}`` for progress display.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        report_progress({"tool": name, "status": "start",
+                         "args": {k: v for k, v in kwargs.items() if k != "config"}})
+        result = func(*args, **kwargs)
+        report_progress({"tool": name, "status": "end", "result": result})
+        return result
+
+    @wraps(func)
+    async def coroutine(*args, **kwargs):
+        return await run_io(run, *args, **kwargs)
+    return StructuredTool.from_function(func=run, coroutine=coroutine)
+
+
 # ─────────────────────────────────────────────────────
 # Plan‑level tools
 
 
 @tool
-def create_plan(goal: str, deadline: str, priority: str, milestones: List[str]) -> str:
+def create_plan(
+    goal: str,
+    deadline: str,
+    priority: str,
+    milestones: List[str],
+    config: RunnableConfig = None,
+) -> str:
     """Create a new plan with the given goal, deadline, priority and milestones."""
-    try:
-        plan = domain_create_plan(goal=goal, deadline=deadline, priority=priority, milestones=milestones)
-        return f"✅ Plan created: {plan['goal']} (id={plan['id']})"
-    except Exception as e:
-        return f"⚠️ Error creating plan: {e}"
+    with user_shard(config):
+        try:
+            plan = domain_create_plan(goal=goal, deadline=deadline, priority=priority, milestones=milestones)
+            return f"✅ Plan created: {plan['goal']} (id={plan['id']})"
+        except Exception as e:
+            return f"⚠️ Error creating plan: {e}"
 
 
 @tool
-def find_similar_plans(goal: str, threshold: float = 0.8) -> List[Dict[str, Any]]:
-    """Return plans whose goal is fuzzy‑matched to *goal* (≥ *threshold*)."""
-    try:
-        return domain_find_similar_plans(goal, threshold)
-    except Exception as e:
-        return [{"error": str(e)}]
+def create_plan_with_tasks(
+    goal: str,
+    deadline: str,
+    priority: str,
+    milestones: List[str],
+    tasks: List[Dict[str, Any]],
+    config: RunnableConfig = None,
+) -> str:
+    """Create a plan and its full task breakdown in one step.
+
+    Each task is an object with "title" and optional "priority", "deadline",
+    "estimated_time" and "milestone" (the title of one of *milestones*).
+    """
+    with user_shard(config):
+        try:
+            plan = domain_create_plan_with_tasks(
+                goal=goal, deadline=deadline, priority=priority, milestones=milestones, tasks=tasks
+            )
+            return (
+                f"✅ Plan created: {plan['goal']} (id={plan['id']}) "
+                f"with {len(plan['tasks'])} tasks (ids={', '.join(plan['tasks'])})"
+            )
+        except Exception as e:
+            return f"⚠️ Error creating plan: {e}"
+
+
+@tool
+def find_similar_plans(
+    goal: str,
+    threshold: float = 0.8,
+    top_k: Optional[int] = 5,
+    config: RunnableConfig = None,
+) -> List[Dict[str, Any]]:
+    """Return plans whose goal is fuzzy‑matched to *goal* (≥ *threshold*), at most *top_k*, best first."""
+    with user_shard(config):
+        try:
+            return domain_find_similar_plans(goal, threshold, top_k)
+        except Exception as e:
+            return [{"error": str(e)}]
+
+
+@tool
+def find_duplicates(
+    kind: str = "plans",
+    threshold: float = 0.85,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    config: RunnableConfig = None,
+) -> Dict[str, Any]:
+    """Return a page of near‑duplicate groups — plans (kind="plans", by goal) or tasks (kind="tasks", by title).
+
+    Largest groups first, at most `limit` per page; `total` counts every group
+    in the store.  Pass `next_cursor` back as `cursor` for more.
+    """
+    field = "goal" if kind == "plans" else "title"
+    with user_shard(config):
+        try:
+            start = int(cursor or 0)
+            if start < 0 or limit < 1:
+                raise ValueError("cursor must come from next_cursor and limit be at least 1")
+            groups = sorted(domain_find_duplicates(kind, threshold), key=len, reverse=True)  # stable: store order
+            end = start + limit
+            return {
+                "groups": [[{"id": r["id"], field: r.get(field)} for r in group] for group in groups[start:end]],
+                "total": len(groups),
+                "next_cursor": str(end) if end < len(groups) else None,
+            }
+        except Exception as e:
+            return {"error": str(e)}
 
 
 # ─────────────────────────────────────────────────────
@@ -52,41 +169,96 @@ def create_task(
     estimated_time: Optional[int] = None,
     plan_id: Optional[str] = None,
     milestone_id: Optional[str] = None,
+    config: RunnableConfig = None,
 ) -> str:
-    """Create a task, optionally linked to a plan and/or milestone."""
-    try:
-        task = domain_create_task(
-            title=title,
-            priority=priority,
-            deadline=deadline,
-            estimated_time=estimated_time,
-            plan_id=plan_id,
-            milestone_id=milestone_id,
-        )
-        return f"✅ Task created: {task['title']} (id={task['id']})"
-    except Exception as e:
-        return f"⚠️ Error creating task: {e}"
+    """Create a task, optionally linked to a plan and/or milestone (`estimated_time` in minutes)."""
+    with user_shard(config):
+        try:
+            task = domain_create_task(
+                title=title,
+                priority=priority,
+                deadline=deadline,
+                estimated_time=estimated_time,
+                plan_id=plan_id,
+                milestone_id=milestone_id,
+            )
+            return f"✅ Task created: {task['title']} (id={task['id']})"
+        except Exception as e:
+            return f"⚠️ Error creating task: {e}"
+
+
+@tool
+def create_tasks_bulk(tasks: List[Dict[str, Any]], config: RunnableConfig = None) -> str:
+    """Create several tasks at once.
+
+    Each task is an object with "title" and optional "priority", "deadline",
+    "estimated_time", "plan_id" and "milestone_id".
+    """
+    with user_shard(config):
+        try:
+            created = domain_create_tasks_bulk(tasks)
+            return f"✅ Created {len(created)} tasks (ids={', '.join(t['id'] for t in created)})"
+        except Exception as e:
+            return f"⚠️ Error creating tasks: {e}"
 
 
 @tool
-def complete_task(task_id: str) -> str:
+def complete_task(task_id: str, config: RunnableConfig = None) -> str:
     """Mark the specified task as complete."""
-    try:
-        task = domain_complete_task(task_id)
-        return f"✅ Task '{task['title']}' marked complete at {task['complete_at']}."
-    except KeyError:
-        return f"⚠️ Task with ID {task_id} not found."
-    except Exception as e:
-        return f"⚠️ Error completing task: {e}"
+    with user_shard(config):
+        try:
+            task = domain_complete_task(task_id)
+            return f"✅ Task '{task['title']}' marked complete at {task['complete_at']}."
+        except KeyError:
+            return f"⚠️ Task with ID {task_id} not found."
+        except Exception as e:
+            return f"⚠️ Error completing task: {e}"
 
 
 @tool
-def list_tasks() -> List[Dict[str, Any]]:
-    """Return all tasks stored in the system."""
-    try:
-        return domain_list_tasks()
-    except Exception as e:
-        return [{"error": str(e)}]
+def complete_tasks_bulk(task_ids: List[str], config: RunnableConfig = None) -> str:
+    """Mark several tasks as complete at once."""
+    with user_shard(config):
+        try:
+            done = domain_complete_tasks_bulk(task_ids)
+            return f"✅ Marked {len(done)} tasks complete (ids={', '.join(t['id'] for t in done)})"
+        except KeyError as e:
+            return f"⚠️ {e.args[0]} — no tasks were changed."
+        except Exception as e:
+            return f"⚠️ Error completing tasks: {e}"
+
+
+@tool
+def list_tasks(
+    completed: Optional[bool] = False,
+    plan_id: Optional[str] = None,
+    milestone_id: Optional[str] = None,
+    priority: Optional[str] = None,
+    deadline_from: Optional[str] = None,
+    deadline_to: Optional[str] = None,
+    text: Optional[str] = None,
+    order_by: str = "created_at",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    config: RunnableConfig = None,
+) -> Dict[str, Any]:
+    """Return a page of tasks — by default the 20 oldest open ones.
+
+    Filter by `completed` (null = any), plan, milestone, priority, deadline range
+    (YYYY-MM-DD, inclusive) or `text` in the title; `order_by` is created_at,
+    deadline, priority or title.  Pass `next_cursor` back as `cursor` for more.
+    """
+    with user_shard(config):
+        try:
+            page = domain_query_tasks(
+                completed=completed, plan_id=plan_id, milestone_id=milestone_id, priority=priority,
+                deadline_from=deadline_from, deadline_to=deadline_to, text=text,
+                order_by=order_by, limit=limit, cursor=cursor,
+            )
+            page["tasks"] = [{k: v for k, v in t.items() if v is not None} for t in page["tasks"]]
+            return page
+        except Exception as e:
+            return {"error": str(e)}
 
 
 # ─────────────────────────────────────────────────────
@@ -94,23 +266,49 @@ def list_tasks() -> List[Dict[str, Any]]:
 
 
 @tool
-def schedule_day(available_hours: int = 8) -> Dict[str, str]:
-    """Build a simple hourly schedule for the next `available_hours`."""
-    try:
-        return domain_schedule_day(available_hours)
-    except Exception as e:
-        return {"error": str(e)}
+def schedule_day(
+    available_hours: float = 8,
+    break_minutes: int = 0,
+    break_every: int = 90,
+    config: RunnableConfig = None,
+) -> Dict[str, str]:
+    """Schedule open tasks (by priority and deadline, sized by estimated_time in minutes) into `available_hours`.
+
+    Set `break_minutes` to insert a break after every `break_every` minutes of work.
+    """
+    with user_shard(config):
+        try:
+            return domain_schedule_day(available_hours, break_minutes, break_every)
+        except Exception as e:
+            return {"error": str(e)}
 
 
 @tool
-def summarize_plan(plan_id: str) -> str:
+def track_progress(plan_id: str, config: RunnableConfig = None) -> str:
+    """Report a plan's progress: % of milestones done and completed/total tasks."""
+    with user_shard(config):
+        try:
+            p = domain_get_plan_progress(plan_id)
+            return (
+                f"Progress: {p['progress']}% — {p['milestones_done']}/{p['milestones_total']} milestones, "
+                f"{p['tasks_done']}/{p['tasks_total']} tasks done"
+            )
+        except KeyError:
+            return f"⚠️ Plan with ID {plan_id} not found."
+        except Exception as e:
+            return f"⚠️ Error tracking progress: {e}"
+
+
+@tool
+def summarize_plan(plan_id: str, config: RunnableConfig = None) -> str:
     """Generate a human‑readable summary of the requested plan ID."""
-    try:
-        return domain_summarize_plan(plan_id)
-    except KeyError:
-        return f"⚠️ Plan with ID {plan_id} not found."
-    except Exception as e:
-        return f"⚠️ Error summarizing plan: {e}"
+    with user_shard(config):
+        try:
+            return domain_summarize_plan(plan_id)
+        except KeyError:
+            return f"⚠️ Plan with ID {plan_id} not found."
+        except Exception as e:
+            return f"⚠️ Error summarizing plan: {e}"
 
 
 # ─────────────────────────────────────────────────────
@@ -119,10 +317,15 @@ def summarize_plan(plan_id: str) -> str:
 
 tool_registry = [
     create_plan,
+    create_plan_with_tasks,
     find_similar_plans,
+    find_duplicates,
     create_task,
+    create_tasks_bulk,
     complete_task,
+    complete_tasks_bulk,
     list_tasks,
     schedule_day,
     summarize_plan,
+    track_progress,
 ]
@@ -0,0 +1,80 @@
+# /benchmarks/codec_bench.py
+"""Load / save time and file size of the store codecs on a synthetic tasks file.
+
+    python -m benchmarks.codec_bench --tasks 20000 --repeat 5
+
+"legacy" is the old ``json.dumps(rows, indent=2)`` file; every other row is a
+`codec.CODECS` entry (the ones not installed are skipped).  Load goes through
+`codec.decode`, i.e. includes format detection, like the store does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List
+
+from agents.productivity.codec import CODECS, decode, get_codec
+
+
+def make_tasks(n: int) -> List[dict]:
+    plans = [str(uuid.uuid4()) for _ in range(max(1, n // 50))]
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Task {i}: draft section {i % 17} of the quarterly report",
+            "completed": i % 3 == 0,
+            "plan_id": plans[i % len(plans)],
+            "milestone_id": str(uuid.uuid4()),
+            "priority": ("high", "medium", "low", None)[i % 4],
+            "deadline": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "estimated_time": (15, 30, 60, None)[i % 4],
+            "created_at": f"2025-01-01T09:{i % 60:02d}:{i % 60:02d}.{i:06d}",
+            "complete_at": None,
+        }
+        for i in range(n)
+    ]
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n: int, repeat: int) -> List[dict]:
+    rows = make_tasks(n)
+    writers = {"legacy": lambda obj: json.dumps(obj, indent=2).encode("utf-8")}
+    for name in CODECS:
+        codec = get_codec(name)
+        if codec.name == name:  # skip the missing ones (they fall back to json)
+            writers[name] = codec.dumps
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, dumps in writers.items():
+            path = Path(tmp) / f"tasks.{name}"
+            save = _best(lambda: path.write_bytes(dumps(rows)), repeat)
+            load = _best(lambda: decode(path.read_bytes()), repeat)
+            assert decode(path.read_bytes()) == rows
+            results.append({"codec": name, "save_ms": save * 1000, "load_ms": load * 1000,
+                            "size_kb": path.stat().st_size / 1024})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FocusFlow store codec benchmark")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.tasks} tasks, best of {args.repeat}")
+    print(f"{'codec':<8} {'save ms':>9} {'load ms':>9} {'size KiB':>10}")
+    for r in run(args.tasks, args.repeat):
+        print(f"{r['codec']:<8} {r['save_ms']:>9.1f} {r['load_ms']:>9.1f} {r['size_kb']:>10.0f}")
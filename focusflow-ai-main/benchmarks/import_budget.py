@@ -0,0 +1,82 @@
+# /benchmarks/import_budget.py
+"""Import‑time budget check for the start‑up path.
+
+    python -m benchmarks.import_budget                  # check the defaults, exit 1 on a regression
+    python -m benchmarks.import_budget cli.main --top 15
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+(best of --repeat runs).  A module fails when its cumulative import time is
+over its budget, or when it pulls in one of the `DEFERRED` packages: the LLM
+clients, LangGraph and the tool layer are imported when the graph is first
+built or a node first runs, never at start‑up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# module → budget in ms (about 10x what they take today; the eager imports took ~950 ms)
+BUDGETS_MS = {
+    "cli.main": 150,
+    "graphs.main_graph": 100,
+}
+DEFERRED = ("langchain_ollama", "ollama", "langgraph.graph", "langgraph.prebuilt", "jsonschema")
+
+
+def import_profile(module: str) -> Dict[str, Tuple[int, int]]:
+    """``{imported module: (self µs, cumulative µs)}`` for ``import module`` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    profile: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header row
+        profile[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return profile
+
+
+def check(module: str, budget_ms: float, repeat: int = 3) -> Tuple[float, List[str], Dict[str, Tuple[int, int]]]:
+    """(best cumulative ms, problems, profile of the best run) for *module*."""
+    runs = [import_profile(module) for _ in range(max(1, repeat))]
+    best = min(runs, key=lambda p: p.get(module, (0, 0))[1])
+    total_ms = best.get(module, (0, 0))[1] / 1000
+    problems = []
+    if total_ms > budget_ms:
+        problems.append(f"{module}: {total_ms:.0f} ms > budget {budget_ms:.0f} ms")
+    pulled = sorted(name for name in best if name in DEFERRED)
+    if pulled:
+        problems.append(f"{module}: imports {', '.join(pulled)} at start-up")
+    return total_ms, problems, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FocusFlow import-time budget check")
+    parser.add_argument("modules", nargs="*", help="modules to check (default: all with a budget)")
+    parser.add_argument("--budget-ms", type=float, help="budget for every module checked")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports (self time)")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules or list(BUDGETS_MS):
+        budget = args.budget_ms or BUDGETS_MS.get(module, 100)
+        total_ms, problems, profile = check(module, budget, args.repeat)
+        print(f"{module:<24} {total_ms:8.1f} ms   (budget {budget:.0f} ms)  {'FAIL' if problems else 'ok'}")
+        for name, (self_us, _) in sorted(profile.items(), key=lambda kv: -kv[1][0])[:args.top]:
+            print(f"    {self_us / 1000:8.1f} ms  {name}")
+        failures += problems
+
+    for problem in failures:
+        print("✗", problem)
+    sys.exit(1 if failures else 0)
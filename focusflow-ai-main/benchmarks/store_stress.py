@@ -0,0 +1,134 @@
+# /benchmarks/store_stress.py
+"""Multi‑process stress test for the plan/task store.
+
+    python -m benchmarks.store_stress --backend json --procs 4 --ops 100
+    python -m benchmarks.store_stress --backend journal --procs 8 --sharded
+    python -m benchmarks.store_stress --backend journal --compact-bytes 65536
+
+Every worker process creates `--ops` tasks under one milestone and completes
+each of them right away, through the regular agent functions.  By default all
+workers share one plan, so every commit races for the same plan record — the
+worst case for optimistic concurrency.  With `--sharded` each worker is a
+different user (own shard, own plan), which is how the tools run in practice.
+
+Afterwards the script checks that no update was lost (every task stored and
+completed, plan / milestone task lists complete, progress counters consistent)
+and prints the commit throughput.  `--compact-bytes` lowers the journal's
+compaction threshold (`store.JOURNAL_COMPACT_BYTES`) in every worker, so
+background compactions race with the commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from agents.productivity import agent, store
+from agents.productivity.store import BACKENDS
+
+SCHEMAS = ("task_schema.json", "planning_schema.json")
+
+
+def _setup_agent(backend: str, data_dir: Path, compact_bytes: Optional[int] = None) -> None:
+    if compact_bytes:
+        store.JOURNAL_COMPACT_BYTES = compact_bytes
+    agent.DATA_DIR = data_dir
+    agent.SCHEMA_DIR = data_dir / "schemas"
+    agent.STORE_BACKEND = backend
+    agent.set_store(None)
+
+
+def _new_plan() -> dict:
+    return agent.create_plan(goal="Stress", deadline="2030-01-01", priority="high", milestones=["All"])
+
+
+def _worker(backend: str, data_dir: str, worker: int, ops: int, milestone_id: str, sharded: bool,
+            compact_bytes: Optional[int], start) -> None:
+    _setup_agent(backend, Path(data_dir), compact_bytes)
+    shard = f"user-{worker}" if sharded else None
+    with agent.use_shard(shard):
+        if sharded:
+            milestone_id = _new_plan()["milestones"][0]["id"]
+        start.wait()
+        for i in range(ops):
+            task = agent.create_task(f"w{worker}-{i}", milestone_id=milestone_id)
+            agent.complete_task(task["id"])
+
+
+def _check(expected: int) -> List[str]:
+    problems = []
+    tasks = agent.get_store().list_tasks()
+    if len(tasks) != expected or not all(t["completed"] for t in tasks):
+        problems.append(f"{len(tasks)} tasks stored, {sum(t['completed'] for t in tasks)} completed "
+                        f"(expected {expected})")
+    for plan in agent.list_plans():
+        ms = plan["milestones"][0]
+        if not len(plan["tasks"]) == len(ms["task_ids"]) == plan["tasks_done"] == expected:
+            problems.append(f"plan lists {len(plan['tasks'])} tasks, milestone {len(ms['task_ids'])}, "
+                            f"{plan['tasks_done']} counted done (expected {expected})")
+    drifted = agent.check_progress_counters()
+    if drifted:
+        problems.append(f"progress counters drifted in {drifted}")
+    return problems
+
+
+def run(backend: str, procs: int, ops: int, sharded: bool = False, data_dir: Path = None,
+        compact_bytes: Optional[int] = None) -> dict:
+    """Run the stress test; returns commits, seconds, commits/s, worker exit codes and the problems found."""
+    data_dir = Path(data_dir or tempfile.mkdtemp(prefix="focusflow-stress-"))
+    (data_dir / "schemas").mkdir(parents=True, exist_ok=True)
+    for name in SCHEMAS:
+        (data_dir / "schemas" / name).write_text(json.dumps({"type": "object"}))
+    _setup_agent(backend, data_dir, compact_bytes)
+    milestone_id = None if sharded else _new_plan()["milestones"][0]["id"]
+
+    ctx = mp.get_context("spawn")
+    start = ctx.Event()
+    workers = [
+        ctx.Process(target=_worker, args=(backend, str(data_dir), w, ops, milestone_id, sharded, compact_bytes, start))
+        for w in range(procs)
+    ]
+    for p in workers:
+        p.start()
+    time.sleep(0.5)  # let every worker import & open its store
+    began = time.perf_counter()
+    start.set()
+    for p in workers:
+        p.join()
+    elapsed = time.perf_counter() - began
+
+    exitcodes = [p.exitcode for p in workers]
+    problems = [f"worker {w} exited with {code}" for w, code in enumerate(exitcodes) if code]
+    if sharded:
+        for w in range(procs):
+            with agent.use_shard(f"user-{w}"):
+                problems += [f"user-{w}: {msg}" for msg in _check(ops)]
+    else:
+        problems += _check(procs * ops)
+    commits = procs * ops * 2
+    return {"commits": commits, "seconds": elapsed, "rate": commits / elapsed,
+            "exitcodes": exitcodes, "problems": problems}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FocusFlow store stress test")
+    parser.add_argument("--backend", choices=BACKENDS, default="json")
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=100, help="tasks created + completed per worker")
+    parser.add_argument("--sharded", action="store_true", help="one user shard per worker")
+    parser.add_argument("--data-dir", type=Path)
+    parser.add_argument("--compact-bytes", type=int, help="journal compaction threshold (default: the store's)")
+    args = parser.parse_args()
+
+    result = run(args.backend, args.procs, args.ops, args.sharded, args.data_dir, args.compact_bytes)
+    print(f"{args.backend}{' (sharded)' if args.sharded else ''}: {result['commits']} commits from "
+          f"{args.procs} processes in {result['seconds']:.2f}s → {result['rate']:.0f} commits/s")
+    if result["problems"]:
+        print("⚠️ Lost updates:\n  " + "\n  ".join(result["problems"]))
+        raise SystemExit(1)
+    print("✅ No lost updates")
@@ -1,17 +1,35 @@
 # /cli/main.py
-from graphs.main_graph import build_main_graph
+import argparse
+import json
+import textwrap
+import threading
+
+from config import LLM_WARM_UP
+from graphs.main_graph import get_main_graph
+from graphs.streaming import stream_turn
+from llm.llm_wrapper import warm_up
 from memory.checkpointer import get_checkpointer
 
 
-def main() -> None:
-    # ── build graph & bind persistent memory ───────────────────────────────
-    graph = build_main_graph()                     # CompiledStateGraph → Runnable
-    checkpointer = get_checkpointer()              # your SQLite wrapper
+def format_result(result) -> str:
+    """A tool result in full, for the progress display (JSON indented)."""
+    if isinstance(result, str):
+        return result
+    return json.dumps(result, indent=2, ensure_ascii=False, default=str)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="FocusFlow AI CLI")
+    parser.add_argument("--timings", action="store_true",
+                        help="report time to first token and total latency per turn")
+    args = parser.parse_args(argv)
 
-    engine = graph.with_config({                   # attach once
-        "checkpointer": checkpointer,
-        "recency_window": 8,                       # keep if your graph reads it
-    })
+    if LLM_WARM_UP:                                # load the model while the user types
+        warm_up(background=True)
+
+    # ── build graph in the background while the user types ─────────────────
+    threading.Thread(target=get_main_graph, name="focusflow-graph", daemon=True).start()
+    engine = None
 
     thread_id = "focusflow-local-user"
     cfg = {"configurable": {"thread_id": thread_id}}
@@ -24,9 +42,37 @@ def main() -> None:
             print("Goodbye! 👋")
             break
 
-        # Run the graph
-        result = engine.invoke({"user_msg": user_msg}, cfg)
-        print("AI:", result.get("assistant_response", "[no response]"))
+        if engine is None:
+            # ── bind persistent memory (waits for the graph if still building) ──
+            engine = get_main_graph().with_config({    # attach once
+                "checkpointer": get_checkpointer(),    # your SQLite wrapper
+                "recency_window": 8,                   # keep if your graph reads it
+            })
+
+        # Run the graph, printing the reply as it is generated
+        print("AI: ", end="", flush=True)
+        streamed = in_progress_line = False
+        for event in stream_turn(engine, user_msg, cfg):
+            if event["type"] == "token":
+                if in_progress_line:  # reply text starts on its own line
+                    print()
+                    in_progress_line = False
+                print(event["text"], end="", flush=True)
+                streamed = True
+            elif event["type"] == "tool_start":
+                print(f"\n  🔧 {event['tool']}…", end="", flush=True)
+                in_progress_line = True
+            elif event["type"] == "tool_end":
+                print(" ✓")
+                print(textwrap.indent(format_result(event["result"]), "     "), flush=True)
+                in_progress_line = False
+            elif event["type"] == "done":
+                if in_progress_line and not streamed:
+                    print()
+                print("" if streamed else event["reply"] or "[no response]")
+                if args.timings:
+                    ttft = f"{event['ttft']:.2f}s" if event["ttft"] is not None else "—"
+                    print(f"  ⏱ first token {ttft} · total {event['total']:.2f}s")
 
 
 if __name__ == "__main__":
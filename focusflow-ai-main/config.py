@@ -3,4 +3,45 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-OLLAMA_HOST = os.getenv("OLLAMA_HOST")
\ No newline at end of file
+OLLAMA_HOST = os.getenv("OLLAMA_HOST")
+
+# Model used by the router and the agents, and how long Ollama keeps it loaded
+# after a request (seconds or a duration like "30m"; "-1" = until the server stops)
+OLLAMA_MODEL = os.getenv("FOCUSFLOW_MODEL", "qwen2.5:3b")
+OLLAMA_KEEP_ALIVE = os.getenv("FOCUSFLOW_KEEP_ALIVE", "30m")
+
+# Load the model on the Ollama server when the CLI starts, so the first message doesn't wait for it
+LLM_WARM_UP = os.getenv("FOCUSFLOW_WARM_UP", "1") == "1"
+
+# Plan/task storage engine: "json" (legacy files), "journal" or "sqlite"
+STORE_BACKEND = os.getenv("FOCUSFLOW_STORE", "json")
+
+# How the file backends write: "json" (compact stdlib), "orjson", "msgpack" or "auto";
+# reads detect the format, so switching needs no migration
+STORE_CODEC = os.getenv("FOCUSFLOW_CODEC", "json")
+
+# One store (own files & locks) per user / graph thread under data/shards; off ("0") = the
+# single store in data/. Existing data stays in data/: migrate it before turning this on
+# (see "Per-user shards" in the README)
+STORE_SHARDING = os.getenv("FOCUSFLOW_SHARDING", "0") == "1"
+
+# Re-read prompt fragments when their files change (development); off = read once
+PROMPT_RELOAD = os.getenv("FOCUSFLOW_PROMPT_RELOAD", "0") == "1"
+
+# Route without the LLM when the fast path is at least this sure: rule hits count as 1.0,
+# the naive Bayes model reports its posterior; above 1 (e.g. 2) turns the fast path off
+# and every message goes to the LLM router
+FAST_ROUTER_CONFIDENCE = float(os.getenv("FOCUSFLOW_FAST_ROUTER", "0.9"))
+
+# Graph layout: "two_stage" (router LLM, then the agent) or "single_pass" (one call routes
+# and answers; the two-stage path only runs when its output does not parse)
+GRAPH_MODE = os.getenv("FOCUSFLOW_GRAPH_MODE", "two_stage")
+
+# A follow-up of at most this many words keeps its thread's previous route, unless the fast
+# path reads it as small talk or a feeling ("I feel overwhelmed") (0 disables)
+ROUTE_CARRY_OVER_WORDS = int(os.getenv("FOCUSFLOW_ROUTE_CARRY_OVER", "4"))
+
+# Conversation history in prompts: approx. token budget of the agents' window
+# (the router gets a quarter of it) and the turns the router looks back on
+HISTORY_TOKEN_BUDGET = int(os.getenv("FOCUSFLOW_HISTORY_TOKENS", "1500"))
+ROUTER_HISTORY_TURNS = int(os.getenv("FOCUSFLOW_ROUTER_TURNS", "4"))
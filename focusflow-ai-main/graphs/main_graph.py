@@ -1,14 +1,43 @@
 # graphs/main_graph.py
+#
+# Importing this module is cheap: LangGraph and the nodes are imported when a
+# graph is first built, and the nodes create their LLM clients / agents on
+# first use.  `get_main_graph` compiles each mode once per process.
 
-from langgraph.graph import StateGraph, END
-from graphs.nodes.entrypoint import entrypoint
-from graphs.nodes.router import router
-from graphs.nodes.responder import responder
-from graphs.types import GraphState
-from graphs.nodes.productivity_llm import productivity_llm_node
-from graphs.nodes.chatbot import chatbot_node
+import threading
+from typing import Any, Dict, Optional
+
+from config import GRAPH_MODE
+
+GRAPH_MODES = ("two_stage", "single_pass")
+
+_graphs: Dict[str, Any] = {}
+_graphs_lock = threading.Lock()
+
+def get_main_graph(mode: Optional[str] = None):
+    """The compiled graph for *mode* (default: GRAPH_MODE), built on first call and reused after."""
+    mode = mode or GRAPH_MODE
+    with _graphs_lock:
+        graph = _graphs.get(mode)
+        if graph is None:
+            graph = _graphs[mode] = build_main_graph(mode)
+    return graph
+
+def build_main_graph(mode: Optional[str] = None):
+    """Compile a new graph; *mode* is "two_stage" or "single_pass" (default: GRAPH_MODE)."""
+    mode = mode or GRAPH_MODE
+    if mode not in GRAPH_MODES:
+        raise ValueError(f"Unknown graph mode {mode!r}; expected one of {GRAPH_MODES}")
+
+    from langgraph.graph import StateGraph
+    from graphs.nodes.entrypoint import entrypoint
+    from graphs.nodes.router import router
+    from graphs.nodes.responder import responder
+    from graphs.types import GraphState
+    from graphs.nodes.productivity_llm import productivity_llm_node
+    from graphs.nodes.chatbot import chatbot_node
+    from graphs.nodes.single_pass import single_pass_node
 
-def build_main_graph() -> StateGraph:
     g = StateGraph(GraphState)
 
     # ── core nodes ───────────────────────────────────────────────────────────
@@ -20,7 +49,19 @@ def build_main_graph() -> StateGraph:
 
     # ── transitions ─────────────────────────────────────────────────────────
     g.set_entry_point('entrypoint')
-    g.add_edge('entrypoint', 'router')
+    if mode == "single_pass":
+        # one call routes and answers; only unparsable output takes the router path
+        g.add_node('single_pass', single_pass_node)
+        g.add_edge('entrypoint', 'single_pass')
+        g.add_conditional_edges(
+            'single_pass', lambda state: bool(state.get('single_pass_fallback')),
+            {
+                True:  'router',
+                False: 'responder',
+            }
+        )
+    else:
+        g.add_edge('entrypoint', 'router')
 
     # route to productivity or straight to final responder
     g.add_conditional_edges(
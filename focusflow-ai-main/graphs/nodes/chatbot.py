@@ -1,27 +1,38 @@
 # /graphs/nodes/chatbot.py
 
 from datetime import datetime
-from llm.llm_wrapper import LLMWrapper
-from langgraph.prebuilt import create_react_agent
+from functools import lru_cache
+from typing import Optional
+from llm.llm_wrapper import get_llm
 from langchain_core.messages import (
-    AIMessage
+    AIMessage, HumanMessage, SystemMessage
 )
 
-from agents.productivity.tools import tool_registry
 from graphs.types import GraphState
+from langchain_core.runnables import RunnableConfig
+from memory.history import AGENT_HISTORY, recency_window
 
 
-llm = LLMWrapper(provider="ollama", model="qwen2.5:3b").llm
+llm = None  # shared chat client (llm/llm_wrapper.py), created by chat_model() on first use
 
-def chatbot_node(state: GraphState) -> GraphState:
+def chat_model():
+    global llm
+    if llm is None:
+        llm = get_llm()
+    return llm
+
+@lru_cache(maxsize=None)
+def react_agent():
+    """The tool-less chat agent, compiled once (on first use); the prompt is sent per turn as a system message."""
+    from langgraph.prebuilt import create_react_agent
+    return create_react_agent(model=chat_model(), tools=[])
+
+def chatbot_node(state: GraphState, config: Optional[RunnableConfig] = None) -> GraphState:
     # 0. Ensure mandatory state keys exist
     state.setdefault("turns", [])
     state["llm_error"] = None
 
-    history_str = "\n".join(
-        f"{turn['role'].title()}: {turn['content']}"
-        for turn in state["turns"]
-    )
+    history_str = AGENT_HISTORY.render(state["turns"], recency_window(config))
     base_system_msg = """ You are FocusFlow, a thoughtful and supportive assistant.
 
 Your goal is to help the user reflect, explore thoughts, capture ideas, or maintain motivation — especially when structured planning is not currently enabled.
@@ -61,14 +72,10 @@ Keep it human. Keep it helpful.
     })
     # print("User: ", user_msg)
 
-    agent = create_react_agent(
-        model=llm,
-        tools =[],
-        prompt=prompt_template
-    )
-
     try:
-        response = agent.invoke({"messages": user_msg})
+        response = react_agent().invoke(
+            {"messages": [SystemMessage(prompt_template), HumanMessage(user_msg)]}
+        )
     except Exception as exc:
         state["llm_error"] = str(exc)
         print("llm_error: ", str(exc))
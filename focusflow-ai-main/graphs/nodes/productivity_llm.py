@@ -1,19 +1,64 @@
 # /graphs/nodes/productivity_llm.py
 from datetime import datetime
-from llm.llm_wrapper import LLMWrapper
-from langgraph.prebuilt import create_react_agent
+from functools import lru_cache
+from llm.llm_wrapper import get_llm
 from langchain_core.messages import (
-    AIMessage, ToolMessage
+    AIMessage, HumanMessage, SystemMessage, ToolMessage
 )
 
-from agents.productivity.tools import tool_registry
 from agents.productivity.prompt_builder import build_prompt  # keeps your custom header
 from graphs.types import GraphState
-from typing import Any, Dict, List
+from langchain_core.runnables import RunnableConfig
+from memory.history import AGENT_HISTORY, recency_window
+from typing import Any, Dict, List, Optional, Tuple
 
-llm = LLMWrapper(provider="ollama", model="qwen2.5:3b").llm
+llm = None  # shared chat client (llm/llm_wrapper.py), created by chat_model() on first use
 
-def productivity_llm_node(state: GraphState) -> GraphState:
+def chat_model():
+    global llm
+    if llm is None:
+        llm = get_llm()
+    return llm
+
+@lru_cache(maxsize=None)
+def react_agent():
+    """The tool-calling ReAct agent, compiled once (on first use).
+
+    Only the tools are bound here; the per-turn prompt (intent fragments +
+    conversation) goes in as the first message of each invoke.
+    """
+    from langgraph.prebuilt import create_react_agent
+    from agents.productivity.tools import tool_registry
+    return create_react_agent(model=chat_model(), tools=tool_registry)
+
+def read_response(response: Any) -> Tuple[str, Optional[list], str]:
+    """(last assistant text, last tool calls, reply to show) from a ReAct agent result.
+
+    The reply is the last tool output followed by the assistant's text, so
+    the tool's ✅/⚠️ confirmation reaches the user even when the model says little.
+    """
+    tool_responsed = ""
+    assistant_response = ""
+    tool_calls = None
+    if isinstance(response, str):
+        assistant_response = response.strip()
+    else:
+        for msg in response.get("messages", []):
+            if isinstance(msg, AIMessage):
+                if msg.tool_calls:
+                    tool_calls = msg.tool_calls
+                if msg.content:
+                    assistant_response = msg.content
+            elif isinstance(msg, ToolMessage):
+                tool_responsed = msg.content
+
+    if assistant_response and tool_responsed:
+        reply = tool_responsed + "\n" + assistant_response
+    else:
+        reply = assistant_response or tool_responsed or ""
+    return assistant_response, tool_calls, reply
+
+def productivity_llm_node(state: GraphState, config: Optional[RunnableConfig] = None) -> GraphState:
     # 0. Ensure mandatory state keys exist
     state.setdefault("turns", [])
     state.setdefault("tool_result", None)
@@ -27,10 +72,7 @@ def productivity_llm_node(state: GraphState) -> GraphState:
     base_system_msg = build_prompt(state["turns"], intent)
     # print("System: \n", base_system_msg)
 
-    history_str = "\n".join(
-        f"{turn['role'].title()}: {turn['content']}"
-        for turn in state["turns"]
-    )
+    history_str = AGENT_HISTORY.render(state["turns"], recency_window(config))
 
     prompt_template="\n\n".join([
             base_system_msg,
@@ -47,48 +89,20 @@ def productivity_llm_node(state: GraphState) -> GraphState:
     })
     # print("User: ", user_msg)
 
-    agent = create_react_agent(
-        model=llm,
-        tools=tool_registry,
-        prompt=prompt_template
-    )
-
     try:
-        response = agent.invoke({"messages": user_msg})
+        response = react_agent().invoke(
+            {"messages": [SystemMessage(prompt_template), HumanMessage(user_msg)]}
+        )
     except Exception as exc:
         state["llm_error"] = str(exc)
         print("llm_error: ", str(exc))
         return state
 
     # print(response)
-    tool_responsed = ""
-    assistant_response = ""
-    tool_calls = None
-    if isinstance(response, str):
-        assistant_response = response.strip()
-        tool_calls = None
-    else:
-        for msg in response.get("messages", []):
-            if isinstance(msg, AIMessage):
-                if msg.tool_calls:
-                    tool_calls = msg.tool_calls
-                    # state["tool_result"].append(tool_calls)
-                    state["tool_calls"] = tool_calls
-                if msg.content:
-                    assistant_response = msg.content
-            elif isinstance(msg, ToolMessage):
-                tool_responsed = msg.content
-    
-    if assistant_response:
-        if tool_responsed:
-            state["assistant_response"] = tool_responsed + "\n" +  assistant_response
-        else:
-            state["assistant_response"] = assistant_response
-    else:
-        if tool_responsed:
-            state["assistant_response"] = tool_responsed 
-        else:
-            state["assistant_response"] = ""
+    assistant_response, tool_calls, reply = read_response(response)
+    if tool_calls:
+        state["tool_calls"] = tool_calls
+    state["assistant_response"] = reply
   
     state["turns"].append({
         "role": "Assistant",
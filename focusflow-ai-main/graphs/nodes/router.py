@@ -1,23 +1,59 @@
 # /graphs/nodes/router.py
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from config import FAST_ROUTER_CONFIDENCE
 from graphs.types import GraphState
+from graphs.nodes.router_fast import RULE, FastRouter
 from graphs.nodes.router_llm import RouterLLM
 
-router_llm = RouterLLM()
+router_llm = RouterLLM()   # cheap: its LLM client is created on first use
+fast_router = None         # trained on first use by get_fast_router() (tests assign their own)
+
+def get_fast_router() -> FastRouter:
+    global fast_router
+    if fast_router is None:
+        fast_router = FastRouter.from_file(min_confidence=FAST_ROUTER_CONFIDENCE)
+    return fast_router
 
-def router(state: GraphState) -> GraphState:
+def _thread_id(state: GraphState, config: Optional[RunnableConfig]) -> Optional[str]:
+    configurable = (config or {}).get("configurable") or {}
+    return configurable.get("thread_id") or state.get("thread_id")
+
+def router(state: GraphState, config: Optional[RunnableConfig] = None) -> GraphState:
     """
     Smart LLM-based router for FocusFlow agents.
     Updates state["agent_route"].
+
+    Explicit commands are routed by the fast path's rules; a short follow-up
+    keeps its thread's previous route unless it reads as small talk or a
+    feeling ("I feel overwhelmed" after a planning turn goes to the chatbot);
+    then the naive Bayes fast path, and only what it is unsure about reaches
+    the (cached) LLM router.
     """
     turns = state.get("turns", [])
     user_msg = state.get("user_msg", "")
+    thread_id = _thread_id(state, config)
 
     # Append latest message to turns if not already included
     if not turns or turns[-1].get("content") != user_msg:
         turns = turns + [{"role": "user", "content": user_msg}]
 
-    agent_route, intent = router_llm.classify(turns, user_msg)
+    fast = get_fast_router()
+    decision = fast.classify(user_msg)
+    small_talk = False
+    if decision is not None and decision[3] == RULE:
+        route = decision[:2]
+    else:
+        small_talk = decision[0] == "other" if decision is not None else fast.leans_other(user_msg)
+        route = None if small_talk else router_llm.carry_over(thread_id, user_msg)
+        if route is None and decision is not None:
+            route = decision[:2]
+    if route is None:
+        route = router_llm.classify(turns, user_msg, thread_id, carry_over=not small_talk)
+    else:
+        router_llm.remember(thread_id, route)
 
-    state["agent_route"] = agent_route
-    state["intent"] = intent
+    state["agent_route"], state["intent"] = route
     return state
@@ -0,0 +1,196 @@
+# /graphs/nodes/router_fast.py
+"""Cheap first‑stage router in front of `RouterLLM`.
+
+Two stages, both in‑process and microsecond‑fast:
+
+1. keyword / regex rules for the unambiguous commands ("list my tasks",
+   "schedule my day", "mark … as done");
+2. a multinomial naive Bayes over word uni‑ and bigrams, trained at start‑up
+   from `router_examples.jsonl` (one ``{"text", "agent", "intent"}`` per line).
+
+`classify` returns a route only when a rule fires or the Bayes posterior
+reaches `min_confidence`; otherwise it returns ``None`` and the caller falls
+back to the LLM router.  Rule hits count as confidence 1.0, so a
+`min_confidence` above 1 turns the whole fast path off.  `stats` counts calls and fast‑path hits, and
+``python -m graphs.nodes.router_fast`` reports hit rate and accuracy with
+k‑fold cross validation over the labelled file.
+"""
+
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EXAMPLES_FILE = Path(__file__).with_name("router_examples.jsonl")
+MIN_CONFIDENCE = 0.9
+RULE_CONFIDENCE = 1.0  # what a rule hit reports (and must reach `min_confidence` like the model)
+RULE, MODEL = "rule", "model"  # which stage decided, last item of a `classify` decision
+MIN_KNOWN_TOKENS = 2   # fewer features than this (e.g. "Before summer.") → leave it to the LLM
+
+Route = Tuple[str, Optional[str]]   # (agent, intent)
+Decision = Tuple[str, Optional[str], float, str]   # (agent, intent, confidence, RULE | MODEL)
+
+RULES: List[Tuple[re.Pattern, Route]] = [
+    (re.compile(p, re.I), route) for p, route in [
+        (r"^\s*(list|show)( me)?( all)? my (open |pending |remaining )?(tasks|to-?dos)\b", ("productivity", "tasks")),
+        (r"\b(mark|check off)\b.+\b(as )?(done|complete|completed|finished)\b", ("productivity", "tasks")),
+        (r"^\s*(add|create|new) (a )?(task|to-?do)\b", ("productivity", "tasks")),
+        (r"^\s*(schedule|plan|organi[sz]e|time ?block) (my|the) (day|morning|afternoon|evening)\b", ("productivity", "scheduling")),
+        (r"^\s*(make|create|build) (me )?a (daily )?schedule\b", ("productivity", "scheduling")),
+        (r"\b(show|check|track)( me)? (my |the )?progress\b", ("productivity", "tracking")),
+        (r"^\s*(create|make|start) (a )?(new )?(plan|roadmap)\b", ("productivity", "planning")),
+    ]
+]
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _features(text: str) -> List[str]:
+    words = _WORD.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _label(route: Route) -> str:
+    agent, intent = route
+    return intent if agent == "productivity" and intent else "other"
+
+
+def _route(label: str) -> Route:
+    return ("other", None) if label == "other" else ("productivity", label)
+
+
+def load_examples(path: Path = EXAMPLES_FILE) -> List[Tuple[str, Route]]:
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(r["text"], (r["agent"], r.get("intent"))) for r in rows]
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes with Laplace smoothing over `_features`."""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.log_prior: Dict[str, float] = {}
+        self.log_likelihood: Dict[str, Dict[str, float]] = {}
+        self.log_unseen: Dict[str, float] = {}
+        self.vocabulary: set = set()
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> "NaiveBayes":
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        docs: Counter = Counter()
+        for text, label in examples:
+            docs[label] += 1
+            counts[label].update(_features(text))
+        self.vocabulary = set().union(*counts.values())
+        total_docs, v = sum(docs.values()), len(self.vocabulary)
+        for label, c in counts.items():
+            denominator = sum(c.values()) + self.alpha * v
+            self.log_prior[label] = math.log(docs[label] / total_docs)
+            self.log_likelihood[label] = {f: math.log((n + self.alpha) / denominator) for f, n in c.items()}
+            self.log_unseen[label] = math.log(self.alpha / denominator)
+        return self
+
+    def predict(self, text: str) -> Tuple[Optional[str], float, int]:
+        """Return (best label, posterior probability, number of known features)."""
+        features = [f for f in _features(text) if f in self.vocabulary]
+        if not self.log_prior:
+            return None, 0.0, 0
+        scores = {}
+        for label, prior in self.log_prior.items():
+            ll, unseen = self.log_likelihood[label], self.log_unseen[label]
+            scores[label] = prior + sum(ll.get(f, unseen) for f in features)
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        posterior = 1.0 / sum(math.exp(s - top) for s in scores.values())
+        return best, posterior, len(features)
+
+
+class FastRouter:
+    """Rules, then naive Bayes; abstains (``None``) below *min_confidence*."""
+
+    def __init__(self, examples: Iterable[Tuple[str, Route]] = (), min_confidence: float = MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.model = NaiveBayes().fit((text, _label(route)) for text, route in examples)
+        self.stats = Counter()
+
+    @classmethod
+    def from_file(cls, path: Path = EXAMPLES_FILE, min_confidence: float = MIN_CONFIDENCE) -> "FastRouter":
+        return cls(load_examples(path), min_confidence)
+
+    def classify(self, user_msg: str) -> Optional[Decision]:
+        """Return (agent, intent, confidence, stage), or ``None`` to defer to the LLM router.
+
+        *stage* is `RULE` or `MODEL`; callers branch on it, not on the
+        confidence (a posterior can round to 1.0 too).
+        """
+        self.stats["calls"] += 1
+        if self.min_confidence > RULE_CONFIDENCE:  # disabled: nothing can be that sure
+            return None
+        for pattern, (agent, intent) in RULES:
+            if pattern.search(user_msg):
+                self.stats["rule_hits"] += 1
+                return agent, intent, RULE_CONFIDENCE, RULE
+        label, confidence, known = self.model.predict(user_msg)
+        if label is None or known < MIN_KNOWN_TOKENS or confidence < self.min_confidence:
+            return None
+        self.stats["model_hits"] += 1
+        return (*_route(label), confidence, MODEL)
+
+    def leans_other(self, user_msg: str) -> bool:
+        """Whether the model's best guess for *user_msg*, confident or not, is "other" (small talk, feelings)."""
+        label, _, known = self.model.predict(user_msg)
+        return label == "other" and known >= MIN_KNOWN_TOKENS
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.stats["calls"]
+        return (self.stats["rule_hits"] + self.stats["model_hits"]) / calls if calls else 0.0
+
+
+def evaluate(examples: List[Tuple[str, Route]], folds: int = 5,
+             min_confidence: float = MIN_CONFIDENCE) -> Dict[str, float]:
+    """k‑fold cross validation: share of messages answered by the fast path, and how many of those were right.
+
+    ``accuracy`` needs agent and intent right, ``agent_accuracy`` only the agent.
+    """
+    hits = correct = agent_correct = 0
+    for k in range(folds):
+        train = [e for i, e in enumerate(examples) if i % folds != k]
+        router = FastRouter(train, min_confidence)
+        for text, route in (e for i, e in enumerate(examples) if i % folds == k):
+            decision = router.classify(text)
+            if decision is not None:
+                hits += 1
+                correct += decision[:2] == route
+                agent_correct += decision[0] == route[0]
+    return {
+        "examples": len(examples),
+        "hit_rate": hits / len(examples) if examples else 0.0,
+        "accuracy": correct / hits if hits else 0.0,
+        "agent_accuracy": agent_correct / hits if hits else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Evaluate the fast router on a labelled file")
+    parser.add_argument("--examples", type=Path, default=EXAMPLES_FILE)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    examples = load_examples(args.examples)
+    report = evaluate(examples, args.folds, args.min_confidence)
+    router = FastRouter(examples, args.min_confidence)
+    start = time.perf_counter()
+    for text, _ in examples:
+        router.classify(text)
+    per_call = (time.perf_counter() - start) / len(examples)
+    print(f"{report['examples']} examples, {args.folds}-fold, min confidence {args.min_confidence}")
+    print(f"fast-path hit rate: {report['hit_rate']:.1%}   accuracy on hits: {report['accuracy']:.1%} "
+          f"(agent only: {report['agent_accuracy']:.1%})")
+    print(f"latency: {per_call * 1e6:.0f} µs per message")
@@ -1,17 +1,53 @@
 # /graphs/nodes/router_llm.py
 
-# from llm.llm_wrapper import LLMWrapper
+import re
 import json
-from langchain_ollama import OllamaLLM
-from config import OLLAMA_HOST
+import time
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional, Tuple
+from config import ROUTE_CARRY_OVER_WORDS
+from llm.llm_wrapper import get_llm
+from memory.history import ROUTER_HISTORY
+
+Route = Tuple[str, Optional[str]]
+
+ROUTE_CACHE_SIZE = 512      # decisions kept (LRU)
+ROUTE_CACHE_TTL = 1800.0    # seconds a decision (or a thread's last route) stays valid
+ROUTE_CACHE_TURNS = ROUTER_HISTORY.max_turns  # turns of history in the cache key (what the LLM sees)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def _normalise(text: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", (text or "").lower()).split())
 
 class RouterLLM:
     """
     An LLM-based router that classifies user input into agent routes.
+
+    Decisions are cached (LRU + TTL) on a hash of the normalised last few
+    turns plus the message, and a short follow-up ("High priority") keeps
+    the previous route of its thread without asking the LLM at all.
+    `cache_info()` reports the counters.
     """
 
-    def __init__(self):
-        self.llm = OllamaLLM(model="qwen2.5:3b")
+    def __init__(
+        self,
+        cache_size: int = ROUTE_CACHE_SIZE,
+        cache_ttl: float = ROUTE_CACHE_TTL,
+        cache_turns: int = ROUTE_CACHE_TURNS,
+        carry_over_words: int = ROUTE_CARRY_OVER_WORDS,
+    ):
+        self._llm = None
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_turns = cache_turns
+        self.carry_over_words = carry_over_words  # 0 disables carry-over
+        self._cache: "OrderedDict[str, Tuple[float, Route]]" = OrderedDict()
+        self._threads: "OrderedDict[str, Tuple[float, Route]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = Counter()
  
         self.prompt_template = """You are a router that classifies the latest user intent.
 
@@ -51,12 +87,95 @@ class RouterLLM:
 
 
 
-    def classify(self, turns: list[dict], user_msg: str) -> tuple[str, str]:
+    @property
+    def llm(self):
+        """The shared completion client, created on first use."""
+        if self._llm is None:
+            self._llm = get_llm(kind="completion")
+        return self._llm
+
+    # ── decision cache ──────────────────────────────────────────────────────
+
+    def cache_key(self, turns: list[dict], user_msg: str) -> str:
+        tail = turns[-self.cache_turns:] if self.cache_turns else []
+        parts = [f"{turn.get('role', '').lower()}:{_normalise(turn.get('content', ''))}" for turn in tail]
+        parts.append(_normalise(user_msg))
+        return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _get(self, table: OrderedDict, key: str) -> Optional[Route]:
+        with self._lock:
+            entry = table.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.cache_ttl:
+                del table[key]
+                return None
+            table.move_to_end(key)
+            return entry[1]
+
+    def _put(self, table: OrderedDict, key: str, route: Route) -> None:
+        with self._lock:
+            table[key] = (time.monotonic(), route)
+            table.move_to_end(key)
+            while len(table) > self.cache_size:
+                table.popitem(last=False)
+
+    def carry_over(self, thread_id: Optional[str], user_msg: str) -> Optional[Route]:
+        """The thread's previous route, if *user_msg* is a short follow-up (else None)."""
+        if not thread_id or not self.carry_over_words:
+            return None
+        if len(_normalise(user_msg).split()) > self.carry_over_words:
+            return None
+        route = self._get(self._threads, thread_id)
+        if route is not None:
+            self.stats["carried_over"] += 1
+        return route
+
+    def remember(self, thread_id: Optional[str], route: Route) -> None:
+        """Record *route* as the latest of *thread_id* (for `carry_over`)."""
+        if thread_id:
+            self._put(self._threads, thread_id, route)
+
+    def cache_info(self) -> dict:
+        hits, misses = self.stats["hits"], self.stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "carried_over": self.stats["carried_over"],
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "size": len(self._cache),
+            "maxsize": self.cache_size,
+        }
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._threads.clear()
+        self.stats.clear()
+
+    # ── classification ──────────────────────────────────────────────────────
+
+    def classify(self, turns: list[dict], user_msg: str, thread_id: Optional[str] = None,
+                 carry_over: bool = True) -> Route:
+        """Route *user_msg*: thread carry-over (unless *carry_over* is False), then the decision cache, then the LLM."""
+        route = self.carry_over(thread_id, user_msg) if carry_over else None
+        if route is None:
+            key = self.cache_key(turns, user_msg)
+            route = self._get(self._cache, key)
+            if route is not None:
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                route = self._classify_llm(turns, user_msg)
+                if route is not None:  # parse failures are retried next time
+                    self._put(self._cache, key, route)
+                route = route or ("other", None)
+        self.remember(thread_id, route)
+        return route
+
+    def _classify_llm(self, turns: list[dict], user_msg: str) -> Optional[Route]:
         # On each turn, format your history + new user message…
-        history_str = "\n".join(
-            f"{turn['role'].title()}: {turn['content']}"
-            for turn in turns
-        )
+        history_str = ROUTER_HISTORY.render(turns)
 
         prompt = self.prompt_template.format(history_str=history_str, user_msg=user_msg)
 
@@ -67,7 +186,7 @@ class RouterLLM:
 
         if not (result.startswith("{") and result.endswith("}")):
             print(f"[RouterLLM] Output does not look like JSON, skipping. Output:\n{result}")
-            return "other", None
+            return None
 
         try:
             data = json.loads(result)
@@ -83,7 +202,7 @@ class RouterLLM:
 
         except Exception as e:
             print(f"[RouterLLM] JSON parse error: {e} \u2014 Output: {result}")
-            return "other", None
+            return None
 
 
 if __name__ == "__main__":
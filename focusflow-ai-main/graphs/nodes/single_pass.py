@@ -0,0 +1,146 @@
+# /graphs/nodes/single_pass.py
+"""Route and respond in one LLM call (``FOCUSFLOW_GRAPH_MODE=single_pass``).
+
+The two-stage graph first asks the router LLM where a message goes, then
+asks the chosen agent for the reply.  Here a single call gets the combined
+productivity prompt, the tools and a routing instruction, and answers with
+either
+
+- tool calls — a productivity turn: the calls are run and the cached ReAct
+  agent writes the reply from their results (as it would after its own
+  first step), or
+- a JSON object ``{"agent", "intent", "reply"}`` — the answer itself.
+
+Anything else sets ``single_pass_fallback`` and the graph runs the usual
+router → agent path for this turn.  `stats` counts the three outcomes.
+"""
+
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+
+from agents.productivity.prompt_builder import INTENT_FRAGMENTS, build_combined_prompt, build_prompt
+from graphs.nodes import productivity_llm
+from graphs.nodes.router import _thread_id, router_llm
+from graphs.types import GraphState
+from memory.history import AGENT_HISTORY, recency_window
+
+AGENTS = {"productivity", "other"}
+
+# tool → intent of the turn that called it (for the follow-up prompt and carry-over)
+TOOL_INTENTS = {
+    "create_plan": "planning",
+    "create_plan_with_tasks": "planning",
+    "find_similar_plans": "planning",
+    "find_duplicates": "planning",
+    "create_task": "tasks",
+    "create_tasks_bulk": "tasks",
+    "complete_task": "tasks",
+    "complete_tasks_bulk": "tasks",
+    "list_tasks": "tasks",
+    "schedule_day": "scheduling",
+    "track_progress": "tracking",
+    "summarize_plan": "tracking",
+}
+
+INSTRUCTIONS = """---
+
+You are also the router: there is no separate classification step. For the latest user message do exactly ONE of:
+
+1. If it asks to create, change, complete, list, schedule or track plans and tasks, call the matching tool(s).
+2. Otherwise answer with ONLY a JSON object, no text around it:
+   {"agent": "productivity" or "other", "intent": "planning", "scheduling", "tasks", "tracking" or null, "reply": "<your message to the user>"}
+   - "productivity" with its intent for questions or clarifications about plans, tasks, schedules or progress;
+   - "other" with intent null for small talk, feelings, reflection and ideas. Then reply as a calm, supportive
+     companion: short and human, with an open follow-up question when it helps."""
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+stats = Counter()
+
+
+@lru_cache(maxsize=None)
+def route_and_respond_model():
+    """The productivity model with the tools bound (once, on first use)."""
+    from agents.productivity.tools import tool_registry
+    return productivity_llm.chat_model().bind_tools(tool_registry)
+
+
+@lru_cache(maxsize=None)
+def tool_node():
+    from langgraph.prebuilt import ToolNode
+    from agents.productivity.tools import tool_registry
+    return ToolNode(tool_registry)
+
+
+def parse_reply(text: str) -> Optional[Tuple[str, Optional[str], str]]:
+    """(agent, intent, reply) from the model's JSON answer, or None if it is not one."""
+    text = _FENCE.sub("", (text or "").strip())
+    if not (text.startswith("{") and text.endswith("}")):
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    agent, intent, reply = data.get("agent"), data.get("intent"), data.get("reply")
+    if agent not in AGENTS or not isinstance(reply, str) or not reply.strip():
+        return None
+    if agent == "other" or intent not in INTENT_FRAGMENTS:
+        intent = None
+    return agent, intent, reply.strip()
+
+
+def single_pass_node(state: GraphState, config: Optional[RunnableConfig] = None) -> GraphState:
+    state.setdefault("turns", [])
+    state["llm_error"] = None
+    state["single_pass_fallback"] = False
+
+    user_msg = state.get("user_msg", "")
+    history_str = "Conversation:\n" + AGENT_HISTORY.render(state["turns"], recency_window(config))
+    prompt = "\n\n".join([build_combined_prompt(), INSTRUCTIONS, history_str])
+
+    try:
+        message = route_and_respond_model().invoke([SystemMessage(prompt), HumanMessage(user_msg)])
+    except Exception as exc:
+        state["llm_error"] = str(exc)
+        print("llm_error: ", str(exc))
+        return state
+
+    if isinstance(message, AIMessage) and message.tool_calls:
+        stats["tool_calls"] += 1
+        intent = TOOL_INTENTS.get(message.tool_calls[0]["name"], "tasks")
+        route = ("productivity", intent)
+        tool_messages = tool_node().invoke({"messages": [message]})["messages"]
+        # The agent picks up after its first step: the follow-up call only
+        # turns the tool results into the reply (or calls more tools).
+        system = "\n\n".join([build_prompt(state["turns"], intent), history_str])
+        try:
+            response = productivity_llm.react_agent().invoke(
+                {"messages": [SystemMessage(system), HumanMessage(user_msg), message, *tool_messages]}
+            )
+        except Exception as exc:
+            state["llm_error"] = str(exc)
+            print("llm_error: ", str(exc))
+            response = {"messages": [message, *tool_messages]}
+        _, state["tool_calls"], state["assistant_response"] = productivity_llm.read_response(response)
+    else:
+        parsed = parse_reply(getattr(message, "content", message))
+        if parsed is None:
+            stats["fallbacks"] += 1
+            state["single_pass_fallback"] = True
+            return state
+        stats["answered"] += 1
+        route = parsed[:2]
+        state["assistant_response"] = parsed[2]
+
+    state["agent_route"], state["intent"] = route
+    router_llm.remember(_thread_id(state, config), route)
+    state.pop("user_msg", None)
+    return state
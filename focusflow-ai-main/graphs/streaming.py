@@ -0,0 +1,83 @@
+# /graphs/streaming.py
+"""Run one turn of the graph as a stream of events.
+
+`stream_turn(engine, user_msg, config)` (and its async twin `astream_turn`)
+drives the graph's streaming interface and yields plain dicts:
+
+- ``{"type": "token", "text": ...}`` — reply text as the productivity /
+  chatbot agent generates it;
+- ``{"type": "tool_start", "tool": ..., "args": {...}}`` and
+  ``{"type": "tool_end", "tool": ..., "result": ...}`` — tool progress, as
+  reported by the tools themselves (see `agents/productivity/tools.py`);
+- ``{"type": "done", "reply": ..., "state": {...}, "ttft": ..., "total": ...}``
+  — last, with the final graph state, time to first token (``None`` if no
+  token was streamed) and total latency in seconds.
+
+Not every reply is streamed token by token (the single‑pass JSON answer,
+responder errors), so ``done["reply"]`` is the text to show when no tokens
+arrived.
+"""
+
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+# Top-level nodes whose nested agent writes the reply; what they stream is shown.
+REPLY_NODES = {"productivity", "chatbot", "single_pass"}
+STREAM_MODES = ["messages", "custom", "values"]
+
+
+class _Turn:
+    """Turns raw ``(namespace, mode, chunk)`` stream items into events, timing the turn."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.state: Dict[str, Any] = {}
+
+    def events(self, namespace: tuple, mode: str, chunk: Any) -> Iterator[Dict[str, Any]]:
+        if mode == "messages":
+            message, _ = chunk
+            # namespace () is the graph itself (router, single-pass JSON call): never reply text.
+            # The chunk class is matched by name so importing this module stays cheap.
+            if (namespace and namespace[0].split(":")[0] in REPLY_NODES
+                    and getattr(message, "type", None) == "AIMessageChunk"
+                    and isinstance(message.content, str) and message.content):
+                if self.first_token is None:
+                    self.first_token = time.perf_counter()
+                yield {"type": "token", "text": message.content}
+        elif mode == "custom":
+            if isinstance(chunk, dict) and "tool" in chunk:
+                event = {k: v for k, v in chunk.items() if k != "status"}
+                yield {"type": f"tool_{chunk.get('status')}", **event}
+        elif mode == "values" and not namespace:
+            self.state = chunk
+
+    def done(self) -> Dict[str, Any]:
+        return {
+            "type": "done",
+            "reply": self.state.get("assistant_response", ""),
+            "state": self.state,
+            "ttft": self.first_token - self.start if self.first_token is not None else None,
+            "total": time.perf_counter() - self.start,
+        }
+
+
+def stream_turn(engine, user_msg: str, config: Optional[dict] = None) -> Iterator[Dict[str, Any]]:
+    """Run *user_msg* through the compiled graph *engine*, yielding events as they happen."""
+    turn = _Turn()
+    for namespace, mode, chunk in engine.stream(
+        {"user_msg": user_msg}, config, stream_mode=STREAM_MODES, subgraphs=True
+    ):
+        yield from turn.events(namespace, mode, chunk)
+    yield turn.done()
+
+
+async def astream_turn(engine, user_msg: str, config: Optional[dict] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async twin of `stream_turn`."""
+    turn = _Turn()
+    async for namespace, mode, chunk in engine.astream(
+        {"user_msg": user_msg}, config, stream_mode=STREAM_MODES, subgraphs=True
+    ):
+        for event in turn.events(namespace, mode, chunk):
+            yield event
+    yield turn.done()
@@ -13,3 +13,4 @@ class GraphState(TypedDict, total=False):   #  total=False → keys are optional
     tool_error: Optional[str]
     system_prompt: Optional[str]
     conversation: Optional[str]
+    single_pass_fallback: Optional[bool]
@@ -1,16 +1,120 @@
 # llm/llm_wrapper.py
-from config import OLLAMA_HOST
+"""Process‑wide LLM clients.
+
+`get_llm` hands out one model object per (provider, kind, model, host), so the
+nodes that use the same model share it instead of each building their own.
+All Ollama clients of a host — chat (`ChatOllama`) and completion
+(`OllamaLLM`) alike — share one HTTP connection pool, talk to `OLLAMA_HOST`,
+and ask the server to keep the model loaded for `OLLAMA_KEEP_ALIVE`.
+`warm_up()` loads the models before the first user message needs them.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import OLLAMA_HOST, OLLAMA_KEEP_ALIVE, OLLAMA_MODEL
+
+POOL_CONNECTIONS = 8   # per host, shared by every client of that host
+
+_lock = threading.Lock()
+_models: Dict[Tuple[str, str, str, str], Any] = {}
+_transports: Dict[str, Tuple[Any, Any]] = {}
+
+
+def _keep_alive() -> Any:
+    value = (OLLAMA_KEEP_ALIVE or "").strip()
+    if not value:
+        return None
+    return int(value) if value.lstrip("-").isdigit() else value   # seconds, or "30m" / "1h"
+
+
+def _ollama_transports(host: str) -> Tuple[Any, Any]:
+    """(sync, async) httpx transports — the connection pools — of *host*, created once."""
+    with _lock:
+        transports = _transports.get(host)
+        if transports is None:
+            import httpx
+            limits = httpx.Limits(max_connections=POOL_CONNECTIONS, max_keepalive_connections=POOL_CONNECTIONS)
+            transports = _transports[host] = (
+                httpx.HTTPTransport(limits=limits),
+                httpx.AsyncHTTPTransport(limits=limits),
+            )
+        return transports
+
+
+def _create(provider: str, kind: str, model: str, host: str) -> Any:
+    if provider == "ollama":
+        from langchain_ollama import ChatOllama, OllamaLLM
+        sync_transport, async_transport = _ollama_transports(host)
+        cls = ChatOllama if kind == "chat" else OllamaLLM
+        return cls(
+            model=model,
+            base_url=host or None,
+            keep_alive=_keep_alive(),
+            sync_client_kwargs={"transport": sync_transport},
+            async_client_kwargs={"transport": async_transport},
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model)
+    raise ValueError("Unsupported provider. Use 'ollama' or 'openai'.")
+
+
+def get_llm(model: Optional[str] = None, kind: str = "chat", provider: str = "ollama",
+            host: Optional[str] = None) -> Any:
+    """The shared *kind* ("chat" or "completion") client for *model* on *host* (default OLLAMA_HOST)."""
+    if kind not in ("chat", "completion"):
+        raise ValueError("kind must be 'chat' or 'completion'")
+    if provider == "openai":
+        model, host = model or "gpt-4", ""
+    key = (provider, kind, model or OLLAMA_MODEL, host if host is not None else (OLLAMA_HOST or ""))
+    llm = _models.get(key)
+    if llm is None:
+        llm = _create(*key)
+        with _lock:
+            llm = _models.setdefault(key, llm)
+    return llm
+
+
+def clear_clients() -> None:
+    """Forget every shared client (tests, or after changing the host)."""
+    with _lock:
+        _models.clear()
+        _transports.clear()
+
+
+def warm_up(models: Optional[Iterable[str]] = None, host: Optional[str] = None,
+            background: bool = False) -> Optional[threading.Thread]:
+    """Load *models* (default: the Ollama models in use, else OLLAMA_MODEL) into the server's memory.
+
+    Sends each an empty generate request — Ollama's way of loading a model
+    without running it.  With *background* the requests run on a daemon
+    thread, which is returned.  A failed warm‑up only prints a warning: the
+    first real request will load the model instead.
+    """
+    if background:
+        thread = threading.Thread(target=warm_up, args=(models, host), name="focusflow-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    host = host if host is not None else (OLLAMA_HOST or "")
+    if models is None:
+        models = {m for (provider, _, m, h) in list(_models) if provider == "ollama" and h == host} or {OLLAMA_MODEL}
+    from ollama import Client
+    client = Client(host=host or None, transport=_ollama_transports(host)[0])
+    for model in sorted(set(models)):
+        try:
+            client.generate(model=model, prompt="", keep_alive=_keep_alive())
+        except Exception as exc:
+            print(f"⚠️ Warm-up of {model} failed: {exc}")
+    return None
+
 
 class LLMWrapper:
-    def __init__(self, provider="ollama", model="qwen2.5:3b"):
-        if provider == "ollama":
-            from langchain_ollama import ChatOllama
-            self.llm = ChatOllama(model=model)
-        elif provider == "openai":
-            from langchain_openai import ChatOpenAI
-            self.llm = ChatOpenAI(model="gpt-4")
-        else:
-            raise ValueError("Unsupported provider. Use 'ollama' or 'openai'.")
+    """Kept for existing callers: `.llm` is the shared chat client of *model*."""
+
+    def __init__(self, provider="ollama", model: Optional[str] = None):
+        self.llm = get_llm(model, kind="chat", provider=provider)
 
     def __call__(self, prompt: str) -> str:
         return self.llm.invoke(prompt)
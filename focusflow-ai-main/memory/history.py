@@ -0,0 +1,85 @@
+# memory/history.py
+"""Budgeted view of the conversation for prompts.
+
+Every LLM consumer (router, chatbot, productivity agent) used to join *all*
+kept turns into a history string of its own.  A `HistoryWindow` walks the
+turns from the newest backwards and stops at its budget — a turn count and
+an approximate token budget — so the work and the prompt size depend on the
+window, not on how long the conversation has run.  Rendered lines are cached
+per (role, content), least recently used dropped first, so a turn is
+formatted once however many windows and messages it appears in.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from config import HISTORY_TOKEN_BUDGET, ROUTER_HISTORY_TURNS
+
+CHARS_PER_TOKEN = 4          # rough, model‑agnostic estimate
+DEFAULT_RECENCY_WINDOW = 8   # turns, unless the run's config sets `recency_window`
+LINE_CACHE_SIZE = 2048
+
+_lines: "OrderedDict[tuple, str]" = OrderedDict()  # LRU: a hit moves its line to the end
+_lines_mutex = threading.Lock()
+
+
+def approx_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def render_turn(turn: dict) -> str:
+    """``"Role: content"`` for one turn (cached, least recently used evicted first)."""
+    key = (turn.get("role", ""), turn.get("content", ""))
+    with _lines_mutex:
+        line = _lines.get(key)
+        if line is not None:
+            _lines.move_to_end(key)
+            return line
+        line = _lines[key] = f"{key[0].title()}: {key[1]}"
+        if len(_lines) > LINE_CACHE_SIZE:
+            _lines.popitem(last=False)
+    return line
+
+
+def recency_window(config: Optional[dict], default: int = DEFAULT_RECENCY_WINDOW) -> int:
+    """The `recency_window` of a run (``graph.with_config({"recency_window": n})``), else *default*."""
+    config = config or {}
+    value = config.get("recency_window") or (config.get("configurable") or {}).get("recency_window")
+    return int(value) if value else default
+
+
+class HistoryWindow:
+    """The last *max_turns* turns that fit in *max_tokens*, newest always included (truncated if need be)."""
+
+    def __init__(self, max_turns: Optional[int] = None, max_tokens: Optional[int] = None):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+
+    def lines(self, turns: List[dict], max_turns: Optional[int] = None) -> List[str]:
+        max_turns = max_turns or self.max_turns
+        budget = self.max_tokens * CHARS_PER_TOKEN if self.max_tokens else None
+        picked: List[str] = []
+        for turn in reversed(turns):
+            if max_turns is not None and len(picked) >= max_turns:
+                break
+            line = render_turn(turn)
+            if budget is not None:
+                if len(line) > budget:
+                    if not picked:  # never drop the newest turn: keep its end
+                        picked.append("…" + line[len(line) - budget + 1:])
+                    break
+                budget -= len(line) + 1
+            picked.append(line)
+        picked.reverse()
+        return picked
+
+    def render(self, turns: List[dict], max_turns: Optional[int] = None) -> str:
+        """The window as ``"Role: content"`` lines, oldest first; *max_turns* overrides the default."""
+        return "\n".join(self.lines(turns, max_turns))
+
+
+# Per‑consumer budgets: routing only needs the tail of the thread, the agents a
+# recency window (cli/main.py passes one) within the prompt token budget.
+ROUTER_HISTORY = HistoryWindow(max_turns=ROUTER_HISTORY_TURNS, max_tokens=HISTORY_TOKEN_BUDGET // 4)
+AGENT_HISTORY = HistoryWindow(max_turns=DEFAULT_RECENCY_WINDOW, max_tokens=HISTORY_TOKEN_BUDGET)
@@ -0,0 +1,49 @@
+# /tests/test_history.py
+from memory import history
+from memory.history import CHARS_PER_TOKEN, HistoryWindow, recency_window
+
+
+def _turns(n, size=40):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"{i:04d} " + "x" * size} for i in range(n)]
+
+
+def test_window_keeps_the_newest_turns_within_its_budgets():
+    turns = _turns(40)
+    lines = HistoryWindow(max_turns=5).lines(turns)
+    assert lines == [f"{'User' if i % 2 == 0 else 'Assistant'}: {i:04d} " + "x" * 40 for i in range(35, 40)]
+
+    window = HistoryWindow(max_turns=30, max_tokens=60)
+    text = window.render(turns)
+    assert len(text) <= 60 * CHARS_PER_TOKEN and text.endswith(turns[-1]["content"])
+    assert window.render(turns, max_turns=2).count("\n") == 1
+
+    # the newest turn is never dropped, only cut to the budget
+    long = [{"role": "user", "content": "start " + "y" * 500 + " end"}]
+    text = HistoryWindow(max_tokens=10).render(long)
+    assert len(text) == 10 * CHARS_PER_TOKEN and text.startswith("…") and text.endswith(" end")
+
+
+def test_prompt_size_stays_flat_as_the_conversation_grows():
+    window = HistoryWindow(max_turns=8, max_tokens=1500)
+    sizes = {n: len(window.render(_turns(n))) for n in (8, 40, 4000)}
+    assert sizes[8] == sizes[40] == sizes[4000]
+    history._lines.clear()
+    window.render(_turns(4000))
+    assert len(history._lines) == 8  # only the window's turns were rendered
+
+
+def test_line_cache_evicts_the_least_recently_used_turn(monkeypatch):
+    monkeypatch.setattr(history, "LINE_CACHE_SIZE", 2)
+    history._lines.clear()
+    old, mid, new = ({"role": "user", "content": c} for c in ("old", "mid", "new"))
+    history.render_turn(old)
+    history.render_turn(mid)
+    history.render_turn(old)  # a hit: "old" is now the most recently used
+    history.render_turn(new)
+    assert list(history._lines) == [("user", "old"), ("user", "new")]
+
+
+def test_recency_window_comes_from_the_run_config():
+    assert recency_window(None) == history.DEFAULT_RECENCY_WINDOW
+    assert recency_window({"configurable": {"thread_id": "t", "recency_window": 3}}) == 3
+    assert recency_window({"recency_window": 5}) == 5
@@ -0,0 +1,20 @@
+# /tests/test_import_budget.py
+"""Start-up imports stay light (the timing budget itself is `benchmarks/import_budget.py`)."""
+
+import pytest
+
+from benchmarks.import_budget import BUDGETS_MS, DEFERRED, import_profile
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_start_up_modules_defer_the_heavy_imports(module):
+    profile = import_profile(module)
+    assert module in profile
+    assert [name for name in DEFERRED if name in profile] == []
+
+
+@pytest.mark.parametrize("module", ["graphs.nodes.productivity_llm", "graphs.nodes.chatbot",
+                                    "graphs.nodes.router", "graphs.nodes.single_pass"])
+def test_nodes_import_without_creating_llm_clients(module):
+    profile = import_profile(module)
+    assert not {"langchain_ollama", "ollama", "langgraph.prebuilt", "jsonschema"} & set(profile)
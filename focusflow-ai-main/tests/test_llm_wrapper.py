@@ -0,0 +1,55 @@
+# /tests/test_llm_wrapper.py
+"""The shared LLM client registry (no Ollama server needed: nothing here sends a request)."""
+
+import pytest
+
+from llm import llm_wrapper
+from llm.llm_wrapper import LLMWrapper, get_llm
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(llm_wrapper, "OLLAMA_HOST", "http://ollama.test:11434")
+    llm_wrapper.clear_clients()
+    yield
+    llm_wrapper.clear_clients()
+
+
+def test_clients_are_shared_per_model_and_host_and_pool_per_host():
+    chat = get_llm("qwen2.5:3b")
+    assert LLMWrapper(model="qwen2.5:3b").llm is chat
+    assert get_llm("qwen2.5:3b", kind="completion") is not chat
+    assert get_llm("other-model") is not chat
+
+    assert chat.base_url == "http://ollama.test:11434" and chat.keep_alive == "30m"
+    pools = {id(m._client._client._transport) for m in
+             (chat, get_llm("qwen2.5:3b", kind="completion"), get_llm("other-model"))}
+    assert len(pools) == 1
+    assert get_llm("qwen2.5:3b", host="http://elsewhere:11434")._client._client._transport is not \
+        chat._client._client._transport
+
+
+def test_keep_alive_accepts_seconds_and_durations(monkeypatch):
+    for value, expected in [("300", 300), ("-1", -1), ("1h", "1h"), ("", None)]:
+        monkeypatch.setattr(llm_wrapper, "OLLAMA_KEEP_ALIVE", value)
+        assert llm_wrapper._keep_alive() == expected
+
+
+def test_warm_up_loads_the_models_in_use_and_survives_a_missing_server(monkeypatch, capsys):
+    import ollama
+
+    requests = []
+
+    def generate(self, model, prompt, keep_alive=None, **kwargs):
+        requests.append((str(self._client.base_url), model, prompt, keep_alive))
+        if model == "missing":
+            raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(ollama.Client, "generate", generate)
+    get_llm("qwen2.5:3b")
+    get_llm("qwen2.5:3b", kind="completion")
+    llm_wrapper.warm_up()
+    assert requests == [("http://ollama.test:11434", "qwen2.5:3b", "", "30m")]
+
+    llm_wrapper.warm_up(["missing"], background=True).join(timeout=5)
+    assert "Warm-up of missing failed" in capsys.readouterr().out
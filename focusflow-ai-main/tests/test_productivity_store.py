@@ -0,0 +1,801 @@
+# /tests/test_productivity_store.py
+import json
+
+import pytest
+
+from agents.productivity import agent, tools
+from agents.productivity.records import Plan, Task
+from agents.productivity import store as store_module
+from agents.productivity.store import (
+    BACKENDS, JournalStore, JsonStore, PlanTable, SqliteStore, TaskTable, _CachedJsonFile, _Journal, _cached_file,
+    _decode_entries, clear_json_cache, migrate, open_store,
+)
+
+TASK_SCHEMA = {
+    "type": "object",
+    "required": ["id", "title", "completed", "created_at"],
+    "properties": {
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "completed": {"type": "boolean"},
+        "priority": {"type": ["string", "null"]},
+        "estimated_time": {"type": ["integer", "null"]},
+    },
+}
+PLAN_SCHEMA = {
+    "type": "object",
+    "required": ["id", "goal", "deadline", "priority", "milestones"],
+    "properties": {
+        "id": {"type": "string"},
+        "goal": {"type": "string"},
+        "milestones": {"type": "array"},
+    },
+}
+
+
+@pytest.fixture(params=["json", "journal", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    """Point the productivity agent at a fresh data dir + schemas, for each backend."""
+    schema_dir = tmp_path / "schemas"
+    schema_dir.mkdir()
+    (schema_dir / "task_schema.json").write_text(json.dumps(TASK_SCHEMA))
+    (schema_dir / "planning_schema.json").write_text(json.dumps(PLAN_SCHEMA))
+    monkeypatch.setattr(agent, "SCHEMA_DIR", schema_dir)
+    monkeypatch.setattr(agent, "DATA_DIR", tmp_path / "data")
+
+    backend = open_store(request.param, tmp_path / "data")
+    agent.set_store(backend)
+    yield backend
+    agent.set_store(None)
+
+
+def _plan(milestones=("Draft", "Publish")):
+    return agent.create_plan(goal="Launch a blog", deadline="2025-06-01",
+                             priority="high", milestones=list(milestones))
+
+
+def test_create_task_links_plan_and_milestone(store):
+    plan = _plan()
+    ms_id = plan["milestones"][0]["id"]
+    task = agent.create_task("Write first post", plan_id=plan["id"], milestone_id=ms_id)
+
+    stored = store.get_plan(plan["id"])
+    assert stored["tasks"] == [task["id"]]
+    assert stored["milestones"][0]["task_ids"] == [task["id"]]
+    assert store.get_task(task["id"])["title"] == "Write first post"
+
+
+def test_complete_task_rolls_up_progress(store):
+    plan = _plan()
+    ms_id = plan["milestones"][0]["id"]
+    t1 = agent.create_task("Outline", plan_id=plan["id"], milestone_id=ms_id)
+    t2 = agent.create_task("Draft", plan_id=plan["id"], milestone_id=ms_id)
+
+    agent.complete_task(t1["id"])
+    assert store.get_plan(plan["id"])["progress"] == 0
+
+    done = agent.complete_task(t2["id"])
+    assert done["completed"] and done["complete_at"]
+    stored = store.get_plan(plan["id"])
+    assert stored["milestones"][0]["completed"] is True
+    assert stored["progress"] == 50
+
+
+def test_unknown_ids_raise(store):
+    with pytest.raises(KeyError):
+        agent.complete_task("missing")
+    with pytest.raises(KeyError):
+        agent.create_task("Orphan", plan_id="missing")
+    assert "not found" in agent.summarize_plan("missing")
+
+
+def test_failed_transaction_rolls_back(store):
+    with pytest.raises(KeyError):
+        agent.create_task("Orphan", plan_id="missing")
+    assert store.list_tasks() == []
+
+    plan = _plan()
+    with pytest.raises(KeyError):
+        agent.create_task("Bad milestone", plan_id=plan["id"], milestone_id="missing")
+    assert store.list_tasks() == []
+    assert store.get_plan(plan["id"])["tasks"] == []
+
+
+def test_one_save_per_file_per_call(monkeypatch, store):
+    if store.name != "json":
+        pytest.skip("counts JSON file rewrites")
+    saves = []
+    real_write = _CachedJsonFile._write
+    monkeypatch.setattr(_CachedJsonFile, "_write",
+                        lambda self, rows: (saves.append(self.path.name), real_write(self, rows))[1])
+
+    plan = _plan()
+    ms_id = plan["milestones"][0]["id"]
+    saves.clear()
+    task = agent.create_task("Write", plan_id=plan["id"], milestone_id=ms_id)
+    assert sorted(saves) == ["plans.json", "tasks.json"]
+
+    saves.clear()
+    agent.complete_task(task["id"])
+    assert sorted(saves) == ["plans.json", "tasks.json"]
+
+
+def test_create_plan_with_tasks_links_by_milestone_title(store):
+    plan = agent.create_plan_with_tasks(
+        goal="Launch a blog", deadline="2025-06-01", priority="high",
+        milestones=["Draft", "Publish"],
+        tasks=[{"title": "Outline", "milestone": "draft"},
+               {"title": "Write", "milestone": "Draft", "estimated_time": 2},
+               {"title": "Tweet"}],
+    )
+    stored = store.get_plan(plan["id"])
+    assert stored == plan
+    assert len(stored["tasks"]) == 3
+    assert len(stored["milestones"][0]["task_ids"]) == 2
+    assert [t["plan_id"] for t in store.list_tasks()] == [plan["id"]] * 3
+
+    with pytest.raises(KeyError):
+        agent.create_plan_with_tasks("G", "2025-01-01", "low", ["A"], [{"title": "x", "milestone": "B"}])
+    assert len(store.list_plans()) == 1
+
+
+def test_bulk_create_and_complete(store):
+    plan = _plan(milestones=["Only"])
+    ms_id = plan["milestones"][0]["id"]
+    created = agent.create_tasks_bulk(
+        [{"title": f"Step {i}", "plan_id": plan["id"], "milestone_id": ms_id} for i in range(4)]
+        + [{"title": "Loose"}]
+    )
+    assert store.get_plan(plan["id"])["tasks"] == [t["id"] for t in created[:4]]
+
+    # one bad id aborts the batch
+    with pytest.raises(KeyError):
+        agent.complete_tasks_bulk([created[0]["id"], "missing"])
+    assert store.list_tasks(completed=True) == []
+
+    done = agent.complete_tasks_bulk([t["id"] for t in created[:4]])
+    assert all(t["completed"] for t in done)
+    stored = store.get_plan(plan["id"])
+    assert stored["milestones"][0]["completed"] is True
+    assert stored["progress"] == 100
+
+    # schema violations reject the whole batch before anything is written
+    with pytest.raises(Exception):
+        agent.create_tasks_bulk([{"title": "ok"}, {"title": "bad", "estimated_time": "soon"}])
+    assert len(store.list_tasks()) == 5
+
+
+def test_bulk_tools_return_compact_ids(store):
+    reply = tools.create_tasks_bulk.invoke({"tasks": [{"title": "A"}, {"title": "B"}]})
+    ids = [t["id"] for t in store.list_tasks()]
+    assert reply == f"✅ Created 2 tasks (ids={', '.join(ids)})"
+
+    reply = tools.complete_tasks_bulk.invoke({"task_ids": [ids[0], "nope"]})
+    assert reply.startswith("⚠️") and "no tasks were changed" in reply
+
+
+def test_milestone_index_resolves_plan(store):
+    plan = _plan()
+    ms_id = plan["milestones"][1]["id"]
+    task = agent.create_task("Announce", milestone_id=ms_id)
+
+    assert task["plan_id"] == plan["id"]
+    assert store.get_plan(plan["id"])["milestones"][1]["task_ids"] == [task["id"]]
+    with store.transaction(readonly=True) as tx:
+        assert tx.plan_id_for_milestone(ms_id) == plan["id"]
+        assert tx.plan_id_for_milestone("missing") is None
+
+
+def test_task_table_indexes_follow_updates():
+    table = TaskTable.from_dicts([{"id": "a", "plan_id": "p1"}, {"id": "b", "plan_id": "p1"}, {"id": "c"}])
+    assert table.task_ids_for_plan("p1") == ["a", "b"]
+
+    table.put(Task.from_dict({"id": "a", "plan_id": "p2", "completed": True}))
+    table.put(Task.from_dict({"id": "b", "plan_id": "p1", "completed": True}))  # same plan: position kept
+    assert table.task_ids_for_plan("p1") == ["b"]
+    assert table.task_ids_for_plan("p2") == ["a"]
+    assert [r.id for r in table.rows()] == ["a", "b", "c"]
+
+    plans = PlanTable.from_dicts([{"id": "p1", "milestones": [{"id": "m1"}, {"id": "m2"}]}])
+    plans.put(Plan.from_dict({"id": "p1", "milestones": [{"id": "m2"}]}))
+    assert plans.plan_by_milestone == {"m2": "p1"}
+
+
+def test_slotted_records_round_trip_json_shape():
+    plan = {
+        "id": "p1", "goal": "G", "deadline": "2025-06-01", "priority": "high", "status": None,
+        "milestones": [{"id": "m1", "title": "M", "task_ids": ["t1"], "completed": False, "note": "x"}],
+        "tasks": ["t1"], "created_at": "2025-01-01T00:00:00", "progress": 0, "custom": {"k": [1]},
+    }
+    rec = Plan.from_dict(plan)
+    assert rec.to_dict() == plan
+    assert list(rec.to_dict()) == list(plan)
+    assert not hasattr(rec, "__dict__")
+
+    # copies in both directions: edits never leak into the record
+    plan["milestones"][0]["task_ids"].append("t2")
+    out = rec.to_dict()
+    out["custom"]["k"].append(2)
+    assert rec.to_dict()["milestones"][0]["task_ids"] == ["t1"]
+    assert rec.to_dict()["custom"] == {"k": [1]}
+
+    # absent keys stay absent unless set later
+    partial = Task.from_dict({"id": "t1", "title": "x"})
+    assert partial.to_dict() == {"id": "t1", "title": "x"}
+    partial.completed = True
+    assert partial.to_dict() == {"id": "t1", "title": "x", "completed": True}
+
+
+def test_schema_compiled_once(store, monkeypatch):
+    agent.clear_validator_cache()
+    reads = []
+    real_read = type(agent.SCHEMA_DIR).read_text
+    monkeypatch.setattr(type(agent.SCHEMA_DIR), "read_text",
+                        lambda self, *a, **kw: (reads.append(self.name), real_read(self, *a, **kw))[1])
+
+    agent.create_tasks_bulk([{"title": str(i)} for i in range(10)])
+    agent.create_task("one more")
+    assert reads == ["task_schema.json"]
+    agent.clear_validator_cache()
+
+
+def test_find_similar_plans_matches_linear_scan(store):
+    goals = ["Launch a blog", "launch a Blog!", "Launch my blog", "Write a novel",
+             "Learn Spanish", "Run a marathon", "Launch a vlog", "ab_cd_ef_"]
+    for g in goals:
+        agent.create_plan(goal=g, deadline="2025-06-01", priority="low", milestones=[])
+
+    for query in ("Launch a blog", "abcdef", "learn spanish", "x"):
+        for threshold in (0.5, 0.7, 0.8, 0.9):
+            expected = [g for g in goals if agent._string_similarity(query, g) >= threshold]
+            assert [p["goal"] for p in agent.find_similar_plans(query, threshold)] == expected
+
+    top = agent.find_similar_plans("Launch a blog", 0.5, top_k=2)
+    assert [p["goal"] for p in top] == ["Launch a blog", "launch a Blog!"]
+
+    # the index follows new plans
+    agent.create_plan(goal="Launch a blog today", deadline="2025-06-01", priority="low", milestones=[])
+    assert "Launch a blog today" in [p["goal"] for p in agent.find_similar_plans("Launch a blog", 0.8)]
+
+
+def test_list_tasks_filters_use_indexed_columns(store):
+    plan = _plan()
+    a = agent.create_task("A", plan_id=plan["id"])
+    agent.create_task("B")
+    agent.complete_task(a["id"])
+
+    assert [t["title"] for t in store.list_tasks()] == ["A", "B"]
+    assert [t["title"] for t in store.list_tasks(completed=False)] == ["B"]
+    assert [t["title"] for t in store.list_tasks(plan_id=plan["id"])] == ["A"]
+
+
+def test_query_tasks_filters_sorts_and_pages_like_a_full_scan(store):
+    from agents.productivity.query import TaskQuery
+
+    plan = _plan()
+    ms_id = plan["milestones"][0]["id"]
+    specs = [("Write Intro", "high", "2025-05-02"), ("write outro", None, None), ("Édit draft", "low", "2025-05-01"),
+             ("Publish", "medium", "2025-06-01T10:00"), ("Review", "high", ""), ("Share", "low", "2025-04-30")]
+    for i, (title, priority, deadline) in enumerate(specs * 3):
+        task = agent.create_task(f"{title} {i}", priority=priority, deadline=deadline,
+                                 plan_id=plan["id"] if i % 2 else None, milestone_id=ms_id if i % 4 == 1 else None)
+        if i % 3 == 0:
+            agent.complete_task(task["id"])
+    everything = store.list_tasks()
+
+    cases = [
+        {}, {"completed": False}, {"plan_id": plan["id"], "order_by": "priority"},
+        {"milestone_id": ms_id, "descending": True}, {"priority": "low", "order_by": "title"},
+        {"deadline_from": "2025-05-01", "deadline_to": "2025-06-01", "order_by": "deadline"},
+        {"text": "WRITE", "order_by": "deadline", "descending": True}, {"text": "édit"},
+    ]
+    for filters in cases:
+        query = TaskQuery(**filters)
+        expected = sorted(
+            (t for t in everything if query.matches(Task.from_dict(t))),
+            key=lambda t: query.sort_key(Task.from_dict(t)), reverse=query.descending,
+        )
+        assert [t["id"] for t in agent.iter_tasks(page_size=4, **filters)] == [t["id"] for t in expected], filters
+        page = agent.query_tasks(**filters, limit=3)
+        assert page["tasks"] == expected[:3]
+        assert (page["next_cursor"] is None) == (len(expected) <= 3)
+
+    # the cursor pins the position: rows inserted before it do not shift the next page
+    first = agent.query_tasks(order_by="title", limit=5)
+    agent.create_task("AAA inserted")
+    second = agent.query_tasks(order_by="title", limit=5, cursor=first["next_cursor"])
+    titles = sorted(t["title"] for t in everything)
+    assert [t["title"] for t in first["tasks"] + second["tasks"]] == titles[:10]
+    with pytest.raises(ValueError):
+        agent.query_tasks(order_by="deadline", cursor=first["next_cursor"])
+
+    page = tools.list_tasks.invoke({"limit": 2})
+    assert len(page["tasks"]) == 2 and not any(t["completed"] for t in page["tasks"])
+    assert "created_at" in page["tasks"][0] and "complete_at" not in page["tasks"][0]
+
+def test_store_interfaces_are_abstract():
+    from agents.productivity.store import PlanTaskStore, StoreSession
+
+    with pytest.raises(TypeError):
+        PlanTaskStore()
+
+    class Partial(StoreSession):
+        def get_plan(self, plan_id):
+            return None
+
+    with pytest.raises(TypeError, match="get_task"):
+        Partial()
+
+
+def test_migrate_json_to_sqlite_and_back(tmp_path):
+    src = JsonStore(tmp_path / "legacy")
+    src.put_plans([{"id": "p1", "goal": "G", "milestones": []}])
+    src.put_tasks([{"id": f"t{i}", "title": str(i), "completed": i % 2 == 0, "plan_id": "p1"}
+                   for i in range(5)])
+
+    dst = SqliteStore(tmp_path / "new" / "productivity.db")
+    assert migrate(src, dst) == {"plans": 1, "tasks": 5}
+    assert dst.list_tasks() == src.list_tasks()
+    assert [t["id"] for t in dst.list_tasks(completed=True)] == ["t0", "t2", "t4"]
+
+    # re‑running is an idempotent upsert
+    migrate(src, dst)
+    assert len(dst.list_tasks()) == 5
+
+    back = JsonStore(tmp_path / "roundtrip")
+    migrate(dst, back)
+    assert back.list_plans() == src.list_plans()
+
+
+def test_json_cache_revalidates_on_stat(tmp_path):
+    store = JsonStore(tmp_path)
+    store.put_tasks([{"id": "t1", "title": "one", "completed": False}])
+    cache = _cached_file(store.tasks_file, TaskTable)
+    misses = cache.misses
+
+    # our own write refreshed the cache: repeated reads never re‑parse
+    for _ in range(5):
+        assert [t["id"] for t in store.list_tasks()] == ["t1"]
+    assert cache.misses == misses
+
+    # mutating a returned copy does not leak into the cache
+    store.get_task("t1")["title"] = "changed"
+    assert store.get_task("t1")["title"] == "one"
+
+    # a foreign writer (new inode via rename) is picked up on the next read
+    tmp = tmp_path / "foreign.json"
+    tmp.write_text(json.dumps([{"id": "t2", "title": "two", "completed": True}]))
+    tmp.replace(store.tasks_file)
+    assert [t["id"] for t in store.list_tasks()] == ["t2"]
+    assert cache.misses == misses + 1
+
+
+@pytest.mark.parametrize("backend", ["json", "journal"])
+def test_codecs_round_trip_and_switch_without_migration(tmp_path, backend):
+    from agents.productivity.codec import CODECS, detect_format, get_codec
+
+    data_dir = tmp_path / "data"
+    data_file = data_dir / ("tasks.json" if backend == "json" else "snapshot.json")
+    legacy = [{"id": "t0", "title": "Legacy", "completed": False, "created_at": "2025-01-01"}]
+    data_dir.mkdir()
+    data_file.write_text(json.dumps(legacy if backend == "json" else {"tasks": legacy}, indent=2))
+
+    # each step reads what the previous codec wrote and rewrites it with the next one
+    for i, name in enumerate(CODECS):
+        clear_json_cache()
+        st = open_store(backend, data_dir, codec=name)
+        st.put_task({**legacy[0], "id": f"t{i + 1}", "title": f"Via {name} é"})
+        if backend == "journal":
+            st.compact()
+        raw = data_file.read_bytes()
+        assert detect_format(raw) == get_codec(name).format and not raw.startswith(b"[\n")
+        clear_json_cache()
+        titles = [t["title"] for t in open_store(backend, data_dir).list_tasks()]
+        assert titles == ["Legacy"] + [f"Via {n} é" for n in CODECS[:i + 1]]
+
+def test_find_duplicates_groups_near_identical_records(store):
+    for g in ("Launch a blog", "launch a  Blog", "Launch the blog", "Write a novel", "Learn Spanish"):
+        agent.create_plan(goal=g, deadline="2025-06-01", priority="low", milestones=[])
+    agent.create_tasks_bulk([{"title": "Buy milk"}, {"title": "buy milk!"}, {"title": "Call mum"}])
+
+    groups = agent.find_duplicates("plans", threshold=0.6)
+    assert [[p["goal"] for p in g] for g in groups] == [["Launch a blog", "launch a  Blog", "Launch the blog"]]
+    assert [[t["title"] for t in g] for g in agent.find_duplicates("tasks", 0.6)] == [["Buy milk", "buy milk!"]]
+    assert agent.find_duplicates("plans", threshold=1.0) == [groups[0][:2]]
+
+    compact = tools.find_duplicates.invoke({"kind": "tasks", "threshold": 0.6})
+    assert [[set(r) for r in g] for g in compact["groups"]] == [[{"id", "title"}, {"id", "title"}]]
+    assert compact["total"] == 1 and compact["next_cursor"] is None
+
+    # a page at a time, largest groups first, with the total count
+    agent.create_tasks_bulk([{"title": t} for t in ("Call mum", "call mum!", "Call Mum", "Pay rent", "pay rent.")])
+    page = tools.find_duplicates.invoke({"kind": "tasks", "threshold": 0.6, "limit": 1})
+    assert [len(g) for g in page["groups"]] == [4] and page["total"] == 3 and page["next_cursor"] == "1"
+    rest = tools.find_duplicates.invoke({"kind": "tasks", "threshold": 0.6, "limit": 5, "cursor": page["next_cursor"]})
+    assert [len(g) for g in rest["groups"]] == [2, 2] and rest["next_cursor"] is None
+    assert "error" in tools.find_duplicates.invoke({"kind": "tasks", "cursor": "x"})
+
+
+def test_duplicate_groups_match_exact_pairwise_cosine():
+    import itertools
+    import random
+
+    from agents.productivity import dedup
+
+    rng = random.Random(7)
+    words = "learn build write study run read cook plan launch design blog app book".split()
+    texts = [" ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(300)] + ["", "  "]
+
+    uniq = list(dict.fromkeys(dedup._normalise(t) for t in texts))
+    vectors, norms = dedup._tfidf([dedup._grams(u, dedup.NGRAM) for u in uniq])
+    sets = dedup._DisjointSet(len(uniq))
+    for i, j in itertools.combinations(range(len(uniq)), 2):
+        if norms[i] and norms[j] and dedup._cosine(vectors[i], vectors[j], norms[i], norms[j]) >= 0.8:
+            sets.union(i, j)
+    position = {u: k for k, u in enumerate(uniq)}
+    expected = {}
+    for index, text in enumerate(texts):
+        expected.setdefault(sets.find(position[dedup._normalise(text)]), []).append(index)
+
+    assert dedup.find_duplicate_groups(texts, 0.8) == sorted(
+        (g for g in expected.values() if len(g) > 1), key=lambda g: g[0])
+
+
+def test_schedule_day_packs_by_priority_deadline_and_estimate(store):
+    from datetime import datetime
+
+    from agents.productivity import scheduler
+
+    agent.create_tasks_bulk([
+        {"title": "low", "priority": "low", "estimated_time": 30},
+        {"title": "medium", "priority": "medium", "estimated_time": 90},
+        {"title": "high", "priority": "high", "estimated_time": 120},
+        {"title": "too long", "priority": "high", "estimated_time": 600},
+        {"title": "due soon", "priority": "low", "deadline": datetime.utcnow().date().isoformat(), "estimated_time": 60},
+    ])
+    schedule = agent.schedule_day(available_hours=4)
+    # due today outranks an undated "high"; medium (90') no longer fits, low (30') does
+    assert list(schedule.values()) == ["due soon", "high", "low"]
+    assert list(schedule) == ["09:00 - 10:00", "10:00 - 12:00", "12:00 - 12:30"]
+
+    with_breaks = agent.schedule_day(available_hours=5, break_minutes=15, break_every=120)
+    assert list(with_breaks.items())[:3] == [
+        ("09:00 - 10:00", "due soon"), ("10:00 - 12:00", "high"), ("12:00 - 12:15", scheduler.BREAK_LABEL)]
+
+    many = [{"title": str(i), "priority": "low", "estimated_time": 60} for i in range(5000)]
+    many.append({"title": "urgent", "priority": "high", "deadline": "2000-01-01"})
+    slots = scheduler.build_schedule(many, 120, datetime(2025, 1, 1, 9))
+    assert [task["title"] for _, _, task in slots] == ["urgent", "0"]
+
+
+def test_build_schedule_stops_once_nothing_left_fits(monkeypatch):
+    import heapq
+    from datetime import datetime
+
+    from agents.productivity import scheduler
+
+    pops = []
+    real_heappop = heapq.heappop
+    monkeypatch.setattr(scheduler.heapq, "heappop", lambda heap: pops.append(1) or real_heappop(heap))
+    tasks = [{"title": "quick", "priority": "high", "estimated_time": 15}]
+    tasks += [{"title": f"long {i}", "priority": "low", "estimated_time": 60} for i in range(1000)]
+
+    slots = scheduler.build_schedule(tasks, 70, datetime(2030, 1, 1, 9))
+    # after "quick", 55 minutes are left: none of the long tasks is even popped
+    assert [task["title"] for _, _, task in slots] == ["quick"]
+    assert len(pops) < 10
+
+
+def test_progress_counters_are_incremental_and_rebuildable(store):
+    plan = _plan()
+    draft, publish = (ms["id"] for ms in plan["milestones"])
+    a, b = agent.create_tasks_bulk([
+        {"title": "A", "milestone_id": draft}, {"title": "B", "milestone_id": publish}])
+    agent.complete_tasks_bulk([a["id"], a["id"]])  # repeats count once
+
+    assert agent.get_plan_progress(plan["id"]) == {
+        "progress": 50, "tasks_done": 1, "tasks_total": 2, "milestones_done": 1, "milestones_total": 2}
+    assert "Progress: 50% (1/2 tasks done)" in agent.summarize_plan(plan["id"])
+    assert tools.track_progress.invoke({"plan_id": plan["id"]}) == (
+        "Progress: 50% — 1/2 milestones, 1/2 tasks done")
+
+    # a new open task re-opens its completed milestone
+    agent.create_task("A2", milestone_id=draft)
+    stored = store.get_plan(plan["id"])
+    assert (stored["milestones"][0]["completed"], stored["progress"]) == (False, 0)
+    assert agent.check_progress_counters() == []
+
+    # drift (or a plan written before the counters) is detected and rebuilt
+    for key in ("tasks_done", "tasks_total", "milestones_done"):
+        stored.pop(key)
+    stored["milestones"][0]["tasks_done"] = 7
+    store.put_plan(stored)
+    assert agent.get_plan_progress(plan["id"])["tasks_total"] == 3
+    assert agent.check_progress_counters() == [plan["id"]]
+    assert agent.check_progress_counters(repair=True) == [plan["id"]]
+    assert agent.check_progress_counters() == []
+    agent.complete_task(b["id"])
+    assert store.get_plan(plan["id"])["milestones"][1]["completed"] is True
+
+
+def _task(task_id):
+    return {"id": task_id, "title": task_id.upper(), "completed": False, "created_at": "2025-01-01"}
+
+
+def test_journal_replays_tail_and_recovers_from_torn_write(tmp_path):
+    store = JournalStore(tmp_path)
+    store.put_task(_task("t1"))
+    store.put_task(_task("t2"))
+
+    other = _Journal(tmp_path)  # a second process's view of the same files
+    tables = other.load()
+    assert list(tables["tasks"].by_id) == ["t1", "t2"]
+    store.put_task(_task("t3"))
+    assert other.load() is tables and list(tables["tasks"].by_id) == ["t1", "t2", "t3"]  # tail only
+
+    # crash mid‑append: the last record is cut short
+    log = tmp_path / store_module.JOURNAL_FILENAME
+    log.write_bytes(log.read_bytes()[:-7])
+    clear_json_cache()
+    store = JournalStore(tmp_path)
+    assert [t["id"] for t in store.list_tasks()] == ["t1", "t2"]
+
+    # the next writer drops the torn bytes before appending
+    store.put_task(_task("t4"))
+    assert len(list(_decode_entries(log.read_bytes()))) == 3
+    clear_json_cache()
+    assert [t["id"] for t in JournalStore(tmp_path).list_tasks()] == ["t1", "t2", "t4"]
+
+
+def test_journal_compacts_into_snapshot(tmp_path, monkeypatch):
+    store = JournalStore(tmp_path)
+    log = tmp_path / store_module.JOURNAL_FILENAME
+    store.put_tasks([_task("t1"), _task("t2")])
+    store.put_task(dict(_task("t1"), completed=True))
+    old_log = log.read_bytes()
+
+    store.compact()
+    assert log.stat().st_size == 0
+    snapshot = json.loads((tmp_path / store_module.SNAPSHOT_FILENAME).read_text())
+    assert [(t["id"], t["completed"]) for t in snapshot["tasks"]] == [("t1", True), ("t2", False)]
+
+    # crash between the snapshot and log renames: the old log replays over the new snapshot
+    log.write_bytes(old_log)
+    clear_json_cache()
+    assert [(t["id"], t["completed"]) for t in JournalStore(tmp_path).list_tasks()] == [
+        ("t1", True), ("t2", False)]
+
+    # past the threshold, a commit triggers compaction in the background
+    monkeypatch.setattr(store_module, "JOURNAL_COMPACT_BYTES", 1)
+    store = JournalStore(tmp_path)
+    store.put_task(_task("t3"))
+    store.journal._compactor.join(timeout=5)
+    assert log.stat().st_size == 0
+    clear_json_cache()
+    assert [t["id"] for t in JournalStore(tmp_path).list_tasks()] == ["t1", "t2", "t3"]
+
+
+def test_failed_background_compaction_is_logged_and_cleaned_up(tmp_path, monkeypatch, caplog):
+    import threading
+
+    monkeypatch.setattr(store_module, "JOURNAL_COMPACT_BYTES", 1)
+    store = JournalStore(tmp_path)
+
+    real_dumps = store.journal.codec.dumps
+
+    def dumps(rows):  # only the snapshot write fails
+        if threading.current_thread().name == "journal-compactor":
+            raise OSError("disk full")
+        return real_dumps(rows)
+
+    monkeypatch.setattr(store.journal.codec, "dumps", dumps)
+    store.put_task(_task("t1"))
+    store.journal._compactor.join(timeout=5)
+
+    assert isinstance(store.journal.compact_error, OSError)
+    assert "compacting" in caplog.text and "disk full" in caplog.text
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert (tmp_path / store_module.JOURNAL_FILENAME).stat().st_size > 0  # the log is intact
+    monkeypatch.undo()
+    clear_json_cache()
+    assert [t["id"] for t in JournalStore(tmp_path).list_tasks()] == ["t1"]
+
+
+def test_tools_work_in_the_callers_shard(store, monkeypatch):
+    from langgraph.graph import END, StateGraph
+    from typing_extensions import TypedDict
+
+    monkeypatch.setattr(agent, "STORE_BACKEND", store.name)
+    monkeypatch.setattr(agent, "STORE_SHARDING", True)
+    alice = {"configurable": {"thread_id": "alice"}}
+    bob = {"configurable": {"thread_id": "bob/../x", "user_id": "bob"}}
+    tools.create_task.invoke({"title": "A"}, config=alice)
+    tools.create_task.invoke({"title": "B"}, config=bob)
+
+    assert [t["title"] for t in tools.list_tasks.invoke({}, config=alice)["tasks"]] == ["A"]
+    assert [t["title"] for t in tools.list_tasks.invoke({}, config=bob)["tasks"]] == ["B"]
+    assert store.list_tasks() == []  # no key → the shared default store
+    shard_dirs = {agent.shard_data_dir("alice"), agent.shard_data_dir("bob")}
+    assert all(d.parent == agent.DATA_DIR / "shards" and d.is_dir() for d in shard_dirs)
+    assert agent.get_store() is store
+    with agent.use_shard("alice"):
+        assert agent.get_store() is not store
+
+    # inside a graph, the tool picks the thread id up from the run's config
+    class State(TypedDict, total=False):
+        titles: list
+
+    g = StateGraph(State)
+    g.add_node("node", lambda state: {"titles": [t["title"] for t in tools.list_tasks.invoke({})["tasks"]]})
+    g.set_entry_point("node")
+    g.add_edge("node", END)
+    assert g.compile().invoke({}, alice) == {"titles": ["A"]}
+
+    monkeypatch.setattr(agent, "STORE_SHARDING", False)
+    assert tools.list_tasks.invoke({}, config=alice)["tasks"] == []
+
+
+def test_least_recently_used_shard_stores_are_closed(store, monkeypatch):
+    monkeypatch.setattr(agent, "STORE_BACKEND", store.name)
+    monkeypatch.setattr(agent, "MAX_OPEN_STORES", 3)  # the shared store + two shards
+    closed = []
+    monkeypatch.setattr(type(store), "close", lambda self: closed.append(self))
+
+    opened = {}
+    for user in ("a", "b", "a", "c"):  # "a" was used after "b", so "b" goes
+        with agent.use_shard(user):
+            opened.setdefault(user, agent.get_store())
+            agent.create_task(f"task of {user}")
+    assert closed == [opened["b"]]
+    assert agent.get_store() is store  # the shared store is never evicted
+    with agent.use_shard("b"):
+        assert agent.get_store() is not opened["b"]  # re-opened, data intact
+        assert [t["title"] for t in agent.list_tasks()] == ["task of b"]
+
+
+def test_closed_stores_reopen_on_next_use(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, "JSON_CACHE_FILES", 2)
+    for backend in BACKENDS:
+        backend_store = open_store(backend, tmp_path / backend)
+        backend_store.put_task(_task("t1"))
+        backend_store.close()
+        backend_store.close()  # idempotent
+        assert [t["id"] for t in backend_store.list_tasks()] == ["t1"]
+        backend_store.close()
+    assert len(store_module._json_cache) <= 2
+
+
+def test_sqlite_readers_run_while_a_writer_is_open(tmp_path):
+    import threading
+
+    store = SqliteStore(tmp_path / "p.db")
+    store.put_plans([{"id": "p1", "goal": "Learn Rust"}])
+    writing, done = threading.Event(), threading.Event()
+
+    def writer():
+        with store.transaction() as tx:
+            tx.put_task(_task("t1"))
+            tx.put_plans([{"id": "p2", "goal": "Run a marathon"}])
+            writing.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    assert writing.wait(5)
+    # not blocked by the open write transaction, and not seeing it either
+    assert store.list_tasks() == []
+    with store.transaction(readonly=True) as tx:
+        assert tx.get_plan("p2") is None and len(tx.goal_index()) == 1
+    done.set()
+    thread.join(5)
+    assert [t["id"] for t in store.list_tasks()] == ["t1"]
+    with store.transaction(readonly=True) as tx:
+        assert len(tx.goal_index()) == 2  # the writer's plan was folded in at commit
+
+    # another connection's commit (another process) is picked up too
+    other = SqliteStore(tmp_path / "p.db")
+    other.put_plans([{"id": "p3", "goal": "Write a novel"}])
+    with store.transaction(readonly=True) as tx:
+        assert [plan_id for plan_id, _ in tx.goal_index().search("write a novel", 0.8)] == ["p3"]
+    store.close()
+    other.close()
+
+
+def test_concurrent_commit_conflicts_and_atomic_retries(store):
+    if store.name == "sqlite":
+        pytest.skip("SQLite serialises writers itself")
+    plan = _plan()
+    ms_id = plan["milestones"][0]["id"]
+    task = agent.create_task("Outline", plan_id=plan["id"], milestone_id=ms_id)
+
+    other = agent.create_task("Draft", plan_id=plan["id"], milestone_id=ms_id)
+
+    # a commit landing between this transaction's read and its commit → conflict, nothing written
+    with pytest.raises(store_module.ConflictError):
+        with store.transaction() as tx:
+            seen = tx.get_task(other["id"])
+            agent.complete_task(other["id"])
+            tx.put_task({**seen, "title": "Lost update"})
+    assert store.get_task(other["id"])["title"] == "Draft"
+
+    # commits to records this transaction never read do not conflict
+    with store.transaction() as tx:
+        seen = tx.get_task(task["id"])
+        agent.create_task("Unrelated")
+        tx.put_task({**seen, "title": "Outline v1"})
+
+    # atomic() re-runs the function on top of the concurrent commit
+    attempts = []
+
+    def rename(tx):
+        attempts.append(1)
+        current = tx.get_task(task["id"])
+        if len(attempts) == 1:
+            agent.complete_task(task["id"])
+        tx.put_task({**current, "title": "Outline v2"})
+
+    store.atomic(rename)
+    assert len(attempts) == 2
+    stored = store.get_task(task["id"])
+    assert stored["title"] == "Outline v2" and stored["completed"]
+    assert store.get_plan(plan["id"])["tasks_done"] == 2
+
+
+def test_rw_file_lock_shares_readers_and_excludes_writers(tmp_path):
+    from filelock import Timeout
+
+    lock = store_module.RWFileLock(str(tmp_path / "x.lock"), timeout=0.05)
+    with lock.shared(), lock.shared():
+        with pytest.raises(Timeout):
+            with lock.exclusive():
+                pass
+    with lock.exclusive():
+        pass
+
+
+def test_parallel_writers_lose_no_updates(tmp_path, monkeypatch):
+    from benchmarks.store_stress import run
+
+    # a small threshold, so the journal compacts in the background while the workers commit
+    compact_bytes = 16 << 10
+    monkeypatch.setattr(store_module, "JOURNAL_COMPACT_BYTES", compact_bytes)
+    procs, ops = 4, 60
+    for backend in ("json", "journal"):
+        data_dir = tmp_path / backend
+        result = run(backend, procs=procs, ops=ops, data_dir=data_dir, compact_bytes=compact_bytes)
+        assert result["exitcodes"] == [0] * procs
+        assert result["problems"] == []
+        tasks = agent.get_store().list_tasks()
+        assert len(tasks) == procs * ops and all(t["completed"] for t in tasks)
+        (plan,) = agent.list_plans()
+        assert len(plan["tasks"]) == len(plan["milestones"][0]["task_ids"]) == plan["tasks_done"] == procs * ops
+    assert (tmp_path / "journal" / store_module.SNAPSHOT_FILENAME).exists()  # it did compact
+    agent.set_store(None)
+
+
+def test_async_api_and_tools_run_off_the_event_loop(store, monkeypatch):
+    import asyncio
+    import threading
+
+    monkeypatch.setattr(agent, "STORE_BACKEND", store.name)
+    monkeypatch.setattr(agent, "STORE_SHARDING", True)
+    threads = set()
+    real_get_store = agent.get_store
+    monkeypatch.setattr(agent, "get_store",
+                        lambda: (threads.add(threading.current_thread().name), real_get_store())[1])
+
+    async def main():
+        plan = await agent.acreate_plan(goal="Async", deadline="2030-01-01", priority="low", milestones=["M"])
+        alice = {"configurable": {"thread_id": "alice"}}
+        replies = await asyncio.gather(*(tools.create_task.ainvoke({"title": f"T{i}"}, config=alice)
+                                         for i in range(5)))
+        with agent.use_shard("alice"):
+            alice_tasks = await agent.alist_tasks()
+        return plan, replies, alice_tasks, await agent.aget_plan_progress(plan["id"])
+
+    plan, replies, alice_tasks, progress = asyncio.run(main())
+    assert all(r.startswith("✅") for r in replies)
+    assert sorted(t["title"] for t in alice_tasks) == [f"T{i}" for i in range(5)]
+    assert threads and all(name.startswith("focusflow-io") for name in threads)
+    assert store.get_plan(plan["id"]) and store.list_tasks() == []
+    assert progress["tasks_total"] == 0
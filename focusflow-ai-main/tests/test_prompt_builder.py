@@ -0,0 +1,38 @@
+# /tests/test_prompt_builder.py
+import os
+
+import pytest
+
+from agents.productivity import prompt_builder
+
+
+@pytest.fixture
+def fragments(tmp_path, monkeypatch):
+    for name in ("base.txt", *prompt_builder.INTENT_FRAGMENTS.values()):
+        (tmp_path / name).write_text(name.upper())
+    monkeypatch.setattr(prompt_builder, "PROMPT_DIR", str(tmp_path))
+    prompt_builder.clear_prompt_cache()
+    yield tmp_path
+    prompt_builder.clear_prompt_cache()
+
+
+def test_prompt_is_assembled_once_per_intent(fragments, monkeypatch):
+    assert prompt_builder.build_prompt([], "tasks") == "BASE.TXT\n\nTASKS.TXT"
+    assert prompt_builder.build_prompt([], None) == "BASE.TXT"
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **kw: opened.append(a[0]) or real_open(*a, **kw))
+    (fragments / "tasks.txt").write_text("edited")
+    assert prompt_builder.build_prompt([], "tasks") == "BASE.TXT\n\nTASKS.TXT"  # production: no I/O
+    assert opened == []
+
+
+def test_prompt_reload_picks_up_edited_fragments(fragments, monkeypatch):
+    monkeypatch.setattr(prompt_builder, "PROMPT_RELOAD", True)
+    assert prompt_builder.build_prompt([], "planning") == "BASE.TXT\n\nPLANNING.TXT"
+
+    path = fragments / "planning.txt"
+    path.write_text("New planning rules")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert prompt_builder.build_prompt([], "planning") == "BASE.TXT\n\nNew planning rules"